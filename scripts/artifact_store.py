@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""Content-addressed, compressed store for certificate and result artifacts.
+
+Repeated runs leave many near-identical JSON files behind (the
+``test_3gaps_enhanced_*.json`` certificates, the cumulative
+``trajectory_obstruction_log.json.part_*`` checkpoints, each repeating all
+earlier entries). This store splits files into content-defined chunks
+(gear rolling hash, 4 KiB min / ~16 KiB average / 128 KiB max), so shared
+stretches produce identical chunks even when they are shifted, and keeps
+each chunk once under its SHA-256, compressed with lzma (default) or zlib.
+
+Layout under the store root (``artifact_store/`` by default):
+ - ``chunks/ab/abcdef...``   one compressed chunk; the first byte is the
+                             codec tag (b'L' lzma, b'Z' zlib, b'R' raw);
+ - ``manifests/<relpath>.cas.json``
+                             ``{'format', 'path', 'size', 'sha256',
+                             'chunks': [[sha256, size], ...]}``.
+
+``open_artifact(manifest)`` returns a seekable, read-only binary stream that
+decompresses one chunk at a time, so a logical file can be fed to
+``json.load`` / line readers without being materialised. ``put --replace``
+swaps the original for a small ``<file>.cas.json`` stub pointing at the
+store manifest; ``restore`` rebuilds it byte for byte (SHA-256 checked).
+
+Usage:
+    python scripts/artifact_store.py put certificates/*.json results/*.part_*.json
+    python scripts/artifact_store.py cat certificates/test_3gaps_enhanced_20251021_154322.json
+    python scripts/artifact_store.py restore certificates/test_3gaps_enhanced_20251021_154322.json
+    python scripts/artifact_store.py verify | stats | gc
+"""
+import argparse
+import bisect
+import hashlib
+import io
+import json
+import lzma
+import os
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from manifest_engine import ROOT, atomic_write_text, rel_posix
+
+STORE_ROOT = ROOT / 'artifact_store'
+FORMAT = 'lychrel-cas/1'
+STUB_SUFFIX = '.cas.json'
+
+MIN_CHUNK = 4 << 10
+MAX_CHUNK = 128 << 10
+READ_SIZE = 8 << 20                # taille des lectures de put_file
+AVG_BITS = 14                      # taille moyenne ~ 2^14 = 16 KiB
+_MASK64 = (1 << 64) - 1
+# Bits de poids fort : ils dépendent des 64 derniers octets (hash « gear »).
+_CUT_MASK = ((1 << AVG_BITS) - 1) << (64 - AVG_BITS)
+_GEAR = [int.from_bytes(hashlib.sha256(b'gear%d' % i).digest()[:8], 'little') for i in range(256)]
+
+_CODECS = {
+    'lzma': (b'L', lambda b: lzma.compress(b, preset=6)),
+    'zlib': (b'Z', lambda b: zlib.compress(b, 9)),
+    'raw': (b'R', bytes),
+}
+_DECODERS = {b'L': lzma.decompress, b'Z': zlib.decompress, b'R': bytes}
+
+
+def chunk_boundaries(data) -> Iterator[Tuple[int, int]]:
+    """Découpage à contenu défini : yields (start, end) couvrant ``data``."""
+    n = len(data)
+    start = 0
+    gear = _GEAR
+    while start < n:
+        end = min(start + MAX_CHUNK, n)
+        i = start + MIN_CHUNK
+        if i >= end:
+            yield start, end
+            start = end
+            continue
+        h = 0
+        cut = end
+        for i in range(i, end):
+            h = ((h << 1) + gear[data[i]]) & _MASK64
+            if not h & _CUT_MASK:
+                cut = i + 1
+                break
+        yield start, cut
+        start = cut
+
+
+class ArtifactStore:
+    def __init__(self, root: Path = STORE_ROOT, codec: str = 'lzma'):
+        if codec not in _CODECS:
+            raise ValueError(f'unknown codec {codec!r}')
+        self.root = Path(root)
+        self.codec = codec
+        self.chunk_dir = self.root / 'chunks'
+        self.manifest_dir = self.root / 'manifests'
+
+    # ---- chunks ----
+    def chunk_path(self, digest: str) -> Path:
+        return self.chunk_dir / digest[:2] / digest
+
+    def put_chunk(self, data: bytes) -> Tuple[str, bool]:
+        """Stocke un chunk s'il est absent ; retourne (sha256, nouveau)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.chunk_path(digest)
+        if path.exists():
+            return digest, False
+        tag, compress = _CODECS[self.codec]
+        payload = compress(data)
+        if len(payload) >= len(data):
+            tag, payload = b'R', data
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f'.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(tag)
+            f.write(payload)
+        os.replace(tmp, path)
+        return digest, True
+
+    def get_chunk(self, digest: str, verify: bool = False) -> bytes:
+        with open(self.chunk_path(digest), 'rb') as f:
+            raw = f.read()
+        data = _DECODERS[raw[:1]](raw[1:])
+        if verify and hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f'corrupted chunk {digest}')
+        return data
+
+    # ---- fichiers logiques ----
+    def manifest_path(self, rel: str) -> Path:
+        return self.manifest_dir / (rel + STUB_SUFFIX)
+
+    def put_file(self, path: Path) -> Dict:
+        """Découpe, stocke et indexe un fichier (lu par blocs) ; retourne son manifeste."""
+        path = Path(path)
+        rel = rel_posix(path)
+        chunks = []
+        new_bytes = 0
+        size = 0
+        h = hashlib.sha256()
+        buf = bytearray()
+        with open(path, 'rb') as f:
+            eof = False
+            while not eof:
+                block = f.read(READ_SIZE)
+                eof = not block
+                h.update(block)
+                size += len(block)
+                buf += block
+                done = 0
+                for a, b in chunk_boundaries(buf):
+                    # coupe non définitive tant que MAX_CHUNK octets ne suivent pas a
+                    if not eof and a + MAX_CHUNK > len(buf):
+                        break
+                    digest, new = self.put_chunk(bytes(buf[a:b]))
+                    chunks.append([digest, b - a])
+                    if new:
+                        new_bytes += b - a
+                    done = b
+                del buf[:done]
+        manifest = {
+            'format': FORMAT,
+            'path': rel,
+            'size': size,
+            'sha256': h.hexdigest(),
+            'chunks': chunks,
+        }
+        atomic_write_text(self.manifest_path(rel), json.dumps(manifest, indent=1))
+        manifest['new_bytes'] = new_bytes
+        return manifest
+
+    def load_manifest(self, ref) -> Dict:
+        """``ref`` : chemin logique (relatif au dépôt), stub ``*.cas.json`` ou manifeste."""
+        p = Path(ref)
+        if not p.name.endswith(STUB_SUFFIX):
+            p = self.manifest_path(rel_posix(p))
+        with open(p, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT:
+            raise ValueError(f'{p}: not a {FORMAT} manifest')
+        return manifest
+
+    def open(self, ref) -> 'ArtifactReader':
+        return ArtifactReader(self, self.load_manifest(ref))
+
+    def restore(self, ref, out: Optional[Path] = None) -> Path:
+        manifest = self.load_manifest(ref)
+        out = Path(out) if out else ROOT / manifest['path']
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(out.name + f'.{os.getpid()}.tmp')
+        h = hashlib.sha256()
+        with self.open(ref) as src, open(tmp, 'wb') as dst:
+            for block in iter(lambda: src.read(1 << 20), b''):
+                h.update(block)
+                dst.write(block)
+        if h.hexdigest() != manifest['sha256']:
+            tmp.unlink()
+            raise ValueError(f"{manifest['path']}: sha256 mismatch after restore")
+        os.replace(tmp, out)
+        return out
+
+    def manifests(self) -> Iterator[Dict]:
+        if not self.manifest_dir.exists():
+            return
+        for p in sorted(self.manifest_dir.rglob('*' + STUB_SUFFIX)):
+            with open(p, 'r', encoding='utf-8') as f:
+                yield json.load(f)
+
+    def verify(self) -> List[str]:
+        """Vérifie chunks et SHA-256 logiques ; liste des erreurs."""
+        errors = []
+        for m in self.manifests():
+            h = hashlib.sha256()
+            try:
+                for digest, size in m['chunks']:
+                    data = self.get_chunk(digest, verify=True)
+                    if len(data) != size:
+                        raise ValueError(f'chunk {digest}: size {len(data)} != {size}')
+                    h.update(data)
+            except (OSError, ValueError, lzma.LZMAError, zlib.error) as e:
+                errors.append(f"{m['path']}: {e}")
+                continue
+            if h.hexdigest() != m['sha256']:
+                errors.append(f"{m['path']}: sha256 mismatch")
+        return errors
+
+    def gc(self) -> int:
+        """Supprime les chunks non référencés ; retourne leur nombre."""
+        live = {digest for m in self.manifests() for digest, _ in m['chunks']}
+        removed = 0
+        if self.chunk_dir.exists():
+            for p in self.chunk_dir.rglob('*'):
+                if p.is_file() and p.name not in live:
+                    p.unlink()
+                    removed += 1
+        return removed
+
+    def stats(self) -> Dict:
+        logical = 0
+        files = 0
+        refs = set()
+        for m in self.manifests():
+            files += 1
+            logical += m['size']
+            refs.update(d for d, _ in m['chunks'])
+        stored = sum(p.stat().st_size for p in self.chunk_dir.rglob('*') if p.is_file()) \
+            if self.chunk_dir.exists() else 0
+        return {'files': files, 'logical_bytes': logical, 'unique_chunks': len(refs),
+                'stored_bytes': stored, 'ratio': (logical / stored) if stored else None}
+
+
+class ArtifactReader(io.RawIOBase):
+    """Flux binaire en lecture seule d'un fichier logique (un chunk en mémoire)."""
+
+    def __init__(self, store: ArtifactStore, manifest: Dict):
+        super().__init__()
+        self.store = store
+        self.manifest = manifest
+        self._offsets = []
+        off = 0
+        for _, size in manifest['chunks']:
+            self._offsets.append(off)
+            off += size
+        self._size = off
+        self._pos = 0
+        self._cur_idx = -1
+        self._cur = b''
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError('invalid whence')
+        if pos < 0:
+            raise ValueError('negative seek position')
+        self._pos = pos
+        return pos
+
+    def _load(self, idx: int):
+        if idx != self._cur_idx:
+            self._cur = self.store.get_chunk(self.manifest['chunks'][idx][0])
+            self._cur_idx = idx
+
+    def readinto(self, b):
+        if self._pos >= self._size:
+            return 0
+        idx = bisect.bisect_right(self._offsets, self._pos) - 1
+        self._load(idx)
+        start = self._pos - self._offsets[idx]
+        n = min(len(b), len(self._cur) - start)
+        b[:n] = self._cur[start:start + n]
+        self._pos += n
+        return n
+
+
+def open_artifact(ref, store_root: Path = STORE_ROOT, text: bool = False, encoding: str = 'utf-8'):
+    """Ouvre un fichier logique du store (binaire bufferisé, ou texte)."""
+    raw = ArtifactStore(store_root).open(ref)
+    buf = io.BufferedReader(raw, buffer_size=1 << 16)
+    return io.TextIOWrapper(buf, encoding=encoding) if text else buf
+
+
+def write_stub(manifest: Dict, store: ArtifactStore):
+    """Remplace le fichier visible par un stub ``<fichier>.cas.json`` (léger)."""
+    stub = {k: manifest[k] for k in ('format', 'path', 'size', 'sha256')}
+    stub['manifest'] = os.path.relpath(store.manifest_path(manifest['path']), ROOT).replace(os.sep, '/')
+    stub['chunks'] = manifest['chunks']
+    target = ROOT / manifest['path']
+    atomic_write_text(target.with_name(target.name + STUB_SUFFIX), json.dumps(stub, indent=1))
+    target.unlink()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Store adressé par contenu (CDC + lzma/zlib)')
+    parser.add_argument('--store', type=str, default=str(STORE_ROOT))
+    parser.add_argument('--codec', choices=sorted(_CODECS), default='lzma')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_put = sub.add_parser('put', help='archiver des fichiers')
+    p_put.add_argument('files', nargs='+')
+    p_put.add_argument('--replace', action='store_true',
+                       help='remplacer chaque fichier par un stub <fichier>.cas.json')
+    p_cat = sub.add_parser('cat', help='écrire un fichier logique sur stdout')
+    p_cat.add_argument('ref')
+    p_res = sub.add_parser('restore', help='reconstruire un fichier (SHA-256 vérifié)')
+    p_res.add_argument('refs', nargs='+')
+    p_res.add_argument('--out', type=str, default=None, help='destination (une seule référence)')
+    sub.add_parser('verify', help='vérifier tous les chunks et fichiers logiques')
+    sub.add_parser('stats', help='taille logique vs stockée')
+    sub.add_parser('gc', help='supprimer les chunks non référencés')
+    args = parser.parse_args(argv)
+    if args.cmd == 'restore' and args.out and len(args.refs) > 1:
+        parser.error('--out takes a single ref; restore several refs without --out')
+
+    store = ArtifactStore(Path(args.store), codec=args.codec)
+    if args.cmd == 'put':
+        for f in args.files:
+            m = store.put_file(Path(f))
+            print(f"{m['path']}: {m['size']} bytes, {len(m['chunks'])} chunks, {m['new_bytes']} new")
+            if args.replace:
+                write_stub(m, store)
+        print(json.dumps(store.stats()))
+    elif args.cmd == 'cat':
+        with open_artifact(args.ref, Path(args.store)) as src:
+            for block in iter(lambda: src.read(1 << 20), b''):
+                sys.stdout.buffer.write(block)
+    elif args.cmd == 'restore':
+        for ref in args.refs:
+            print(f'restored {store.restore(ref, args.out)}')
+    elif args.cmd == 'verify':
+        errors = store.verify()
+        for e in errors:
+            print(f'ERROR: {e}')
+        print('OK' if not errors else f'{len(errors)} error(s)')
+        return 2 if errors else 0
+    elif args.cmd == 'stats':
+        print(json.dumps(store.stats(), indent=2))
+    elif args.cmd == 'gc':
+        print(f'removed {store.gc()} unreferenced chunk(s)')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Bounded-size representation of the exponentially weighted A_int metric.
+
+A_int(n) = sum_{i=1}^{d//2-1} 2^{i-1} * |a_i - a_{d-1-i}|
+
+For a 4000-digit iterate this is a ~2000-bit integer, rebuilt with bigint
+shifts and adds at every iteration. ``WeightedAsymmetry`` keeps instead the
+sparse list of asymmetric mirror positions and their magnitudes (1..9) and
+answers exactly the comparisons used by GAP1/GAP3:
+
+ - ``A_int >= 1``                      -> ``bool(profile)``
+ - ``A_int(T n) - A_int(n) + c >= k``  -> ``compare_difference(a, b, c - k) >= 0``
+ - sign of the delta                    -> ``compare_difference(a, b)``
+
+Comparisons scan positions from the most significant one down and stop as
+soon as the remaining lower-weight terms can no longer change the sign, so
+the running value stays a small int (no O(d) bigint per call). ``log2()``
+and ``to_json()`` give a log-domain summary for result files, so that JSON
+entries never hold multi-kilobyte integers.
+"""
+import math
+from typing import List, Optional, Sequence, Tuple
+
+# Integers below this bound are stored exactly in JSON (exact in float64 too).
+EXACT_JSON_BITS = 53
+# Number of leading terms used by the log-domain approximation.
+_LOG2_TERMS = 64
+
+
+class WeightedAsymmetry:
+    """A_int stored as (positions, magnitudes), positions strictly increasing."""
+
+    __slots__ = ('positions', 'magnitudes')
+
+    def __init__(self, positions: Sequence[int] = (), magnitudes: Sequence[int] = ()):
+        self.positions = list(positions)
+        self.magnitudes = list(magnitudes)
+
+    @classmethod
+    def from_digits(cls, digits: Sequence[int]) -> 'WeightedAsymmetry':
+        """Profil de A_int pour un buffer de chiffres (LSB- ou MSB-first)."""
+        d = len(digits)
+        positions = []
+        magnitudes = []
+        for i in range(1, d // 2):
+            diff = digits[i] - digits[d - 1 - i]
+            if diff:
+                positions.append(i)
+                magnitudes.append(diff if diff > 0 else -diff)
+        return cls(positions, magnitudes)
+
+    def __bool__(self) -> bool:
+        return bool(self.positions)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, WeightedAsymmetry):
+            return NotImplemented
+        return compare_difference(self, other) == 0
+
+    def __repr__(self) -> str:
+        return f'WeightedAsymmetry(nonzero={len(self.positions)}, log2={self.log2():.3f})'
+
+    @property
+    def top_position(self) -> Optional[int]:
+        return self.positions[-1] if self.positions else None
+
+    def at_least(self, k) -> bool:
+        """A_int >= k (k entier ou demi-entier)."""
+        return compare_difference(self, _ZERO, -k) >= 0
+
+    def to_int(self) -> int:
+        """Valeur exacte (bigint) — à réserver aux petits profils / aux tests."""
+        val = 0
+        for p, m in zip(self.positions, self.magnitudes):
+            val += m << (p - 1)
+        return val
+
+    def log2(self) -> float:
+        """log2(A_int), -inf si A_int = 0 ; utilise les termes dominants seulement."""
+        if not self.positions:
+            return -math.inf
+        top = self.positions[-1]
+        mant = 0.0
+        start = max(0, len(self.positions) - _LOG2_TERMS)
+        for idx in range(len(self.positions) - 1, start - 1, -1):
+            mant += self.magnitudes[idx] * 2.0 ** (self.positions[idx] - top)
+        return math.log2(mant) + (top - 1)
+
+    def to_float(self) -> float:
+        """Valeur approchée en float (inf si hors de portée du float64)."""
+        lg = self.log2()
+        if lg == -math.inf:
+            return 0.0
+        if lg >= 1024:
+            return math.inf
+        return 2.0 ** lg
+
+    def to_json(self):
+        """Entier exact si < 2^53, sinon résumé log-domaine borné."""
+        if not self.positions or self.positions[-1] + 3 <= EXACT_JSON_BITS:
+            return self.to_int()
+        return {'log2': round(self.log2(), 6), 'nonzero': len(self.positions)}
+
+
+_ZERO = WeightedAsymmetry()
+
+
+def _sign(x) -> int:
+    return (x > 0) - (x < 0)
+
+
+def _merged_coefficients(a: WeightedAsymmetry, b: WeightedAsymmetry) -> List[Tuple[int, int]]:
+    """Coefficients non nuls de a - b, positions décroissantes."""
+    out = []
+    i = len(a.positions) - 1
+    j = len(b.positions) - 1
+    while i >= 0 or j >= 0:
+        pa = a.positions[i] if i >= 0 else -1
+        pb = b.positions[j] if j >= 0 else -1
+        if pa > pb:
+            out.append((pa, a.magnitudes[i]))
+            i -= 1
+        elif pb > pa:
+            out.append((pb, -b.magnitudes[j]))
+            j -= 1
+        else:
+            c = a.magnitudes[i] - b.magnitudes[j]
+            if c:
+                out.append((pa, c))
+            i -= 1
+            j -= 1
+    return out
+
+
+def compare_difference(a: WeightedAsymmetry, b: WeightedAsymmetry, offset=0) -> int:
+    """Signe de A_int(a) - A_int(b) + offset (offset multiple de 1/2).
+
+    Works in doubled units, where position i has weight 2^i and the offset
+    sits at weight 1. At weight 2^p the unseen lower terms sum to less than
+    9·2^p + |offset|, so the sign is settled once the running value R
+    satisfies |R| >= 10 + (|offset| >> p); until then R stays small.
+    """
+    off2 = 2 * offset
+    if off2 != int(off2):
+        raise ValueError('offset must be a multiple of 1/2')
+    off2 = int(off2)
+    aoff = -off2 if off2 < 0 else off2
+    R = 0
+    p = None
+    for pos, c in _merged_coefficients(a, b):
+        if p is not None and R:
+            while p > pos:
+                R <<= 1
+                p -= 1
+                if p > pos and abs(R) >= 10 + (aoff >> p):
+                    return _sign(R)
+        R += c
+        p = pos
+        if abs(R) >= 10 + (aoff >> p):
+            return _sign(R)
+    if R:
+        while p > 0:
+            R <<= 1
+            p -= 1
+            if abs(R) >= 10 + (aoff >> p):
+                return _sign(R)
+    return _sign(R + off2)
+
+
+def approx_difference(a: WeightedAsymmetry, b: WeightedAsymmetry) -> float:
+    """A_int(a) - A_int(b) en float (±inf hors de portée), pour les ratios.
+
+    Accumulates the leading coefficients exactly until the running value has
+    more than 64 significant bits (or the next term is >64 positions lower),
+    which bounds the relative error by ~2^-60 without building the full value.
+    """
+    coeffs = _merged_coefficients(a, b)
+    if not coeffs:
+        return 0.0
+    V = 0
+    base = coeffs[0][0]
+    for pos, c in coeffs:
+        gap = base - pos
+        if V and (V.bit_length() > 64 or gap > 64):
+            break
+        V = (V << gap) + c
+        base = pos
+    try:
+        return math.ldexp(float(V), base - 1)
+    except OverflowError:
+        return math.inf if V > 0 else -math.inf
+
+
+def compact_number(x):
+    """Nombre JSON borné : exact si |x| < 2^53, sinon {'sign', 'log2'}."""
+    if isinstance(x, float):
+        if math.isinf(x):
+            return {'sign': 1 if x > 0 else -1, 'log2': None}
+        return x
+    if abs(x) < (1 << EXACT_JSON_BITS):
+        return x
+    return {'sign': _sign(x), 'log2': round(math.log2(abs(x)), 6)}
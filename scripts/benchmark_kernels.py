@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""Benchmark of the reverse-and-add and mod-2 obstruction kernels.
+
+Times every T implementation and every mod-2 obstruction checker of the tree
+on fixed iterates of the 196 orbit (the first iterate with at least d digits,
+d = 10, 10^2, 10^3, 10^4, 10^5 by default). For each (kernel, d) it reports
+the median and p95 time per call, the peak traced memory of one call and the
+throughput in digits/second, writes everything as JSON, and can compare the
+run against a stored baseline: a kernel whose median exceeds the baseline by
+more than ``--tolerance`` is reported as a regression (exit code 1).
+Before timing, each T kernel's output is compared with
+``trajectory_engine.reverse_add_step``; a kernel that disagrees is reported
+as ``mismatch`` and not timed.
+
+No baseline is committed, since timings depend on the machine: record one
+on the machine that will run the comparison with ``--save-baseline`` (same
+``--scales``), then pass it to ``--baseline`` on later runs.
+
+The iterates are computed once and cached as decimal text under
+``--cache-dir`` (the 10^5-digit one takes a few minutes to build the first
+time with numpy, much longer without).
+
+Usage:
+    python scripts/benchmark_kernels.py --out results/benchmark_kernels.json
+    python scripts/benchmark_kernels.py --scales 10,100,1000 --baseline results/benchmark_baseline.json
+    python scripts/benchmark_kernels.py --save-baseline results/benchmark_baseline.json
+"""
+import argparse
+import importlib
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPTS_DIR)
+for _p in (SCRIPTS_DIR, os.path.join(ROOT, 'tools')):
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+import trajectory_engine as te
+
+DEFAULT_SCALES = [10, 100, 1000, 10_000, 100_000]
+
+# (name, kind, module, attribute, input, max_digits)
+#  - kind  : 'T' (reverse-and-add) or 'mod2' (obstruction checker)
+#  - input : 'int' (Python int), 'msb' (list MSB-first), 'bytes' (bytearray
+#            LSB-first) or 'uint8' (numpy array LSB-first)
+#  - max_digits : skip larger iterates (quadratic / exponential kernels)
+KERNELS = [
+    ('validate_phi_growth.reverse_add', 'T', 'validate_phi_growth', 'reverse_add', 'int', None),
+    ('modular_obstruction_proof.reverse_add', 'T', 'modular_obstruction_proof', 'reverse_add', 'int', None),
+    ('test_extensions.apply_T_int', 'T', 'test_extensions', 'apply_T_int', 'int', None),
+    ('test_gap123.apply_T_with_details_int', 'T', 'test_gap123', 'apply_T_with_details_int', 'int', None),
+    ('test_3gaps_enhanced.apply_T_with_details_enhanced', 'T', 'test_3gaps_enhanced',
+     'apply_T_with_details_enhanced', 'int', None),
+    ('check_trajectory_obstruction.apply_T_simple', 'T', 'check_trajectory_obstruction', 'apply_T_simple', 'int', None),
+    ('check_orbit_moduli.apply_T_simple', 'T', 'check_orbit_moduli', 'apply_T_simple', 'int', None),
+    ('verify_mod_p_obstruction.apply_T', 'T', 'verify_mod_p_obstruction', 'apply_T', 'int', None),
+    ('verify_mod5_obstruction.apply_T', 'T', 'verify_mod5_obstruction', 'apply_T', 'int', None),
+    ('markov_chain_analysis.reverse_add_with_carries', 'T', 'markov_chain_analysis',
+     'reverse_add_with_carries', 'int', None),
+    ('validate_aext4.ReverseAddValidator.add_with_carries', 'T', 'validate_aext4',
+     'ReverseAddValidator.add_with_carries', 'msb', 10_000),
+    ('validate_aext5.ReverseAddValidator.add_with_carries', 'T', 'validate_aext5',
+     'ReverseAddValidator.add_with_carries', 'msb', 10_000),
+    ('trajectory_engine.reverse_add_step', 'T', 'trajectory_engine', 'reverse_add_step', 'bytes', None),
+    ('trajectory_engine.reverse_add_step_numpy', 'T', 'trajectory_engine', 'reverse_add_step_numpy', 'uint8', None),
+    ('test_gap123.check_palindrome_obstruction_mod2_fast', 'mod2', 'test_gap123',
+     'check_palindrome_obstruction_mod2_fast', 'int', None),
+    ('test_3gaps_enhanced.check_palindrome_obstruction_mod2_fast', 'mod2', 'test_3gaps_enhanced',
+     'check_palindrome_obstruction_mod2_fast', 'int', None),
+    ('check_trajectory_obstruction.check_palindrome_obstruction_mod2_fast', 'mod2', 'check_trajectory_obstruction',
+     'check_palindrome_obstruction_mod2_fast', 'int', None),
+    ('check_orbit_moduli.check_palindrome_obstruction_mod2_fast', 'mod2', 'check_orbit_moduli',
+     'check_palindrome_obstruction_mod2_fast', 'int', None),
+    ('modular_obstruction_proof.has_mod2_obstruction', 'mod2', 'modular_obstruction_proof',
+     'has_mod2_obstruction', 'int', None),
+    ('verify_mod_p_obstruction.check_mod_p_obstruction_for_n[p=2]', 'mod2', 'verify_mod_p_obstruction',
+     'check_mod_p_obstruction_for_n', 'int', 100),
+    ('verify_196_mod2.check_carries_mod2', 'mod2', 'verify_196_mod2', 'check_carries_mod2', 'msb', 12),
+]
+
+
+def _resolve(module_name, attr):
+    mod = importlib.import_module(module_name)
+    obj = mod
+    parts = attr.split('.')
+    if len(parts) == 2:
+        # méthode d'instance (ReverseAddValidator.add_with_carries)
+        obj = getattr(mod, parts[0])()
+        return getattr(obj, parts[1])
+    return getattr(obj, attr)
+
+
+def _make_call(name, fn, kind_input, digits):
+    """Prépare l'entrée (hors chronométrage) et renvoie un appel sans argument."""
+    if kind_input == 'int':
+        n = te.digits_to_number(digits) if len(digits) < 2000 else int(te.digits_to_decimal_text(digits))
+        if name.endswith('[p=2]'):
+            return lambda: fn(n, 2)
+        return lambda: fn(n)
+    if kind_input == 'msb':
+        lst = list(reversed(digits))
+        return lambda: fn(lst)
+    if kind_input == 'bytes':
+        buf = bytearray(digits)
+        return lambda: fn(buf)
+    if kind_input == 'uint8':
+        arr = te.np.frombuffer(bytes(digits), dtype=te.np.uint8)
+        return lambda: fn(arr)
+    raise ValueError(kind_input)
+
+
+def _t_digits(result):
+    """Sortie d'un noyau T (int, tuple, liste MSB, tampon LSB) -> chiffres LSB-first."""
+    value = result[0] if isinstance(result, tuple) else result
+    if isinstance(value, int):
+        return te.number_to_digits(value)
+    if isinstance(value, list):
+        return bytearray(reversed(value))
+    if isinstance(value, bytearray):
+        return value
+    return bytearray(value.tobytes())
+
+
+def check_t_kernel(call, digits):
+    """Vrai si le noyau donne le même T(n) que trajectory_engine.reverse_add_step."""
+    expected, _ = te.reverse_add_step(bytearray(digits))
+    return _t_digits(call()) == expected
+
+
+def load_iterate(d, cache_dir=None):
+    """Premier itéré de 196 ayant au moins d chiffres -> (iteration, digits)."""
+    path = os.path.join(cache_dir, f'196_min{d}.txt') if cache_dir else None
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='ascii') as f:
+            header, text = f.read().split('\n', 1)
+        return int(header.split('=')[1]), te.digits_from_decimal_text(text)
+    digits = te.number_to_digits(196)
+    j = 0
+    if te.NUMPY_AVAILABLE:
+        arr = te.np.frombuffer(bytes(digits), dtype=te.np.uint8)
+        while arr.shape[0] < d:
+            arr, _ = te.reverse_add_step_numpy(arr)
+            j += 1
+        digits = bytearray(arr.tobytes())
+    else:
+        while len(digits) < d:
+            digits, _ = te.reverse_add_step(digits)
+            j += 1
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, 'w', encoding='ascii') as f:
+            f.write(f'iteration={j}\n')
+            f.write(te.digits_to_decimal_text(digits))
+    return j, digits
+
+
+def time_call(call, min_repeats=5, max_repeats=200, min_time=0.2, max_time=10.0):
+    call()  # warm-up
+    times = []
+    total = 0.0
+    while len(times) < max_repeats:
+        t0 = time.perf_counter()
+        call()
+        dt = time.perf_counter() - t0
+        times.append(dt)
+        total += dt
+        if len(times) >= min_repeats and total >= min_time:
+            break
+        if total >= max_time:
+            break
+    times.sort()
+    n = len(times)
+    median = times[n // 2] if n % 2 else 0.5 * (times[n // 2 - 1] + times[n // 2])
+    p95 = times[max(0, math.ceil(0.95 * n) - 1)]
+    return {'repeats': n, 'median_s': median, 'p95_s': p95, 'min_s': times[0]}
+
+
+def peak_memory(call):
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(scales, kernels=None, cache_dir=None, min_time=0.2, max_time=10.0):
+    # les noyaux à base de str(n) dépassent la limite de 4300 chiffres de Python 3.11+
+    if hasattr(sys, 'set_int_max_str_digits'):
+        sys.set_int_max_str_digits(0)
+    selected = [k for k in KERNELS if kernels is None or any(s in k[0] for s in kernels)]
+    iterates = {}
+    for d in scales:
+        t0 = time.perf_counter()
+        j, digits = load_iterate(d, cache_dir)
+        iterates[d] = (j, digits)
+        print(f'iterate d>={d}: T^{j}(196), {len(digits)} digits ({time.perf_counter() - t0:.2f} s)')
+
+    results = []
+    for name, kind, module_name, attr, kind_input, max_digits in selected:
+        try:
+            fn = _resolve(module_name, attr)
+        except Exception as e:
+            results.append({'kernel': name, 'kind': kind, 'status': f'import_error: {e}'})
+            print(f'  {name}: import error ({e})')
+            continue
+        for d in scales:
+            j, digits = iterates[d]
+            entry = {'kernel': name, 'kind': kind, 'd': d, 'digits': len(digits), 'iteration': j}
+            if max_digits is not None and len(digits) > max_digits:
+                entry['status'] = f'skipped (> {max_digits} digits)'
+                results.append(entry)
+                continue
+            if kind_input == 'uint8' and not te.NUMPY_AVAILABLE:
+                entry['status'] = 'skipped (numpy unavailable)'
+                results.append(entry)
+                continue
+            try:
+                call = _make_call(name, fn, kind_input, digits)
+                if kind == 'T' and not check_t_kernel(call, digits):
+                    entry['status'] = 'mismatch (T(n) differs from trajectory_engine.reverse_add_step)'
+                    print(f'  {name} d={d}: {entry["status"]}')
+                    results.append(entry)
+                    continue
+                entry.update(time_call(call, min_time=min_time, max_time=max_time))
+                entry['peak_bytes'] = peak_memory(call)
+                entry['digits_per_s'] = len(digits) / entry['median_s'] if entry['median_s'] > 0 else None
+                entry['status'] = 'ok'
+                print(f"  {name:<70} d={len(digits):>6}  median {entry['median_s'] * 1e3:10.3f} ms  "
+                      f"p95 {entry['p95_s'] * 1e3:10.3f} ms  peak {entry['peak_bytes'] / 1024:9.1f} KiB")
+            except Exception as e:
+                entry['status'] = f'error: {type(e).__name__}: {e}'
+                print(f'  {name} d={d}: {entry["status"]}')
+            results.append(entry)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance=0.25):
+    """Compare les médianes à la référence ; renvoie (rapport, régressions)."""
+    ref = {(r['kernel'], r.get('d')): r for r in baseline.get('results', []) if r.get('status') == 'ok'}
+    report = []
+    regressions = []
+    for r in results:
+        if r.get('status') != 'ok':
+            continue
+        b = ref.get((r['kernel'], r['d']))
+        if b is None:
+            continue
+        ratio = r['median_s'] / b['median_s'] if b['median_s'] > 0 else math.inf
+        row = {'kernel': r['kernel'], 'd': r['d'], 'baseline_median_s': b['median_s'],
+               'median_s': r['median_s'], 'ratio': ratio, 'regression': ratio > 1.0 + tolerance}
+        report.append(row)
+        if row['regression']:
+            regressions.append(row)
+    return report, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark des noyaux T et obstruction mod 2')
+    parser.add_argument('--scales', type=str, default=','.join(str(d) for d in DEFAULT_SCALES),
+                        help='nombres de chiffres, séparés par des virgules')
+    parser.add_argument('--kernels', type=str, default=None,
+                        help='filtre (sous-chaînes séparées par des virgules) sur les noms de noyaux')
+    parser.add_argument('--cache-dir', type=str, default=os.path.join('results', 'benchmark_iterates'))
+    parser.add_argument('--out', type=str, default=os.path.join('results', 'benchmark_kernels.json'))
+    parser.add_argument('--baseline', type=str, default=None, help='fichier JSON de référence à comparer')
+    parser.add_argument('--save-baseline', type=str, default=None, help='enregistrer ce run comme référence')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='ralentissement relatif toléré avant de signaler une régression')
+    parser.add_argument('--min-time', type=float, default=0.2)
+    parser.add_argument('--max-time', type=float, default=10.0)
+    args = parser.parse_args()
+
+    scales = [int(x) for x in args.scales.split(',') if x.strip()]
+    kernels = [x.strip() for x in args.kernels.split(',')] if args.kernels else None
+    results = run_benchmarks(scales, kernels, args.cache_dir, args.min_time, args.max_time)
+
+    data = {
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'numpy': te.np.__version__ if te.NUMPY_AVAILABLE else None,
+        'scales': scales,
+        'results': results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report, regressions = compare_with_baseline(results, baseline, args.tolerance)
+        data['comparison'] = {'baseline': args.baseline, 'tolerance': args.tolerance,
+                              'rows': report, 'regressions': len(regressions)}
+        print(f'\nComparison with {args.baseline} (tolerance {args.tolerance:.0%}):')
+        for row in report:
+            flag = 'REGRESSION' if row['regression'] else 'ok'
+            print(f"  {row['kernel']:<70} d={row['d']:>6}  x{row['ratio']:.2f}  {flag}")
+        if regressions:
+            print(f'❌ {len(regressions)} regression(s)')
+            exit_code = 1
+        else:
+            print('✅ no regression')
+
+    for path in filter(None, (args.out, args.save_baseline)):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        print('Wrote', path)
+    return exit_code
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
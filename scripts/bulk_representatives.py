@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""Bulk analysis of orbit residue representatives modulo M.
+
+Phase B of ``check_orbit_moduli.analyse_moduli`` checks, for each residue
+modulo M met along the orbit of 196 before the first repetition, its first
+representative T^j(196) one at a time (``list(map(int, str(rep)))``, a
+Jacobian built and eliminated per representative). Here the representatives
+are collected once as digit buffers, packed into uint8 matrices grouped by
+length (rows LSB-first, zero-padded to the longest row of the group plus one
+column for the final carry; a new group starts when the cell budget or the
+length ratio is exceeded) and analysed group by group:
+
+ - T(rep) for the whole group at once: pair sums with the mirrored digits
+   (per-row gather on the row length), carries by the generate/kill prefix
+   trick of ``trajectory_engine.reverse_add_step_numpy`` along the rows;
+ - mod-2 obstruction = T(rep) is not a palindrome, i.e. exactly what the
+   exact-mode automaton behind ``check_palindrome_obstruction_mod2_fast``
+   decides (no carry assignment makes the result palindromic);
+ - edge digits: outer pair (a_0, a_{d-1}) of rep, first and last digit of
+   T(rep) and whether they differ (the quick necessary check of
+   ``check_trajectory_obstruction.check_hensel_mod_pk``);
+ - Jacobian: ``build_jacobian`` only depends on the length d (its
+   coefficients are 1, -1, 10, -10 at positions fixed by d), so its rank
+   mod 2 is computed once per distinct length, from the sparse odd support:
+   when every row owns a column no other row touches the rank is the row
+   count, otherwise the rows go through ``check_orbit_moduli.rank_mod2``.
+
+Groups are independent and can be dispatched to a process pool
+(``--workers``). Without numpy each representative goes through the digit
+step and the automaton instead.
+
+The result is a per-representative table (CSV or JSON Lines) and, per
+modulus, the summary fields of ``orbit_moduli_summary.json``. ``--check N``
+recomputes N random representatives (up to 600 digits) with the scalar
+functions of check_orbit_moduli and stops on any disagreement.
+
+Usage:
+    python bulk_representatives.py --modulus 1000000 --table results/orbit_reps_1e6.csv
+    python bulk_representatives.py --modulus 100000000 --max-iter 200000 --workers 4 \\
+        --summary results/orbit_moduli_bulk.json --check 200
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from palindrome_automaton import is_feasible
+from trajectory_engine import digits_to_decimal_text, number_to_digits, reverse_add_step
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None
+    NUMPY_AVAILABLE = False
+
+MAX_CELLS = 1 << 24
+MAX_LENGTH_RATIO = 1.25
+TABLE_FIELDS = ['iteration', 'residue', 'length', 'a_first', 'a_last', 'T_length', 'T_first', 'T_last',
+                'edge_mismatch', 'T_palindrome', 'obstruction_mod2', 'jacobian_constraints',
+                'jacobian_rank_mod2', 'jacobian_full_row_rank', 'theoretical_by_hensel', 'prefix']
+
+
+class _Residue:
+    """n mod M sur les chiffres LSB-first (chiffres bas si M = 10^k)."""
+
+    def __init__(self, M: int):
+        self.M = M
+        k = len(str(M)) - 1
+        self.low_digits = k if M == 10 ** k else None
+        self.pw = None
+
+    def __call__(self, digits) -> int:
+        if self.low_digits is not None:
+            return int(digits_to_decimal_text(digits[:self.low_digits]))
+        d = len(digits)
+        if NUMPY_AVAILABLE and self.M < (1 << 31):
+            if self.pw is None or len(self.pw) < d:
+                size = max(d, 2 * (0 if self.pw is None else len(self.pw)), 1024)
+                pw = np.empty(size, dtype=np.int64)
+                v = 1
+                for i in range(size):
+                    pw[i] = v
+                    v = v * 10 % self.M
+                self.pw = pw
+            # 9 * (M-1) * d < 2^63 pour M < 2^31 et d < 5.10^8
+            a = np.frombuffer(bytes(digits), dtype=np.uint8).astype(np.int64)
+            return int(np.dot(a, self.pw[:d]) % self.M)
+        return int(digits_to_decimal_text(digits)) % self.M
+
+
+def orbit_representatives(M: int, max_iter: int = 20000, start: int = 196):
+    """Premiers représentants des résidus mod M le long de l'orbite.
+
+    Same semantics as ``orbit_modulo_phase_a_python`` + the Phase B loop:
+    stops at the first repeated residue. Returns
+    ``(reps, orbit_size, cycle_start)`` with reps = [(j, residue, digits)].
+    """
+    residue = _Residue(M)
+    digits = number_to_digits(start)
+    seen: Dict[int, int] = {}
+    reps = []
+    for j in range(max_iter):
+        r = residue(digits)
+        if r in seen:
+            return reps, len(seen), seen[r]
+        seen[r] = j
+        reps.append((j, r, digits))
+        digits, _ = reverse_add_step(digits)
+    return reps, len(seen), -1
+
+
+def group_by_length(reps: Sequence[Tuple[int, int, bytearray]], max_cells: int = MAX_CELLS,
+                    max_ratio: float = MAX_LENGTH_RATIO) -> List[Dict]:
+    """Matrices de chiffres par groupes de longueurs voisines."""
+    order = sorted(range(len(reps)), key=lambda i: len(reps[i][2]))
+    groups, cur = [], []
+
+    def flush():
+        if not cur:
+            return
+        width = len(reps[cur[-1]][2]) + 1
+        g = {'iteration': [reps[i][0] for i in cur], 'residue': [reps[i][1] for i in cur],
+             'length': [len(reps[i][2]) for i in cur], 'width': width}
+        if NUMPY_AVAILABLE:
+            mat = np.zeros((len(cur), width), dtype=np.uint8)
+            for row, i in enumerate(cur):
+                d = len(reps[i][2])
+                mat[row, :d] = np.frombuffer(bytes(reps[i][2]), dtype=np.uint8)
+            g['digits'] = mat
+        else:
+            g['digits'] = [bytes(reps[i][2]) for i in cur]
+        groups.append(g)
+
+    for i in order:
+        d = len(reps[i][2])
+        if cur:
+            d0 = len(reps[cur[0]][2])
+            if (len(cur) + 1) * (d + 1) > max_cells or d > max_ratio * d0:
+                flush()
+                cur = []
+        cur.append(i)
+    flush()
+    return groups
+
+
+def save_groups(path: str, groups: List[Dict]):
+    """Matrices compressées (.npz) : g<i>_digits, g<i>_iteration, g<i>_residue, g<i>_length."""
+    arrays = {}
+    for gi, g in enumerate(groups):
+        arrays[f'g{gi}_digits'] = g['digits']
+        for key in ('iteration', 'residue', 'length'):
+            arrays[f'g{gi}_{key}'] = np.asarray(g[key], dtype=np.int64)
+    tmp = path + '.tmp.npz'
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_groups(path: str) -> List[Dict]:
+    data = np.load(path)
+    n = len({k.split('_', 1)[0] for k in data.files})
+    groups = []
+    for gi in range(n):
+        mat = data[f'g{gi}_digits']
+        groups.append({'digits': mat, 'width': mat.shape[1],
+                       **{key: data[f'g{gi}_{key}'].tolist() for key in ('iteration', 'residue', 'length')}})
+    return groups
+
+
+def jacobian_support_mod2(d: int) -> List[Tuple[int, ...]]:
+    """Colonnes à coefficient impair de chaque ligne de ``build_jacobian`` (longueur d)."""
+    rows = []
+    for j in range(d // 2):
+        k = d - 1 - j
+        coeff: Dict[int, int] = {}
+        if j - 1 >= 0:
+            coeff[j - 1] = coeff.get(j - 1, 0) + 1
+        coeff[j] = coeff.get(j, 0) - 10
+        if k - 1 >= 0:
+            coeff[k - 1] = coeff.get(k - 1, 0) - 1
+        coeff[k] = coeff.get(k, 0) + 10
+        rows.append(tuple(sorted(c for c, v in coeff.items() if v % 2)))
+    return rows
+
+
+@lru_cache(maxsize=None)
+def jacobian_rank_mod2(d: int) -> Tuple[int, int]:
+    """(contraintes, rang mod 2) du jacobien pour la longueur d."""
+    rows = jacobian_support_mod2(d)
+    owners: Dict[int, int] = {}
+    for r in rows:
+        for c in r:
+            owners[c] = owners.get(c, 0) + 1
+    if all(any(owners[c] == 1 for c in r) for r in rows):
+        return len(rows), len(rows)
+    # pas de pivot propre à chaque ligne : élimination complète
+    from check_orbit_moduli import rank_mod2
+    dense = [[1 if c in r else 0 for c in range(d + 1)] for r in rows]
+    return len(rows), rank_mod2(dense)
+
+
+def _analyze_group_numpy(g: Dict) -> Dict[str, list]:
+    A = g['digits']
+    n, W = A.shape
+    dl = np.asarray(g['length'], dtype=np.int64)
+    cols = np.arange(W, dtype=np.int64)
+    # chiffre miroir a_{d-1-i} (0 au-delà de d)
+    idx = dl[:, None] - 1 - cols[None, :]
+    valid = idx >= 0
+    R = np.take_along_axis(A, np.clip(idx, 0, None), axis=1)
+    R[~valid] = 0
+    S = A + R
+    gen = np.where(S >= 10, cols, -1)
+    kill = np.where(S <= 8, cols, -1)
+    last_gen = np.maximum.accumulate(gen, axis=1)
+    last_kill = np.maximum.accumulate(kill, axis=1)
+    carries = np.zeros((n, W), dtype=np.uint8)
+    carries[:, 1:] = last_gen[:, :-1] > last_kill[:, :-1]
+    T = S + carries
+    T[T >= 10] -= 10
+    rows = np.arange(n)
+    TL = dl + carries[rows, dl].astype(np.int64)
+    # palindrome de T sur ses TL premiers chiffres
+    tidx = TL[:, None] - 1 - cols[None, :]
+    tvalid = tidx >= 0
+    Trev = np.take_along_axis(T, np.clip(tidx, 0, None), axis=1)
+    pal = np.all((T == Trev) | ~tvalid, axis=1)
+    return {
+        'a_first': A[rows, dl - 1].tolist(), 'a_last': A[:, 0].tolist(),
+        'T_length': TL.tolist(), 'T_first': T[rows, TL - 1].tolist(), 'T_last': T[:, 0].tolist(),
+        'T_palindrome': pal.tolist(),
+    }
+
+
+def _analyze_group_python(g: Dict) -> Dict[str, list]:
+    out = {k: [] for k in ('a_first', 'a_last', 'T_length', 'T_first', 'T_last', 'T_palindrome')}
+    for raw in g['digits']:
+        a = bytearray(raw)
+        t, _ = reverse_add_step(a)
+        out['a_first'].append(a[-1])
+        out['a_last'].append(a[0])
+        out['T_length'].append(len(t))
+        out['T_first'].append(t[-1])
+        out['T_last'].append(t[0])
+        out['T_palindrome'].append(is_feasible(a))
+    return out
+
+
+def _prefix(g: Dict, row: int, d: int, width: int = 20) -> str:
+    return digits_to_decimal_text(bytes(g['digits'][row][max(0, d - width):d]))
+
+
+def analyze_group(g: Dict) -> List[Dict]:
+    """Lignes de la table pour un groupe (exécutable dans un processus du pool)."""
+    cols = _analyze_group_numpy(g) if NUMPY_AVAILABLE and not isinstance(g['digits'], list) \
+        else _analyze_group_python(g)
+    table = []
+    for row, (j, r, d) in enumerate(zip(g['iteration'], g['residue'], g['length'])):
+        constraints, rank = jacobian_rank_mod2(d)
+        obstruction = not cols['T_palindrome'][row]
+        full = rank == constraints
+        table.append({
+            'iteration': j, 'residue': r, 'length': d,
+            'a_first': int(cols['a_first'][row]), 'a_last': int(cols['a_last'][row]),
+            'T_length': int(cols['T_length'][row]),
+            'T_first': int(cols['T_first'][row]), 'T_last': int(cols['T_last'][row]),
+            'edge_mismatch': int(cols['T_first'][row]) != int(cols['T_last'][row]),
+            'T_palindrome': bool(cols['T_palindrome'][row]),
+            'obstruction_mod2': obstruction,
+            'jacobian_constraints': constraints, 'jacobian_rank_mod2': rank,
+            'jacobian_full_row_rank': full,
+            'theoretical_by_hensel': obstruction and full and constraints > 0,
+            'prefix': _prefix(g, row, d),
+        })
+    return table
+
+
+def analyze(groups: List[Dict], workers: int = 1) -> List[Dict]:
+    """Table complète, triée par itération."""
+    if workers > 1 and len(groups) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(analyze_group, groups))
+    else:
+        parts = [analyze_group(g) for g in groups]
+    table = [row for part in parts for row in part]
+    table.sort(key=lambda r: r['iteration'])
+    return table
+
+
+def summarize(table: List[Dict], orbit_size: int, cycle_start: int) -> Dict:
+    """Champs de ``orbit_moduli_summary.json`` (+ décompte des bords)."""
+    needs = [r['iteration'] for r in table if not r['theoretical_by_hensel']]
+    return {
+        'orbit_size_mod_M': orbit_size,
+        'cycle_start_index': cycle_start,
+        'checked_representatives': len(table),
+        'theoretical_by_hensel_count': len(table) - len(needs),
+        'needs_further_check_count': len(needs),
+        # itérations j (représentant T^j(196)), le représentant n'étant pas stocké
+        'example_needs_further_check_iterations': needs[:5],
+        'obstruction_mod2_count': sum(r['obstruction_mod2'] for r in table),
+        'edge_mismatch_count': sum(r['edge_mismatch'] for r in table),
+        'max_length': max((r['length'] for r in table), default=0),
+    }
+
+
+def scalar_check(reps: Sequence[Tuple[int, int, bytearray]], table: List[Dict], sample: int,
+                 rng: random.Random, max_digits: int = 600) -> int:
+    """Recalcule un échantillon avec les fonctions de check_orbit_moduli ; renvoie le nombre vérifié."""
+    from check_orbit_moduli import build_jacobian, check_palindrome_obstruction_mod2_fast, rank_mod2
+    by_iter = {r['iteration']: r for r in table}
+    pool = [rep for rep in reps if len(rep[2]) <= max_digits]
+    chosen = rng.sample(pool, min(sample, len(pool)))
+    for j, _, digits in chosen:
+        n = int(digits_to_decimal_text(digits))
+        obstruction, _, _ = check_palindrome_obstruction_mod2_fast(n)
+        rows = build_jacobian(list(map(int, str(n))))
+        expected = (bool(obstruction), len(rows), rank_mod2(rows))
+        got = by_iter[j]
+        if expected != (got['obstruction_mod2'], got['jacobian_constraints'], got['jacobian_rank_mod2']):
+            raise AssertionError(f'representative T^{j}(196): scalar {expected} != bulk {got}')
+        t, _ = reverse_add_step(digits)
+        if (t[-1], t[0]) != (got['T_first'], got['T_last']):
+            raise AssertionError(f'representative T^{j}(196): edge digits differ')
+    return len(chosen)
+
+
+def write_table(path: str, table: List[Dict]):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            w = csv.DictWriter(f, fieldnames=TABLE_FIELDS)
+            w.writeheader()
+            for row in table:
+                w.writerow({k: (int(v) if isinstance(v, bool) else v) for k, v in row.items()})
+        else:
+            for row in table:
+                f.write(json.dumps(row) + '\n')
+    os.replace(tmp, path)
+
+
+def analyse_modulus(M: int, max_iter: int = 20000, workers: int = 1, check: int = 0,
+                    seed: int = 0, table_path: Optional[str] = None,
+                    matrix_path: Optional[str] = None) -> Dict:
+    t0 = time.time()
+    reps, orbit_size, cycle_start = orbit_representatives(M, max_iter)
+    t1 = time.time()
+    groups = group_by_length(reps)
+    if matrix_path and NUMPY_AVAILABLE:
+        save_groups(matrix_path, groups)
+    table = analyze(groups, workers)
+    t2 = time.time()
+    info = summarize(table, orbit_size, cycle_start)
+    info['groups'] = len(groups)
+    info['seconds'] = {'representatives': round(t1 - t0, 3), 'analysis': round(t2 - t1, 3)}
+    if check:
+        info['scalar_checked'] = scalar_check(reps, table, check, random.Random(seed))
+    if table_path:
+        write_table(table_path, table)
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batched Phase B analysis of orbit representatives modulo M.')
+    parser.add_argument('--modulus', type=int, nargs='+', default=[10**6])
+    parser.add_argument('--max-iter', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=1, help='processus pour les groupes')
+    parser.add_argument('--table', type=str, default=None,
+                        help='table par représentant (.csv ou .jsonl ; {M} remplacé par le module)')
+    parser.add_argument('--save-matrix', type=str, default=None,
+                        help='matrices de chiffres groupées (.npz ; {M} remplacé par le module)')
+    parser.add_argument('--summary', type=str, default=None, help='résumé JSON (clé = module)')
+    parser.add_argument('--check', type=int, default=0, help='représentants recalculés en scalaire')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    summary = {}
+    for M in args.modulus:
+        table_path = args.table.replace('{M}', str(M)) if args.table else None
+        if table_path and len(args.modulus) > 1 and '{M}' not in args.table:
+            table_path = f'{os.path.splitext(table_path)[0]}_{M}{os.path.splitext(table_path)[1]}'
+        matrix_path = args.save_matrix.replace('{M}', str(M)) if args.save_matrix else None
+        info = analyse_modulus(M, args.max_iter, args.workers, args.check, args.seed,
+                               table_path, matrix_path)
+        summary[M] = info
+        print(f"M={M}: {info['checked_representatives']} representatives (orbit size {info['orbit_size_mod_M']}, "
+              f"cycle start {info['cycle_start_index']}), {info['theoretical_by_hensel_count']} theoretical_by_hensel, "
+              f"{info['needs_further_check_count']} need further checks, {info['groups']} groups, "
+              f"{info['seconds']['representatives']:.2f}s + {info['seconds']['analysis']:.2f}s"
+              + (f", {info['scalar_checked']} cross-checked" if 'scalar_checked' in info else ''))
+        if table_path:
+            print(f'  table written to {table_path}')
+    if args.summary:
+        os.makedirs(os.path.dirname(args.summary) or '.', exist_ok=True)
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print('Wrote summary to', args.summary)
+
+
+if __name__ == '__main__':
+    main()
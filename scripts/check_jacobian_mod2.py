@@ -5,9 +5,12 @@
 import json
 from math import floor
 from itertools import product
+from functools import lru_cache
 
 import sys
 
+from gf2 import rank_mod2
+
 def digits(n):
     return list(map(int, str(n)))
 
@@ -42,49 +45,20 @@ def build_jacobian(a):
         rows.append(coeff)
     return rows
 
-# Compute rank mod 2 using Gaussian elimination over GF(2)
-
-def rank_mod2(matrix):
-    # matrix: list of rows, entries ints
-    if not matrix:
-        return 0
-    rows = [list(map(lambda x: x & 1, row)) for row in matrix]
-    nrows = len(rows)
-    ncols = len(rows[0])
-    rank = 0
-    r = 0
-    for c in range(ncols):
-        # find pivot
-        pivot = None
-        for i in range(r, nrows):
-            if rows[i][c] == 1:
-                pivot = i
-                break
-        if pivot is None:
-            continue
-        # swap
-        rows[r], rows[pivot] = rows[pivot], rows[r]
-        # eliminate below
-        for i in range(nrows):
-            if i != r and rows[i][c] == 1:
-                # rows[i] ^= rows[r]
-                for j in range(c, ncols):
-                    rows[i][j] ^= rows[r][j]
-        r += 1
-        rank += 1
-        if r == nrows:
-            break
-    return rank
 
-
-def analyze_n(n):
-    a = digits(n)
-    d = len(a)
-    rows = build_jacobian(a)
+@lru_cache(maxsize=None)
+def analyze_length(d):
+    # The Jacobian only involves the carries: its entries depend on d alone,
+    # not on the digits, so the rank is computed once per length.
+    rows = build_jacobian([0]*d)
     m = len(rows)
     var_count = d+1
     r = rank_mod2(rows)
-    return dict(n=n, d=d, n_constraints=m, n_vars=var_count, rank_mod2=r, full_row_rank=(r==m))
+    return dict(d=d, n_constraints=m, n_vars=var_count, rank_mod2=r, full_row_rank=(r==m))
+
+
+def analyze_n(n):
+    return dict(n=n, **analyze_length(len(digits(n))))
 
 if __name__ == '__main__':
     results = []
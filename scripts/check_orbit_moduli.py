@@ -7,11 +7,17 @@ des résidus modulo M visités, et pour chaque état testé vérifie:
  - rang du jacobien modulo 2 (full row rank)
 
 Écrit un résumé dans stdout et un JSON détaillé dans `results/orbit_moduli_summary.json`.
+Avec --cache, le résultat de analyse_moduli est mémorisé (voir compute_cache).
 """
+import argparse
 import json
 import os
 from collections import defaultdict
 
+from compute_cache import add_cache_arguments, cache_from_args
+from gf2 import rank_mod2
+from palindrome_automaton import decide, digits_of
+
 # Try to import numba for accelerating Phase A (modular orbit detection).
 try:
     from numba import njit
@@ -65,25 +71,13 @@ def apply_T_simple(n: int):
 
 
 def check_palindrome_obstruction_mod2_fast(n: int):
-    digits = number_to_digits_int(n)
-    d = len(digits)
-    carries = [0] * (d + 1)
-    result_digits = [0] * (d + 1)
-    for i in range(d):
-        j = d - 1 - i
-        s = digits[i] + digits[j] + carries[i]
-        result_digits[i] = s % 10
-        carries[i + 1] = s // 10
-    L = d
-    if carries[d] > 0:
-        result_digits[d] = carries[d]
-        L = d + 1
-    is_pal = True
-    for i in range(L // 2):
-        if result_digits[i] != result_digits[L - 1 - i]:
-            is_pal = False
-            break
-    return (not is_pal), result_digits[:L], carries
+    # automate bords -> centre (palindrome_automaton) ; chiffres/retenues
+    # renvoyés seulement si T(n) est un palindrome, sinon (True, None, None)
+    a = digits_of(n)
+    feasible, cert = decide(a)
+    if not feasible:
+        return True, None, None
+    return False, cert['digits'], cert['carries'][:len(a) + 1]
 
 
 def build_jacobian(a_digits_msb):
@@ -105,40 +99,6 @@ def build_jacobian(a_digits_msb):
     return rows
 
 
-def rank_mod2(matrix):
-    if not matrix:
-        return 0
-    nrows = len(matrix)
-    ncols = len(matrix[0])
-    rows_int = []
-    for row in matrix:
-        v = 0
-        for j, x in enumerate(row):
-            if x & 1:
-                v |= (1 << j)
-        rows_int.append(v)
-    rank = 0
-    r = 0
-    for c in range(ncols):
-        mask = 1 << c
-        pivot = None
-        for i in range(r, nrows):
-            if rows_int[i] & mask:
-                pivot = i
-                break
-        if pivot is None:
-            continue
-        rows_int[r], rows_int[pivot] = rows_int[pivot], rows_int[r]
-        for i in range(nrows):
-            if i != r and (rows_int[i] & mask):
-                rows_int[i] ^= rows_int[r]
-        r += 1
-        rank += 1
-        if r == nrows:
-            break
-    return rank
-
-
 def analyse_moduli(moduli, max_iter=20000):
     summary = {}
     for M in moduli:
@@ -229,8 +189,12 @@ def orbit_modulo_phase_a(M, max_iter=20000):
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Orbit of 196 modulo several moduli.')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    cache = cache_from_args(args)
     moduli = [2**10, 2**12, 10**6]
-    summary = analyse_moduli(moduli, max_iter=20000)
+    summary = cache.call(analyse_moduli, moduli, max_iter=20000)
     out = os.path.join('results', 'orbit_moduli_summary.json')
     os.makedirs(os.path.dirname(out), exist_ok=True)
     with open(out, 'w', encoding='utf-8') as f:
@@ -9,12 +9,28 @@
 Writes results to ``results/trajectory_obstruction_log.json``.
 
 Usage: python scripts/check_trajectory_obstruction.py --iterations 1001 --kmax 10
+
+Per-stage telemetry (mod2, jacobian, hensel_2k, T, IO) can be streamed with
+``--metrics results/trajectory_metrics.jsonl`` (see ``run_metrics.py``).
+
+``--from-iterate FILE --from-iteration J`` resumes from an external iterate
+(decimal or packed snapshot) checked against the snapshot store, see
+``iterate_import.py``.
 """
 import json
 import argparse
 import os
 from itertools import product
 
+from compact_cert import TrajectoryKind, cert_path, compact_records, write_certificate
+from gf2 import rank_mod2
+from iterate_import import add_import_arguments, iterate_from_args
+from log_reader import to_int
+from merkle_cert import merkle_summary
+from run_metrics import add_metrics_arguments, metrics_from_args
+from trajectory_engine import digits_to_decimal_text
+from palindrome_automaton import decide, digits_of
+
 
 def number_to_digits_int(n: int):
     if n == 0:
@@ -58,27 +74,15 @@ def is_palindrome_digits(digits):
 
 
 def check_palindrome_obstruction_mod2_fast(n: int):
-    # returns True if obstruction (i.e., not a palindrome) modulo 2 at digit level
-    digits = number_to_digits_int(n)
-    d = len(digits)
-    carries = [0] * (d + 1)
-    result_digits = [0] * (d + 1)
-    for i in range(d):
-        j = d - 1 - i
-        s = digits[i] + digits[j] + carries[i]
-        result_digits[i] = s % 10
-        carries[i + 1] = s // 10
-    L = d
-    if carries[d] > 0:
-        result_digits[d] = carries[d]
-        L = d + 1
-    # check palindromicity of result digits
-    is_pal = True
-    for i in range(L // 2):
-        if result_digits[i] != result_digits[L - 1 - i]:
-            is_pal = False
-            break
-    return (not is_pal), result_digits[:L], carries
+    # returns True if obstruction (i.e., not a palindrome) modulo 2 at digit level.
+    # Decided by the outside-in automaton (palindrome_automaton); the result
+    # digits (LSB-first) and carries are returned only when T(n) is a
+    # palindrome, (True, None, None) otherwise.
+    a = digits_of(n)
+    feasible, cert = decide(a)
+    if not feasible:
+        return True, None, None
+    return False, cert['digits'], cert['carries'][:len(a) + 1]
 
 
 def build_jacobian(a_digits_msb):
@@ -101,45 +105,6 @@ def build_jacobian(a_digits_msb):
     return rows
 
 
-def rank_mod2(matrix):
-    # Fast rank over GF(2) using bit-packed rows for speed.
-    # Each row becomes an integer where bit j corresponds to column j.
-    if not matrix:
-        return 0
-    nrows = len(matrix)
-    ncols = len(matrix[0])
-    rows_int = []
-    for row in matrix:
-        v = 0
-        for j, x in enumerate(row):
-            if x & 1:
-                v |= (1 << j)
-        rows_int.append(v)
-
-    rank = 0
-    r = 0
-    for c in range(ncols):
-        pivot = None
-        mask = 1 << c
-        for i in range(r, nrows):
-            if rows_int[i] & mask:
-                pivot = i
-                break
-        if pivot is None:
-            continue
-        # swap pivot into row r
-        rows_int[r], rows_int[pivot] = rows_int[pivot], rows_int[r]
-        # eliminate bit c from all other rows
-        for i in range(nrows):
-            if i != r and (rows_int[i] & mask):
-                rows_int[i] ^= rows_int[r]
-        r += 1
-        rank += 1
-        if r == nrows:
-            break
-    return rank
-
-
 def check_hensel_mod_pk(n: int, p: int, k: int):
     # quick necessary check: compute n+rev(n) digitwise and compare edge digits mod p^k
     digits = number_to_digits_int(n)
@@ -169,21 +134,36 @@ def main():
                         help='write incremental checkpoint files every CHECKPOINT iterations (0 = disabled)')
     parser.add_argument('--kmax', type=int, default=10)
     parser.add_argument('--out', type=str, default=os.path.join('results', 'trajectory_obstruction_log.json'))
+    parser.add_argument('--compact', action='store_true',
+                        help='écrire aussi le certificat compact recalculable (<out>.cert.json)')
+    add_metrics_arguments(parser)
+    add_import_arguments(parser)
     args = parser.parse_args()
 
     N = args.iterations
     n = args.start
+    j0 = 0
+    imported = iterate_from_args(args, args.start)
+    if imported is not None:
+        # seule conversion en entier : les vérifications ci-dessous travaillent sur n
+        n = to_int(digits_to_decimal_text(imported.digits))
+        j0 = imported.iteration
     kmax = args.kmax
     results = []
+    m = metrics_from_args(args, run_info={'script': 'check_trajectory_obstruction',
+                                          'start': args.start, 'iterations': N, 'kmax': kmax})
 
-    for j in range(N):
+    for j in range(j0, j0 + N):
+        m.begin_iteration(j)
         entry = {'iteration': j, 'n': n}
-        obstruction_mod2, result_digits, carries = check_palindrome_obstruction_mod2_fast(n)
+        with m.stage('mod2'):
+            obstruction_mod2, result_digits, carries = check_palindrome_obstruction_mod2_fast(n)
         entry['obstruction_mod2'] = bool(obstruction_mod2)
         # build jacobian from MSB->LSB digits
         a_msb = list(map(int, str(n)))
-        rows = build_jacobian(a_msb)
-        r = rank_mod2(rows)
+        with m.stage('jacobian'):
+            rows = build_jacobian(a_msb)
+            r = rank_mod2(rows)
         entry['jacobian_constraints'] = len(rows)
         entry['jacobian_vars'] = len(a_msb) + 1
         entry['jacobian_rank_mod2'] = int(r)
@@ -198,7 +178,8 @@ def main():
                 # run empirical tests up to kmax
                 empirical_up_to = 0
                 for k in range(1, kmax + 1):
-                    ok = check_hensel_mod_pk(n, 2, k)
+                    with m.stage('hensel_2k'):
+                        ok = check_hensel_mod_pk(n, 2, k)
                     if ok:
                         empirical_up_to = k
                     else:
@@ -217,18 +198,22 @@ def main():
             if is_palindrome_digits(result_digits):
                 entry['found_palindrome'] = True
                 print(f'Palindrome found at iteration {j}: n={n}')
+                m.end_iteration(j, len(a_msb))
                 break
         # advance
-        n, _, _ = apply_T_simple(n)
+        with m.stage('T'):
+            n, _, _ = apply_T_simple(n)
+        m.end_iteration(j, len(a_msb))
         # periodic checkpoint dump
         checkpoint = args.checkpoint
-        if checkpoint and ((j + 1) % checkpoint == 0 or j == N - 1):
+        if checkpoint and ((j + 1) % checkpoint == 0 or j == j0 + N - 1):
             outpath = args.out
             chk_path = outpath + f'.part_{j+1}.json'
             tmp_path = chk_path + '.tmp'
             os.makedirs(os.path.dirname(outpath), exist_ok=True)
-            with open(tmp_path, 'w', encoding='utf-8') as f:
+            with m.stage('IO'), open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump({'config': vars(args), 'results': results}, f, indent=2)
+                m.add_bytes(f.tell())
             os.replace(tmp_path, chk_path)
             print(f'Wrote checkpoint {chk_path} ({len(results)} entries)')
 
@@ -236,11 +221,18 @@ def main():
     outpath = args.out
     os.makedirs(os.path.dirname(outpath), exist_ok=True)
     tmp_path = outpath + '.tmp'
-    with open(tmp_path, 'w', encoding='utf-8') as f:
-        json.dump({'config': vars(args), 'results': results}, f, indent=2)
+    with m.stage('IO'), open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'config': vars(args), 'results': results, 'merkle': merkle_summary(results)}, f, indent=2)
+        m.add_bytes(f.tell())
     os.replace(tmp_path, outpath)
 
     print(f'Wrote {len(results)} entries to {outpath}')
+    if args.compact and results:
+        cpath = cert_path(outpath)
+        with m.stage('IO'):
+            write_certificate(cpath, compact_records(results, TrajectoryKind(kmax), {'config': vars(args)}))
+        print(f'Wrote {cpath}')
+    m.close(results[-1]['iteration'] if results else None, len(str(n)))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""Compact, recomputable certificates for trajectory verdicts.
+
+verify_mod{p}_1000.json and the trajectory logs store every iterate ``n`` in
+full, so their size grows quadratically with the number of iterations.
+Every field of those records can be recomputed from the seed, so a compact
+certificate stores only what cannot be:
+
+ - the seed (decimal text of the first iterate), its iteration index, the
+   number of iterations, and the engine version
+   (``trajectory_engine.ENGINE_VERSION``);
+ - one verdict bit per iteration (bit j of byte j // 8, LSB first),
+   zlib-compressed and base64-encoded;
+ - sparse exceptions: the fields of a record that differ from what its
+   verdict bit and its length imply. For verify_mod_p that is info =
+   {'L': d} when solvable, None otherwise. For the trajectory logs it is
+   the Jacobian shape and rank for length d, and hensel_conclusion
+   'theoretical_by_hensel' / 'no_mod2_obstruction';
+ - a digest chain h_j = sha256(h_{j-1} || decimal text of n_j), starting
+   from 32 zero bytes, recorded every ``digest_every`` iterations and at
+   the last one.
+
+``verify`` replays the orbit from the seed with the engine, and checks the
+chain at each recorded point. It also recomputes each record from its
+iterate (the Z/p systems, or the mod-2 automaton and the Hensel rules) and
+compares it with the verdict bit plus exceptions. ``--no-recompute`` checks
+only the chain, and ``--limit`` stops after the first N iterations.
+``expand`` rebuilds the original JSON layout, and ``compact`` converts an
+existing file (it replays the orbit and refuses records that do not
+follow it).
+
+Usage:
+    python scripts/compact_cert.py compact results/verify_mod13_1000.json [--out ...] [--every 1000]
+    python scripts/compact_cert.py verify results/verify_mod13_1000.cert.json [--limit N] [--no-recompute]
+    python scripts/compact_cert.py expand results/verify_mod13_1000.cert.json --out /tmp/verify_mod13_1000.json
+"""
+import argparse
+import base64
+import hashlib
+import json
+import re
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from log_reader import iter_log, read_log_header, to_int
+from manifest_engine import atomic_write_text
+from trajectory_engine import (ENGINE_VERSION, NUMPY_AVAILABLE, digits_from_decimal_text,
+                               digits_to_decimal_text, reverse_add_step, reverse_add_step_numpy)
+
+FORMAT = 'compact-cert'
+FORMAT_VERSION = 1
+DEFAULT_EVERY = 1000
+_MOD_P_KEY = re.compile(r'^mod(\d+)_obstruction$')
+
+
+# ---- familles de certificats ----
+class ModPKind:
+    """verify_mod_p_obstruction : {'iteration', 'n', 'mod{p}_obstruction', 'info'}."""
+
+    name = 'verify_mod_p'
+
+    def __init__(self, p: int):
+        self.params = {'p': p}
+        self.verdict_field = f'mod{p}_obstruction'
+
+    def implied(self, bit: bool, text: str) -> Dict:
+        return {self.verdict_field: bit, 'info': None if bit else {'L': len(text)}}
+
+    def recompute(self, digits, text: str) -> Dict:
+        from verify_mod_p_obstruction import check_mod_p_obstruction_for_digits
+        obstruct, info = check_mod_p_obstruction_for_digits(digits, self.params['p'])
+        return {self.verdict_field: bool(obstruct), 'info': info}
+
+
+class TrajectoryKind:
+    """check_trajectory_obstruction : obstruction mod 2, jacobienne, conclusion de Hensel."""
+
+    name = 'trajectory_obstruction'
+    verdict_field = 'obstruction_mod2'
+
+    def __init__(self, kmax: int):
+        self.params = {'kmax': kmax}
+
+    @staticmethod
+    def _jacobian(d: int) -> Dict:
+        from check_jacobian_mod2 import analyze_length
+        jac = analyze_length(d)
+        return {'jacobian_constraints': jac['n_constraints'], 'jacobian_vars': jac['n_vars'],
+                'jacobian_rank_mod2': jac['rank_mod2'], 'jacobian_full_row_rank': jac['full_row_rank']}
+
+    def implied(self, bit: bool, text: str) -> Dict:
+        rec = {'obstruction_mod2': bit, **self._jacobian(len(text))}
+        if not bit:
+            rec['hensel_conclusion'] = 'no_mod2_obstruction'
+        elif rec['jacobian_full_row_rank'] and rec['jacobian_constraints'] > 0:
+            rec['hensel_conclusion'] = 'theoretical_by_hensel'
+        return rec
+
+    def recompute(self, digits, text: str) -> Dict:
+        # mêmes règles que la boucle de check_trajectory_obstruction.main
+        from check_trajectory_obstruction import check_hensel_mod_pk
+        from palindrome_automaton import decide
+        feasible, cert = decide(digits)
+        rec = self.implied(not feasible, text)
+        if feasible:
+            if cert['digits'] == cert['digits'][::-1]:
+                rec['found_palindrome'] = True
+        elif 'hensel_conclusion' not in rec:
+            n = to_int(text)
+            empirical_up_to = 0
+            for k in range(1, self.params['kmax'] + 1):
+                if not check_hensel_mod_pk(n, 2, k):
+                    break
+                empirical_up_to = k
+            rec['hensel_conclusion'] = (f'empirical_obstruction_up_to_2^{empirical_up_to}'
+                                        if empirical_up_to > 0 else 'needs_further_check')
+        return rec
+
+
+def make_kind(name: str, params: Dict):
+    if name == ModPKind.name:
+        return ModPKind(int(params['p']))
+    if name == TrajectoryKind.name:
+        return TrajectoryKind(int(params['kmax']))
+    raise ValueError(f'unknown certificate kind {name!r}')
+
+
+def detect_kind(record: Dict, header: Dict):
+    if 'obstruction_mod2' in record:
+        return TrajectoryKind(int(header.get('config', {}).get('kmax', 10)))
+    for key in record:
+        match = _MOD_P_KEY.match(key)
+        if match:
+            return ModPKind(int(match.group(1)))
+    raise ValueError('unrecognized record layout: ' + ', '.join(sorted(record)))
+
+
+# ---- orbite et empreintes ----
+def replay(seed: str, count: int) -> Iterator[Tuple[bytearray, str]]:
+    """(chiffres LSB-first, texte décimal) des ``count`` itérés depuis ``seed``."""
+    cur = digits_from_decimal_text(seed)
+    if NUMPY_AVAILABLE:
+        import numpy as np
+        arr = np.frombuffer(bytes(cur), dtype=np.uint8)
+        for _ in range(count):
+            digits = bytearray(arr.tobytes())
+            yield digits, digits_to_decimal_text(digits)
+            arr, _ = reverse_add_step_numpy(arr)
+        return
+    for _ in range(count):
+        yield cur, digits_to_decimal_text(cur)
+        cur, _ = reverse_add_step(cur)
+
+
+def chain_step(prev: bytes, text: str) -> bytes:
+    return hashlib.sha256(prev + text.encode('ascii')).digest()
+
+
+def pack_bits(bits: List[bool]) -> str:
+    buf = bytearray((len(bits) + 7) // 8)
+    for j, b in enumerate(bits):
+        if b:
+            buf[j >> 3] |= 1 << (j & 7)
+    return base64.b64encode(zlib.compress(bytes(buf), 9)).decode('ascii')
+
+
+def unpack_bits(data: str, count: int) -> List[bool]:
+    buf = zlib.decompress(base64.b64decode(data))
+    return [bool(buf[j >> 3] >> (j & 7) & 1) for j in range(count)]
+
+
+def _exception(record: Dict, implied: Dict) -> Optional[Dict]:
+    fields = {k: v for k, v in record.items()
+              if k not in ('iteration', 'n') and (k not in implied or implied[k] != v)}
+    absent = sorted(k for k in implied if k not in record)
+    if not fields and not absent:
+        return None
+    out = {'fields': fields}
+    if absent:
+        out['absent'] = absent
+    return out
+
+
+def _apply_exception(implied: Dict, exc: Optional[Dict]) -> Dict:
+    rec = dict(implied)
+    if exc:
+        for k in exc.get('absent', ()):
+            rec.pop(k, None)
+        rec.update(exc['fields'])
+    return rec
+
+
+# ---- conversion ----
+def compact_records(records: List[Dict], kind, header: Optional[Dict] = None,
+                    every: int = DEFAULT_EVERY) -> Dict:
+    """Certificat compact d'une liste d'enregistrements consécutifs de l'orbite."""
+    if not records:
+        raise ValueError('no records')
+    seed = str(records[0]['n'])
+    start = int(records[0].get('iteration', 0))
+    bits, exceptions, chain = [], [], []
+    h = bytes(32)
+    for idx, ((digits, text), rec) in enumerate(zip(replay(seed, len(records)), records)):
+        j = start + idx
+        if str(rec['n']) != text or int(rec.get('iteration', j)) != j:
+            raise ValueError(f'record {idx} does not follow the orbit of {seed[:20]}')
+        bit = bool(rec[kind.verdict_field])
+        bits.append(bit)
+        exc = _exception(rec, kind.implied(bit, text))
+        if exc is not None:
+            exceptions.append({'iteration': j, **exc})
+        h = chain_step(h, text)
+        if (idx + 1) % every == 0 or idx == len(records) - 1:
+            chain.append([j, h.hex()])
+    return {'format': FORMAT, 'version': FORMAT_VERSION, 'kind': kind.name, 'params': kind.params,
+            'engine': {'name': 'trajectory_engine', 'version': ENGINE_VERSION},
+            'seed': seed, 'start_iteration': start, 'count': len(records),
+            'verdict_field': kind.verdict_field, 'verdicts': pack_bits(bits),
+            'exceptions': exceptions, 'digest_every': every, 'chain': chain,
+            'header': header or {}}
+
+
+def cert_path(path) -> Path:
+    """results/x.json -> results/x.cert.json"""
+    return Path(re.sub(r'\.json$', '', str(path)) + '.cert.json')
+
+
+def write_certificate(path, cert: Dict) -> int:
+    text = json.dumps(cert, indent=1)
+    atomic_write_text(Path(path), text)
+    return len(text)
+
+
+def compact_file(path, every: int = DEFAULT_EVERY) -> Dict:
+    header = read_log_header(path)
+    header.pop('merkle', None)
+    records = list(iter_log(path))
+    kind = detect_kind(records[0], header) if records else None
+    return compact_records(records, kind, header, every)
+
+
+def expand(cert: Dict) -> Dict:
+    """Disposition JSON d'origine (en-tête + results), itérés recalculés par le moteur."""
+    kind = make_kind(cert['kind'], cert['params'])
+    bits = unpack_bits(cert['verdicts'], cert['count'])
+    exc = {e['iteration']: e for e in cert['exceptions']}
+    results = []
+    for idx, (_, text) in enumerate(replay(cert['seed'], cert['count'])):
+        j = cert['start_iteration'] + idx
+        rec = _apply_exception(kind.implied(bits[idx], text), exc.get(j))
+        results.append({'iteration': j, 'n': to_int(text), **rec})
+    return {**cert['header'], 'results': results}
+
+
+def verify(cert: Dict, recompute: bool = True, limit: Optional[int] = None,
+           max_errors: int = 20) -> Tuple[List[str], int]:
+    """(erreurs, nombre d'itérations vérifiées)."""
+    errors: List[str] = []
+    if cert.get('format') != FORMAT or cert.get('version') != FORMAT_VERSION:
+        return [f"unsupported format {cert.get('format')!r} v{cert.get('version')}"], 0
+    engine = cert.get('engine', {})
+    if engine.get('version') != ENGINE_VERSION:
+        return [f"engine version {engine.get('version')} != {ENGINE_VERSION}"], 0
+    kind = make_kind(cert['kind'], cert['params'])
+    count = cert['count'] if limit is None else min(limit, cert['count'])
+    bits = unpack_bits(cert['verdicts'], cert['count'])
+    exc = {e['iteration']: e for e in cert['exceptions']}
+    chain = {j: h for j, h in cert['chain']}
+    h = bytes(32)
+    done = 0
+    for idx, (digits, text) in enumerate(replay(cert['seed'], count)):
+        j = cert['start_iteration'] + idx
+        h = chain_step(h, text)
+        if j in chain and chain[j] != h.hex():
+            errors.append(f'iteration {j}: digest chain mismatch')
+            break
+        if recompute:
+            expected = _apply_exception(kind.implied(bits[idx], text), exc.get(j))
+            found = kind.recompute(digits, text)
+            for key in sorted(set(expected) | set(found)):
+                if expected.get(key) != found.get(key):
+                    errors.append(f'iteration {j}: {key} = {expected.get(key)!r}, recomputed {found.get(key)!r}')
+        done += 1
+        if len(errors) >= max_errors:
+            break
+    return errors, done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compact recomputable certificates (seed, verdict bitmap, digest chain).')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_c = sub.add_parser('compact')
+    p_c.add_argument('file')
+    p_c.add_argument('--out', type=str, default=None, help='défaut : <fichier>.cert.json')
+    p_c.add_argument('--every', type=int, default=DEFAULT_EVERY, help='intervalle de la chaîne d\'empreintes')
+    p_v = sub.add_parser('verify')
+    p_v.add_argument('cert')
+    p_v.add_argument('--limit', type=int, default=None)
+    p_v.add_argument('--no-recompute', action='store_true', help='chaîne d\'empreintes seulement')
+    p_e = sub.add_parser('expand')
+    p_e.add_argument('cert')
+    p_e.add_argument('--out', type=str, required=True)
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'compact':
+        cert = compact_file(args.file, args.every)
+        out = Path(args.out) if args.out else cert_path(args.file)
+        size = write_certificate(out, cert)
+        print(f"Wrote {out}: {cert['count']} iterations, {len(cert['exceptions'])} exceptions, "
+              f"{size} bytes (source {Path(args.file).stat().st_size} bytes)")
+        return 0
+    with open(args.cert, 'r', encoding='utf-8') as f:
+        cert = json.load(f)
+    if args.cmd == 'expand':
+        atomic_write_text(Path(args.out), json.dumps(expand(cert), indent=2))
+        print('Wrote', args.out)
+        return 0
+    errors, done = verify(cert, recompute=not args.no_recompute, limit=args.limit)
+    for e in errors:
+        print('FAIL:', e)
+    print(f"{'FAILED' if errors else 'ok'}: {done} of {cert.get('count')} iterations checked"
+          + ('' if args.no_recompute else ', verdicts recomputed'))
+    return 2 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""On-disk memoization for long analysis functions.
+
+``ComputeCache.call(func, *args, **kwargs)`` returns the stored result of a
+previous call with the same key, or computes and stores it. The key is the
+sha256 of
+
+ - the function's qualified name (module file stem + ``__qualname__``, so a
+   function called from its own script as ``__main__`` shares entries with
+   imports of that module);
+ - its arguments bound to the signature with defaults applied, serialized as
+   canonical JSON (tuples as lists, sets sorted, dict keys sorted);
+   arguments that do not serialize raise ``TypeError`` -- they cannot be
+   keyed reliably, so the caller should not cache that call;
+ - the sha256 of the function's module file and of every project module it
+   imports, transitively (same scan as the pipeline runner). This is
+   deliberately coarse: editing any helper in those files invalidates.
+
+Entries live in ``<dir>/<kk>/<key>.pkl`` (pickled value) with a JSON
+sidecar ``<key>.json`` (function, arguments, size, compute time). Both are
+written to a unique temporary file then ``os.replace``d, so concurrent
+writers from a process pool at worst compute the same entry twice and
+readers never see a partial file; an unreadable or vanished entry is a
+miss. A hit refreshes the entry's mtime, and when the total size exceeds
+``max_bytes`` the least recently used entries are removed (under an
+``flock`` where available, so only one process evicts at a time).
+
+With ``path=None`` the cache is disabled and ``call`` just calls, so entry
+points can route through it unconditionally (``--cache`` turns it on).
+
+Usage:
+    python scripts/compute_cache.py stats
+    python scripts/compute_cache.py list [--function analyse_moduli]
+    python scripts/compute_cache.py invalidate --function run_verify | --all
+    python scripts/compute_cache.py prune --max-mb 512
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from manifest_engine import ROOT, sha256_file
+from pipeline import local_imports
+
+CACHE_DIR = ROOT / '.compute_cache'
+DEFAULT_MAX_MB = 2048
+
+
+def qualified_name(func) -> str:
+    module_file = inspect.getsourcefile(func)
+    stem = Path(module_file).stem if module_file else func.__module__
+    return f'{stem}.{func.__qualname__}'
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_canonical(v) for v in value)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f'cannot key argument of type {type(value).__name__}')
+
+
+def normalized_arguments(func, args, kwargs) -> Dict:
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return _canonical(dict(bound.arguments))
+
+
+_code_hashes: Dict[str, str] = {}
+
+
+def code_hash(func) -> str:
+    """Empreinte du module de ``func`` et de ses imports locaux (mémorisée par processus)."""
+    module_file = inspect.getsourcefile(func)
+    if module_file is None:
+        return hashlib.sha256(func.__code__.co_code).hexdigest()
+    module_file = str(Path(module_file).resolve())
+    if module_file not in _code_hashes:
+        h = hashlib.sha256()
+        for path in sorted(local_imports(Path(module_file))):
+            h.update(path.name.encode('utf-8'))
+            h.update(sha256_file(path).encode('ascii'))
+        _code_hashes[module_file] = h.hexdigest()
+    return _code_hashes[module_file]
+
+
+def _atomic_write_bytes(path: Path, data: bytes):
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class ComputeCache:
+    """Cache disque clé -> résultat ; no-op si ``path`` est None."""
+
+    def __init__(self, path: Optional[Path] = CACHE_DIR, max_bytes: int = DEFAULT_MAX_MB << 20,
+                 refresh: bool = False):
+        self.path = Path(path) if path is not None else None
+        self.max_bytes = max_bytes
+        self.refresh = refresh          # recalculer et réécrire même en cas de hit
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def key(self, func, args=(), kwargs=None) -> Dict:
+        meta = {'function': qualified_name(func),
+                'arguments': normalized_arguments(func, args, kwargs or {}),
+                'code': code_hash(func)}
+        blob = json.dumps(meta, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        meta['key'] = hashlib.sha256(blob).hexdigest()
+        return meta
+
+    def _entry(self, key: str) -> Path:
+        return self.path / key[:2] / f'{key}.pkl'
+
+    def call(self, func, *args, **kwargs):
+        if not self.enabled:
+            return func(*args, **kwargs)
+        meta = self.key(func, args, kwargs)
+        entry = self._entry(meta['key'])
+        if not self.refresh:
+            try:
+                with open(entry, 'rb') as f:
+                    value = pickle.load(f)
+                os.utime(entry)
+                self.hits += 1
+                print(f"[cache] hit {meta['function']} ({meta['key'][:12]})", flush=True)
+                return value
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError, OSError):
+                pass
+        self.misses += 1
+        t0 = time.perf_counter()
+        value = func(*args, **kwargs)
+        seconds = time.perf_counter() - t0
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        meta.update({'bytes': len(data), 'compute_seconds': seconds, 'created': time.time()})
+        _atomic_write_bytes(entry.with_suffix('.json'), json.dumps(meta, indent=2).encode('utf-8'))
+        _atomic_write_bytes(entry, data)
+        self.evict()
+        return value
+
+    # ---- gestion ----
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / '.lock', 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def entries(self) -> List[Dict]:
+        """Entrées présentes (méta + taille + date d'accès), plus anciennes d'abord."""
+        out = []
+        if not self.enabled or not self.path.is_dir():
+            return out
+        for pkl in self.path.glob('*/*.pkl'):
+            try:
+                st = pkl.stat()
+                meta = json.loads(pkl.with_suffix('.json').read_text(encoding='utf-8'))
+            except (FileNotFoundError, ValueError):
+                meta = {'key': pkl.stem}
+                try:
+                    st = pkl.stat()
+                except FileNotFoundError:
+                    continue
+            meta['path'] = pkl
+            meta['size'] = st.st_size
+            meta['last_used'] = st.st_mtime
+            out.append(meta)
+        out.sort(key=lambda e: e['last_used'])
+        return out
+
+    def _remove(self, entry: Dict):
+        for p in (entry['path'], entry['path'].with_suffix('.json')):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Supprime les entrées les moins récemment utilisées au-delà de ``max_bytes``."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        removed = 0
+        with self._lock():
+            entries = self.entries()
+            total = sum(e['size'] for e in entries)
+            for e in entries:
+                if total <= limit:
+                    break
+                self._remove(e)
+                total -= e['size']
+                removed += 1
+        return removed
+
+    def invalidate(self, function: Optional[str] = None) -> int:
+        """Supprime toutes les entrées (ou celles dont la fonction se termine par ``function``)."""
+        removed = 0
+        with self._lock():
+            for e in self.entries():
+                name = e.get('function', '')
+                if function is None or name == function or name.endswith('.' + function):
+                    self._remove(e)
+                    removed += 1
+        return removed
+
+
+def add_cache_arguments(parser):
+    """Options CLI communes (--cache, --cache-dir, --cache-max-mb, --cache-refresh)."""
+    parser.add_argument('--cache', action='store_true',
+                        help='réutiliser les résultats mémorisés (désactivé par défaut)')
+    parser.add_argument('--cache-dir', type=str, default=str(CACHE_DIR))
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_MB)
+    parser.add_argument('--cache-refresh', action='store_true',
+                        help='recalculer et remplacer les entrées existantes')
+
+
+def cache_from_args(args) -> ComputeCache:
+    enabled = args.cache or args.cache_refresh
+    return ComputeCache(path=Path(args.cache_dir) if enabled else None,
+                        max_bytes=args.cache_max_mb << 20, refresh=args.cache_refresh)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or invalidate the computation cache.')
+    parser.add_argument('--cache-dir', type=str, default=str(CACHE_DIR))
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('stats')
+    p_list = sub.add_parser('list')
+    p_list.add_argument('--function', type=str, default=None)
+    p_inv = sub.add_parser('invalidate')
+    g = p_inv.add_mutually_exclusive_group(required=True)
+    g.add_argument('--function', type=str, help='nom qualifié ou nom court de la fonction')
+    g.add_argument('--all', action='store_true')
+    p_prune = sub.add_parser('prune')
+    p_prune.add_argument('--max-mb', type=int, default=DEFAULT_MAX_MB)
+    args = parser.parse_args(argv)
+
+    cache = ComputeCache(Path(args.cache_dir))
+    if args.cmd == 'stats':
+        entries = cache.entries()
+        per_func: Dict[str, List[int]] = {}
+        for e in entries:
+            per_func.setdefault(e.get('function', '?'), []).append(e['size'])
+        total = sum(e['size'] for e in entries)
+        print(f'{len(entries)} entries, {total / 2**20:.1f} MiB in {cache.path}')
+        for name, sizes in sorted(per_func.items()):
+            print(f'  {name}: {len(sizes)} entries, {sum(sizes) / 2**20:.2f} MiB')
+    elif args.cmd == 'list':
+        for e in reversed(cache.entries()):
+            name = e.get('function', '?')
+            if args.function and not (name == args.function or name.endswith('.' + args.function)):
+                continue
+            used = time.strftime('%Y-%m-%d %H:%M', time.localtime(e['last_used']))
+            secs = e.get('compute_seconds')
+            print(f"{e['key'][:12]}  {name}  {json.dumps(e.get('arguments'))}  "
+                  f"{e['size']} B  used {used}" + (f'  computed in {secs:.1f}s' if secs is not None else ''))
+    elif args.cmd == 'invalidate':
+        n = cache.invalidate(None if args.all else args.function)
+        print(f'removed {n} entries')
+    elif args.cmd == 'prune':
+        n = cache.evict(args.max_mb << 20)
+        print(f'removed {n} entries')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
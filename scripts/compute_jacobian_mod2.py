@@ -9,64 +9,134 @@ Outputs:
  - CSV summary at --output-csv (default: verifier/jacobian_summary.csv)
  - JSON summary at verifier/jacobian_summary.json
 
+Batch mode (--batch): candidates are grouped by digit count and the Jacobian
+rank, which depends on the length only, is computed once per length; the
+per-number parts (mod-2 obstruction of T(n), base carry solutions) run in a
+process pool and each row is appended to the CSV / JSON outputs as soon as it
+completes (rows come out grouped by length, in input order).
+
 Usage examples:
  python verifier/compute_jacobian_mod2.py --numbers 196,121
  python verifier/compute_jacobian_mod2.py --input-dir ..\\Soumission_Pairs\\verifier --output-csv verifier/jacobian_summary.csv
+ python verifier/compute_jacobian_mod2.py --input-dir certificates --batch --workers 8
 """
 
 import argparse
 import json
 import os
 import csv
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from glob import glob
 
-from check_jacobian_mod2 import analyze_n
+from check_jacobian_mod2 import analyze_n, analyze_length, digits
+from check_trajectory_obstruction import check_palindrome_obstruction_mod2_fast
+from verify_196_mod2 import base_carry_solutions
+from log_reader import iter_top_level
+
+INT_FIELDS = ('n', 'seed', 'candidate')
 
 
 def find_integers_in_json(path):
     """Try to extract integer keys or top-level integer fields from a JSON file.
-    Returns a set of integers."""
+    Returns a set of integers.
+
+    The file is read incrementally (log_reader): for a top-level object only
+    the keys and the 'n' / 'seed' / 'candidate' values are decoded, other
+    values (e.g. a large 'results' array) are skipped; a top-level list is
+    consumed one item at a time."""
     ints = set()
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except Exception:
-        return ints
-    # If data is dict, try keys
-    if isinstance(data, dict):
-        for k in data.keys():
-            try:
-                n = int(k)
-                ints.add(n)
-            except Exception:
-                pass
-        # try common fields
-        for field in ('n', 'seed', 'candidate'):
-            if field in data:
-                try:
-                    ints.add(int(data[field]))
-                except Exception:
-                    pass
-    # If data is list, try entries with 'n' or integer items
-    if isinstance(data, list):
-        for item in data:
-            if isinstance(item, dict):
-                for field in ('n', 'seed', 'candidate'):
-                    if field in item:
-                        try:
-                            ints.add(int(item[field]))
-                        except Exception:
-                            pass
-            elif isinstance(item, int):
-                ints.add(item)
-            elif isinstance(item, str):
+        for key, value in iter_top_level(path, want=lambda k: k in INT_FIELDS):
+            if isinstance(key, str):
+                # If data is dict, try keys, then common fields
                 try:
-                    ints.add(int(item))
+                    ints.add(int(key))
                 except Exception:
                     pass
+                if key in INT_FIELDS:
+                    try:
+                        ints.add(int(value))
+                    except Exception:
+                        pass
+            else:
+                # If data is list, try entries with 'n' or integer items
+                item = value
+                if isinstance(item, dict):
+                    for field in INT_FIELDS:
+                        if field in item:
+                            try:
+                                ints.add(int(item[field]))
+                            except Exception:
+                                pass
+                elif isinstance(item, int):
+                    ints.add(item)
+                elif isinstance(item, str):
+                    try:
+                        ints.add(int(item))
+                    except Exception:
+                        pass
+    except Exception:
+        # fichier illisible / JSON invalide : comme avant, aucun entier
+        return set()
     return ints
 
 
+BATCH_FIELDS = ['n', 'd', 'n_constraints', 'n_vars', 'rank_mod2', 'full_row_rank',
+                'obstruction_mod2', 'base_carry_solutions', 'error']
+
+
+def analyze_candidate(n):
+    """Per-number part of the batch analysis (runs in a worker process)."""
+    try:
+        obstruction, _, _ = check_palindrome_obstruction_mod2_fast(n)
+        return dict(n=n, obstruction_mod2=bool(obstruction),
+                    base_carry_solutions=len(base_carry_solutions(digits(n))))
+    except Exception as e:
+        return dict(n=n, error=str(e))
+
+
+def _analyze_chunk(ns):
+    return [analyze_candidate(n) for n in ns]
+
+
+def run_batch(numbers, output_csv, output_json, workers=None, chunksize=64):
+    """Analyse groupée par longueur, écriture incrémentale CSV + JSON."""
+    by_length = defaultdict(list)
+    for n in numbers:
+        by_length[len(str(n))].append(n)
+    # Jacobian : une seule évaluation par longueur (dans le processus principal)
+    per_length = {d: analyze_length(d) for d in sorted(by_length)}
+
+    chunks = []
+    for d in sorted(by_length):
+        group = by_length[d]
+        for i in range(0, len(group), chunksize):
+            chunks.append(group[i:i + chunksize])
+
+    os.makedirs(os.path.dirname(output_csv) or '.', exist_ok=True)
+    os.makedirs(os.path.dirname(output_json) or '.', exist_ok=True)
+    count = 0
+    with open(output_csv, 'w', newline='', encoding='utf-8') as fc, \
+            open(output_json, 'w', encoding='utf-8') as fj, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(fc, fieldnames=BATCH_FIELDS)
+        writer.writeheader()
+        fj.write('[')
+        for rows in pool.map(_analyze_chunk, chunks):
+            for row in rows:
+                row.update(per_length[len(str(row['n']))])
+                writer.writerow(row)
+                fj.write(',\n  ' if count else '\n  ')
+                fj.write(json.dumps(row))
+                count += 1
+            fc.flush()
+            fj.flush()
+        fj.write('\n]\n')
+    print(f'{len(per_length)} distinct lengths, {count} candidates')
+    return count
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--input-dir', default=None,
@@ -77,6 +147,12 @@ def main():
                    help='CSV summary output')
     p.add_argument('--output-json', default='verifier/jacobian_summary.json',
                    help='JSON summary output')
+    p.add_argument('--batch', action='store_true',
+                   help='group by length, process pool, incremental CSV/JSON output')
+    p.add_argument('--workers', type=int, default=None,
+                   help='worker processes for --batch (default: CPU count)')
+    p.add_argument('--chunksize', type=int, default=64,
+                   help='candidates per worker task for --batch')
     args = p.parse_args()
 
     numbers = set()
@@ -102,6 +178,11 @@ def main():
         numbers.add(196)
 
     numbers = sorted(numbers)
+    if args.batch:
+        count = run_batch(numbers, args.output_csv, args.output_json, args.workers, args.chunksize)
+        print(f'Wrote {count} results to {args.output_csv} and {args.output_json}')
+        return
+
     results = []
     for n in numbers:
         try:
@@ -1,22 +1,26 @@
 import json
+import os
+import sys
 from collections import Counter, defaultdict
 
-infile = r"results\trajectory_obstruction_log.json"
-out_json = r"results\jacobian_summary_extracted.json"
-out_tex = r"results\jacobian_summary.tex"
+from log_reader import iter_log
 
-with open(infile, 'r', encoding='utf-8') as f:
-    data = json.load(f)
+infile = sys.argv[1] if len(sys.argv) > 1 else os.path.join('results', 'trajectory_obstruction_log.json')
+out_json = os.path.join('results', 'jacobian_summary_extracted.json')
+out_tex = os.path.join('results', 'jacobian_summary.tex')
 
-results = data.get('results', [])
-N = len(results)
+# Lecture en flux : seuls les champs utiles sont matérialisés (les itérés 'n' ne sont jamais convertis)
+FIELDS = ('obstruction_mod2', 'jacobian_full_row_rank', 'jacobian_constraints', 'jacobian_rank_mod2')
+
+N = 0
 count_obstruction = 0
 count_full_rank = 0
 count_both = 0
 constraints_counter = Counter()
 rank_counter = Counter()
 
-for entry in results:
+for entry in iter_log(infile, fields=FIELDS):
+    N += 1
     if entry.get('obstruction_mod2'):
         count_obstruction += 1
     if entry.get('jacobian_full_row_rank'):
@@ -10,18 +10,11 @@ Output:
     checksums_manifest.txt
 """
 
-import hashlib
 import json
 from pathlib import Path
 from datetime import datetime
 
-def sha256_file(filepath):
-    """Calculate SHA256 hash of a file"""
-    sha256 = hashlib.sha256()
-    with open(filepath, 'rb') as f:
-        for block in iter(lambda: f.read(4096), b''):
-            sha256.update(block)
-    return sha256.hexdigest()
+from manifest_engine import sha256_file
 
 def generate_manifest():
     """Generate checksums for all certificate files"""
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""Bit-packed linear algebra over GF(2).
+
+``GF2Matrix`` stores a matrix as a (rows, ceil(cols/64)) uint64 array, bit
+j of a row living in word j // 64 at position j % 64. Row operations are
+word-wide XORs over whole rows, so a matrix costs 1/64 of the dense int64
+arrays of verify_nilpotence and the int-list rows of the ``rank_mod2``
+copies.
+
+Elimination follows the Method of the Four Russians (M4RI): columns are
+taken K = 8 at a time. Up to K pivots are found on the K-bit slab of the
+block only (cheap int64 operations over all rows), the pivot rows are
+reduced among themselves, and the 2^p XOR combinations of the p pivot rows
+are tabulated in Gray-code order. Every row is then cleared on the block
+in one gather-XOR ``M ^= table[index(row)]``. That is one pass over the
+matrix per block instead of one per pivot; the result is the reduced row
+echelon form. Multiplication works the same way: A's bits index tables of
+combinations of B's rows. A product whose left factor is sparse (e.g.
+I + R, two bits per row) XORs B's rows directly, O(nnz * words).
+
+Helpers on plain row lists (``rank_mod2``, ``solve_mod2``) keep the
+contracts of the per-script copies; without numpy, or for small inputs,
+they run on Python-int rows.
+
+Memory is the limit: a d x d matrix takes d^2 / 8 bytes (50 MB at d =
+20000, 1.25 GB at d = 10^5).
+"""
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None
+    NUMPY_AVAILABLE = False
+
+K = 8
+ROW_CHUNK = 1 << 14
+SMALL_CELLS = 1 << 12
+
+
+def _words(ncols: int) -> int:
+    return max(1, (ncols + 63) >> 6)
+
+
+def _popcount(a) -> int:
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(a).sum())
+    return int(np.unpackbits(np.ascontiguousarray(a).view(np.uint8)).sum())
+
+
+class GF2Matrix:
+    """Matrice sur GF(2) à lignes compactées en uint64 (numpy requis)."""
+
+    def __init__(self, nrows: int, ncols: int, words=None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError('GF2Matrix requires numpy (use rank_mod2 / solve_mod2 on row lists)')
+        self.nrows = nrows
+        self.ncols = ncols
+        self.nw = _words(ncols)
+        self.words = np.zeros((nrows, self.nw), dtype=np.uint64) if words is None else words
+
+    # ---- constructions ----
+    @classmethod
+    def zeros(cls, nrows: int, ncols: int) -> 'GF2Matrix':
+        return cls(nrows, ncols)
+
+    @classmethod
+    def identity(cls, n: int) -> 'GF2Matrix':
+        return cls.from_positions(n, n, np.arange(n), np.arange(n))
+
+    @classmethod
+    def reversal(cls, n: int) -> 'GF2Matrix':
+        """R_{i, n-1-i} = 1."""
+        return cls.from_positions(n, n, np.arange(n), n - 1 - np.arange(n))
+
+    @classmethod
+    def from_positions(cls, nrows: int, ncols: int, rows, cols) -> 'GF2Matrix':
+        """Bits aux positions (rows[t], cols[t]) ; les doublons s'annulent."""
+        m = cls(nrows, ncols)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        np.bitwise_xor.at(m.words, (rows, cols >> 6),
+                          np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64)))
+        return m
+
+    @classmethod
+    def from_rows(cls, rows, ncols: Optional[int] = None) -> 'GF2Matrix':
+        """Depuis une liste de lignes d'entiers (réduits mod 2) ou un tableau 2-D."""
+        dense = np.asarray(rows, dtype=np.int64)
+        if dense.ndim != 2:
+            dense = dense.reshape(len(rows), -1 if len(rows) else 0)
+        nrows, nc = dense.shape
+        ncols = nc if ncols is None else ncols
+        nw = _words(ncols)
+        bits = np.zeros((nrows, nw * 64), dtype=np.uint8)
+        bits[:, :nc] = dense & 1
+        packed = np.packbits(bits, axis=1, bitorder='little')
+        return cls(nrows, ncols, np.ascontiguousarray(packed).view('<u8').astype(np.uint64))
+
+    @classmethod
+    def from_int_rows(cls, rows: Sequence[int], ncols: int) -> 'GF2Matrix':
+        """Depuis des entiers Python (bit j = colonne j)."""
+        m = cls(len(rows), ncols)
+        nbytes = m.nw * 8
+        buf = b''.join(int(r).to_bytes(nbytes, 'little') for r in rows)
+        if rows:
+            m.words[:] = np.frombuffer(buf, dtype='<u8').reshape(len(rows), m.nw)
+        return m
+
+    def to_dense(self):
+        bits = np.unpackbits(self.words.astype('<u8').view(np.uint8), axis=1, bitorder='little')
+        return bits[:, :self.ncols]
+
+    def to_int_rows(self) -> List[int]:
+        raw = self.words.astype('<u8').tobytes()
+        step = self.nw * 8
+        return [int.from_bytes(raw[i * step:(i + 1) * step], 'little') for i in range(self.nrows)]
+
+    def copy(self) -> 'GF2Matrix':
+        return GF2Matrix(self.nrows, self.ncols, self.words.copy())
+
+    def get(self, i: int, j: int) -> int:
+        return int((self.words[i, j >> 6] >> np.uint64(j & 63)) & np.uint64(1))
+
+    def column(self, j: int):
+        """Colonne j (vecteur uint8)."""
+        return ((self.words[:, j >> 6] >> np.uint64(j & 63)) & np.uint64(1)).astype(np.uint8)
+
+    def is_zero(self) -> bool:
+        return not self.words.any()
+
+    def nnz(self) -> int:
+        return _popcount(self.words)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, GF2Matrix) and self.nrows == other.nrows
+                and self.ncols == other.ncols and np.array_equal(self.words, other.words))
+
+    def __add__(self, other: 'GF2Matrix') -> 'GF2Matrix':
+        if (self.nrows, self.ncols) != (other.nrows, other.ncols):
+            raise ValueError('shape mismatch')
+        return GF2Matrix(self.nrows, self.ncols, self.words ^ other.words)
+
+    def __matmul__(self, other: 'GF2Matrix') -> 'GF2Matrix':
+        return multiply(self, other)
+
+    def _slab(self, c0: int, width: int):
+        """Bits c0..c0+width-1 de chaque ligne (width <= 8, bloc aligné dans un mot)."""
+        return ((self.words[:, c0 >> 6] >> np.uint64(c0 & 63)) & np.uint64((1 << width) - 1)).astype(np.int64)
+
+    # ---- élimination ----
+    def rref(self) -> Tuple['GF2Matrix', List[int]]:
+        """Forme échelonnée réduite et colonnes pivots (M4RI)."""
+        M = self.words.copy()
+        n = self.nrows
+        used = np.zeros(n, dtype=bool)
+        pivots: List[Tuple[int, int]] = []
+        work = GF2Matrix(n, self.ncols, M)
+        for c0 in range(0, self.ncols, K):
+            if len(pivots) == n:
+                break
+            kk = min(K, self.ncols - c0)
+            slab = work._slab(c0, kk)
+            s = np.where(used, 0, slab)
+            block = []
+            for b in range(kk):
+                hit = ((s >> b) & 1).astype(bool)
+                cand = np.flatnonzero(hit)
+                if cand.size == 0:
+                    continue
+                i = int(cand[0])
+                ps = s[i]
+                s[hit] ^= ps
+                s[i] = 0
+                block.append((i, b))
+            if not block:
+                continue
+            # lignes pivots complètes, réduites entre elles sur le bloc
+            P, Pbits = [], []
+            for i, b in block:
+                row = M[i].copy()
+                bits = int(slab[i])
+                for m, (_, bm) in enumerate(block[:len(P)]):
+                    if (bits >> bm) & 1:
+                        row ^= P[m]
+                        bits ^= Pbits[m]
+                for m in range(len(P)):
+                    if (Pbits[m] >> b) & 1:
+                        P[m] ^= row
+                        Pbits[m] ^= bits
+                P.append(row)
+                Pbits.append(bits)
+            p = len(block)
+            table = np.zeros((1 << p, self.nw), dtype=np.uint64)
+            for idx in range(1, 1 << p):
+                low = idx & -idx
+                table[idx] = table[idx ^ low] ^ P[low.bit_length() - 1]
+            index = np.zeros(n, dtype=np.int64)
+            for j, (_, b) in enumerate(block):
+                index |= ((slab >> b) & 1) << j
+            for r0 in range(0, n, ROW_CHUNK):
+                M[r0:r0 + ROW_CHUNK] ^= table[index[r0:r0 + ROW_CHUNK]]
+            for j, (i, b) in enumerate(block):
+                M[i] = P[j]
+                used[i] = True
+                pivots.append((i, c0 + b))
+        pivots.sort(key=lambda t: t[1])
+        rows = [i for i, _ in pivots]
+        R = GF2Matrix(len(rows), self.ncols, M[rows] if rows else np.zeros((0, self.nw), dtype=np.uint64))
+        return R, [c for _, c in pivots]
+
+    def rank(self) -> int:
+        return len(self.rref()[1])
+
+    def kernel(self) -> 'GF2Matrix':
+        """Base du noyau à droite {x : A x = 0}, une ligne par vecteur."""
+        R, pivots = self.rref()
+        pivset = set(pivots)
+        free = [j for j in range(self.ncols) if j not in pivset]
+        basis = GF2Matrix(len(free), self.ncols)
+        if not free:
+            return basis
+        piv = np.asarray(pivots, dtype=np.int64)
+        for t, f in enumerate(free):
+            col = R.column(f).astype(bool)
+            cols = np.concatenate([piv[col], [f]])
+            np.bitwise_xor.at(basis.words[t], cols >> 6,
+                              np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64)))
+        return basis
+
+    def inverse(self) -> Optional['GF2Matrix']:
+        """Inverse d'une matrice carrée, ou None si singulière ([A | I] échelonnée)."""
+        n = self.nrows
+        if n != self.ncols:
+            raise ValueError('inverse needs a square matrix')
+        # I commence sur un mot entier : la moitié droite se lit sans décalage
+        off = self.nw * 64
+        aug = GF2Matrix(n, off + n)
+        aug.words[:, :self.nw] = self.words
+        aug.words[:, self.nw:] = GF2Matrix.identity(n).words
+        R, pivots = aug.rref()
+        if pivots[:n] != list(range(n)):
+            return None
+        return GF2Matrix(n, n, np.ascontiguousarray(R.words[:, self.nw:]))
+
+    def solve(self, b) -> Optional[List[int]]:
+        """Une solution de A x = b (variables libres à 0), ou None si incompatible."""
+        b = np.asarray(b, dtype=np.int64) & 1
+        aug = GF2Matrix(self.nrows, self.ncols + 1)
+        aug.words[:, :self.nw] = self.words
+        last = self.ncols
+        aug.words[:, last >> 6] |= b.astype(np.uint64) << np.uint64(last & 63)
+        R, pivots = aug.rref()
+        if pivots and pivots[-1] == last:
+            return None
+        x = [0] * self.ncols
+        rhs = R.column(last)
+        for r, c in enumerate(pivots):
+            x[c] = int(rhs[r])
+        return x
+
+
+def multiply(A: GF2Matrix, B: GF2Matrix) -> GF2Matrix:
+    """Produit A B sur GF(2) : lignes creuses XORées directement, sinon tables M4RI."""
+    if A.ncols != B.nrows:
+        raise ValueError('shape mismatch')
+    C = GF2Matrix(A.nrows, B.ncols)
+    nnz = A.nnz()
+    blocks = (A.ncols + K - 1) // K
+    if nnz <= blocks * A.nrows:
+        wi, ww = np.nonzero(A.words)
+        vals = A.words[wi, ww]
+        for bit in range(64):
+            sel = np.flatnonzero((vals >> np.uint64(bit)) & np.uint64(1))
+            if sel.size == 0:
+                continue
+            rows = wi[sel]
+            cols = ww[sel] * 64 + bit
+            for t0 in range(0, sel.size, ROW_CHUNK):
+                np.bitwise_xor.at(C.words, rows[t0:t0 + ROW_CHUNK], B.words[cols[t0:t0 + ROW_CHUNK]])
+        return C
+    for c0 in range(0, A.ncols, K):
+        kk = min(K, A.ncols - c0)
+        index = A._slab(c0, kk)
+        table = np.zeros((1 << kk, B.nw), dtype=np.uint64)
+        for idx in range(1, 1 << kk):
+            low = idx & -idx
+            table[idx] = table[idx ^ low] ^ B.words[c0 + low.bit_length() - 1]
+        for r0 in range(0, A.nrows, ROW_CHUNK):
+            C.words[r0:r0 + ROW_CHUNK] ^= table[index[r0:r0 + ROW_CHUNK]]
+    return C
+
+
+# ---- listes de lignes (contrats des copies de rank_mod2 / gauss_jordan_mod_p) ----
+def _int_rows(matrix) -> List[int]:
+    out = []
+    for row in matrix:
+        v = 0
+        for j, x in enumerate(row):
+            if x & 1:
+                v |= 1 << j
+        out.append(v)
+    return out
+
+
+def rank_int_rows(rows_int: List[int], ncols: int) -> int:
+    """Rang sur GF(2) de lignes codées en entiers Python (élimination bit à bit)."""
+    rows_int = list(rows_int)
+    nrows = len(rows_int)
+    rank = 0
+    for c in range(ncols):
+        mask = 1 << c
+        pivot = None
+        for i in range(rank, nrows):
+            if rows_int[i] & mask:
+                pivot = i
+                break
+        if pivot is None:
+            continue
+        rows_int[rank], rows_int[pivot] = rows_int[pivot], rows_int[rank]
+        pr = rows_int[rank]
+        for i in range(nrows):
+            if i != rank and rows_int[i] & mask:
+                rows_int[i] ^= pr
+        rank += 1
+        if rank == nrows:
+            break
+    return rank
+
+
+def rank_mod2(matrix) -> int:
+    """Rang mod 2 d'une liste de lignes d'entiers (compactée si numpy et matrice non triviale)."""
+    if not len(matrix):
+        return 0
+    ncols = len(matrix[0])
+    if NUMPY_AVAILABLE and len(matrix) * ncols > SMALL_CELLS:
+        return GF2Matrix.from_rows(matrix, ncols).rank()
+    return rank_int_rows(_int_rows(matrix), ncols)
+
+
+def solve_mod2(A, b) -> Tuple[bool, Optional[List[int]]]:
+    """(résoluble, solution) de A x = b mod 2, contrat de ``gauss_jordan_mod_p``."""
+    m = len(A)
+    n = len(A[0]) if m else 0
+    if NUMPY_AVAILABLE and m * n > SMALL_CELLS:
+        x = GF2Matrix.from_rows(A, n).solve(b)
+        return (x is not None), x
+    rows = _int_rows(A)
+    rhs = [int(v) & 1 for v in b]
+    r = 0
+    pivots = []
+    for c in range(n):
+        mask = 1 << c
+        sel = next((i for i in range(r, m) if rows[i] & mask), None)
+        if sel is None:
+            continue
+        rows[r], rows[sel] = rows[sel], rows[r]
+        rhs[r], rhs[sel] = rhs[sel], rhs[r]
+        for i in range(m):
+            if i != r and rows[i] & mask:
+                rows[i] ^= rows[r]
+                rhs[i] ^= rhs[r]
+        pivots.append(c)
+        r += 1
+        if r == m:
+            break
+    if any(rhs[i] for i in range(r, m)):
+        return False, None
+    x = [0] * n
+    for i, c in enumerate(pivots):
+        x[c] = rhs[i]
+    return True, x
@@ -1,11 +1,19 @@
+import argparse
 import json
+from functools import lru_cache
 from itertools import combinations
-import sympy as sp
 import time
 
+from gf2 import GF2Matrix
+from jacobian_minors import find_minors
+from trajectory_engine import digits_to_decimal_text, iterate_orbit
+from zpk_linalg import inverse_mod
+
 REPS = [14456,24242,10301,10213,12121,12324,41204,23222,11117,34243,14342,20091,10302,15241,11422,32122,22121,13430,10310,42113,41414]
 # Étendu à 120 pour une vérification Hensel plus profonde
 K_MAX = 120
+# au-delà, inverse mod 2 seulement (l'inverse mod 2^K_MAX serait en O(m^3) sur des entiers Python)
+DENSE_MINOR_MAX = 32
 
 
 def digits_rev(n):
@@ -14,18 +22,68 @@ def digits_rev(n):
 
 def build_matrix(d):
     m = d//2
-    A = sp.zeros(m, d)
+    A = [[0] * d for _ in range(m)]
     for i in range(m):
         j = d-1-i
         if i-1 >= 0:
-            A[i, i-1] += 1
-        A[i, i] += -10
+            A[i][i-1] += 1
+        A[i][i] += -10
         if j-1 >= 0:
-            A[i, j-1] += -1
-        A[i, j] += 10
+            A[i][j-1] += -1
+        A[i][j] += 10
     return A
 
 
+@lru_cache(maxsize=None)
+def minor_inverse(d, cols):
+    """Inverse de A[:, cols] mod 2^K_MAX (None si le mineur est singulier mod 2).
+
+    Invertible mod 2 means invertible mod every 2^k, and the inverse mod 2^k
+    is this one reduced, so a single inverse serves the whole lift.
+    """
+    A = build_matrix(d)
+    return inverse_mod([[A[i][j] for j in cols] for i in range(d//2)], 2, K_MAX)
+
+
+@lru_cache(maxsize=None)
+def minor_inverse_mod2(d, cols):
+    """Inverse de A[:, cols] mod 2 en lignes d'entiers (bit j = colonne j), ou None."""
+    pos = {c: t for t, c in enumerate(cols)}
+    ri, ci = [], []
+    for i, row in enumerate(build_matrix(d)):
+        for j, x in enumerate(row):
+            if x & 1 and j in pos:
+                ri.append(i)
+                ci.append(pos[j])
+    inv = GF2Matrix.from_positions(d//2, len(cols), ri, ci).inverse()
+    return None if inv is None else inv.to_int_rows()
+
+
+def lift_delta(d, cols, r, k):
+    """delta sur les colonnes ``cols`` avec A[:, cols] delta = -r mod 2^k (None si singulier).
+
+    The residual at level k is already 0 mod 2^(k-1) (F is affine in the
+    carries), so for a large minor delta = 2^(k-1) A^-1 (-r / 2^(k-1)) and
+    only the inverse mod 2 is needed.
+    """
+    modulus = 1 << k
+    if len(cols) <= DENSE_MINOR_MAX:
+        Ainv = minor_inverse(d, tuple(cols))
+        if Ainv is None:
+            return None
+        rvec = [(-x) % modulus for x in r]
+        return [sum(a * x for a, x in zip(row, rvec)) % modulus for row in Ainv]
+    Ainv2 = minor_inverse_mod2(d, tuple(cols))
+    if Ainv2 is None:
+        return None
+    half = modulus >> 1
+    u = 0
+    for i, x in enumerate(r):
+        if ((-x) // half) & 1:
+            u |= 1 << i
+    return [half if bin(row & u).count('1') & 1 else 0 for row in Ainv2]
+
+
 def F_vector(rep, c):
     # returns vector length m of palindromicity equations evaluated at integer carries c
     s = str(rep)
@@ -48,11 +106,7 @@ def F_vector(rep, c):
 def try_hensel_for_rep(rep, minor_cols, base_c):
     s = str(rep)
     d = len(s)
-    m = d//2
-    A = build_matrix(d)
     cols_sel = list(minor_cols)
-    free_cols = [c for c in range(d) if c not in cols_sel]
-    M = A[:, cols_sel]
     # work modulo increasing powers of 2
     c_curr = [int(x) for x in base_c]
     for k in range(1, K_MAX+1):
@@ -63,17 +117,9 @@ def try_hensel_for_rep(rep, minor_cols, base_c):
             # already satisfied modulo 2^k
             continue
         # we need to solve for delta on selected cols to cancel r modulo 2^k
-        # build A_mod = A[:, cols_sel] mod 2^k
-        A_mod = sp.Matrix([[int(A[i,j]) % modulus for j in cols_sel] for i in range(m)])
-        try:
-            Ainv = A_mod.inv_mod(modulus)
-        except Exception:
+        delta_sel_ints = lift_delta(d, cols_sel, r, k)
+        if delta_sel_ints is None:
             return False, k-1, c_curr
-        # compute delta_sel = (-r) in Z_mod multiplied by Ainv
-        rvec = sp.Matrix([(-x) % modulus for x in r])
-        delta_sel = Ainv * rvec
-        # convert delta_sel to integers 0..modulus-1
-        delta_sel_ints = [int(x % modulus) for x in delta_sel]
         # apply delta to c_curr for selected cols
         for idx, col in enumerate(cols_sel):
             c_curr[col] = (c_curr[col] + delta_sel_ints[idx]) % modulus
@@ -95,7 +141,46 @@ def try_hensel_for_rep(rep, minor_cols, base_c):
     return True, K_MAX, c_curr
 
 
+def lift_iterate(n_text, count=1):
+    """Relèvement de Hensel pour un nombre donné en décimal, mineur choisi par ``find_minors``.
+
+    Starts from zero carries: the first step solves the system mod 2.
+    """
+    d = len(n_text)
+    minors = find_minors(build_matrix(d), count)
+    if not minors:
+        return {'status': 'no_invertible_minor', 'd': d}
+    minor = minors[0]['cols']
+    start = time.time()
+    ok, reached_k, c_final = try_hensel_for_rep(n_text, minor, [0] * d)
+    return {'d': d, 'minor_used': minor, 'minor_weight': minors[0]['weight'],
+            'alternatives': [m['cols'] for m in minors[1:]],
+            'hensel_lift_success': ok, 'reached_k': reached_k, 'time_s': time.time() - start}
+
+
 def main():
+    parser = argparse.ArgumentParser(description='Hensel lifting of the palindromicity system mod 2^k.')
+    parser.add_argument('--iterates', type=int, nargs='*', default=None,
+                        help='itérés j de la trajectoire (mineurs calculés, sans fichiers verifier/)')
+    parser.add_argument('--start', type=int, default=196)
+    parser.add_argument('--count', type=int, default=1, help='mineurs alternatifs à rechercher')
+    parser.add_argument('--out', type=str, default=None)
+    args = parser.parse_args()
+
+    if args.iterates:
+        wanted = set(args.iterates)
+        results = {}
+        for j, cur, _, _ in iterate_orbit(args.start, max(wanted) + 1):
+            if j in wanted:
+                results[j] = lift_iterate(digits_to_decimal_text(cur), args.count)
+                print(f"iterate {j}: d={results[j].get('d')} success={results[j].get('hensel_lift_success')} "
+                      f"k={results[j].get('reached_k')}")
+        out = args.out or 'results/hensel_lift_iterates.json'
+        with open(out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Wrote', out)
+        return
+
     with open('verifier/hensel_applicability_summary.json','r') as f:
         hens = json.load(f)
     with open('verifier/closure_mod2k_targeted_results.json','r') as f:
@@ -110,16 +195,18 @@ def main():
         if not info['base_sol_exists_mod2'] or info['invertible_minors']==0:
             results[rep] = {'status':'no_base_or_no_minor', 'info':info}
             continue
-        minor = info['some_minors'][0]['cols']
+        # mineur du résumé s'il y en a un, sinon recherche par élimination
+        minors = info.get('some_minors') or find_minors(build_matrix(len(str(rep))))
+        minor = minors[0]['cols']
         base_c = info['base_sol_mod2']
         start = time.time()
         ok, reached_k, c_final = try_hensel_for_rep(rep, minor, base_c)
         elapsed = time.time() - start
         results[rep] = {'minor_used': minor, 'base_c': base_c, 'hensel_lift_success': ok, 'reached_k': reached_k, 'final_c_repr': c_final, 'time_s': elapsed}
 
-    with open('verifier/hensel_lift_results.json','w') as f:
+    with open(args.out or 'verifier/hensel_lift_results.json','w') as f:
         json.dump(results, f, indent=2)
-    print('Wrote verifier/hensel_lift_results.json')
+    print('Wrote', args.out or 'verifier/hensel_lift_results.json')
 
 
 if __name__ == '__main__':
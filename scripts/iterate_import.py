@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""Start analyses from externally computed iterates instead of from 196.
+
+An external iterate is a plain decimal file (MSB-first, as published for
+the 196 search) or a packed snapshot written by packed_orbit.py, together
+with its claimed iteration index. The file is memory-mapped and turned into
+a digit buffer (LSB-first ``bytearray``, one byte per digit) without ever
+building a Python int, so it can be handed directly to
+``trajectory_engine.iterate_orbit(digits=..., start_iteration=...)``.
+
+The claim is checked against our own snapshot store, a JSON index of
+iterates we computed ourselves: per (start, iteration) the length, the
+sha256 of the digit stream and a table of per-block hashes (blocks of
+``BLOCK_DIGITS`` digits, LSB-first). Verification is a spot check:
+
+ - same iteration in the store: the length plus the first, last and
+   ``spot`` random blocks are compared (a few hundred KB read for an iterate
+   of any size; ``full=True`` rehashes everything);
+ - otherwise, a record within ``max_steps`` iterations: the earlier of the two
+   iterates (the external one, or our stored copy when the record kept its
+   data) is advanced in memory and the spot check is done on the later one;
+ - no overlapping record: the iterate is accepted as trusted and reported
+   'unverified'.
+
+A mismatch raises ``ValueError``.
+
+Usage:
+    python iterate_import.py record --start 196 --iterations 20000 --every 1000
+    python iterate_import.py verify 196_iter1000000.txt --iteration 1000000
+    python iterate_import.py to-packed 196_iter1000000.txt --iteration 1000000 work/
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import random
+import shutil
+from typing import Dict, List, Optional
+
+import packed_orbit
+from trajectory_engine import digits_from_decimal_text, iterate_orbit, reverse_add_step
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_STORE = os.path.join(ROOT, 'results', 'iterate_snapshots')
+BLOCK_DIGITS = 1 << 16
+BLOCK_HASH_HEX = 32
+SPOT_BLOCKS = 16
+
+_ASCII_TO_DIGIT = bytes((b - 48) & 0xFF for b in range(256))
+
+
+class DigitSource:
+    """Accès par fenêtres (LSB-first) à un itéré sur disque, texte ou compacté."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, 'rb')
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        hdr = packed_orbit.read_header(path)
+        if hdr is not None:
+            if not hdr['complete']:
+                self.close()
+                raise ValueError(f'{path}: incomplete packed snapshot')
+            self.format = 'packed'
+            self.d = hdr['d']
+            self.header_iteration = hdr['iteration']
+        else:
+            self.format = 'decimal'
+            self.header_iteration = None
+            mm = self._mm
+            start, end = 0, len(mm)
+            while start < end and mm[start:start + 1].isspace():
+                start += 1
+            while end > start and mm[end - 1:end].isspace():
+                end -= 1
+            if end == start:
+                self.close()
+                raise ValueError(f'{path}: empty decimal file')
+            self._start, self._end = start, end
+            self.d = end - start
+
+    def window(self, lo: int, hi: int) -> bytes:
+        """Chiffres [lo, hi) (LSB-first), un octet par chiffre."""
+        if self.format == 'packed':
+            return bytes(packed_orbit.read_window(self._mm, lo, hi))
+        raw = self._mm[self._end - hi:self._end - lo]
+        if not raw.isdigit():
+            raise ValueError(f'{self.path}: non-digit character in [{lo}, {hi})')
+        return raw[::-1].translate(_ASCII_TO_DIGIT)
+
+    def to_buffer(self) -> bytearray:
+        """Buffer complet pour trajectory_engine (d octets, pas d'entier Python)."""
+        if self.format == 'packed':
+            return bytearray(packed_orbit.read_window(self._mm, 0, self.d))
+        return digits_from_decimal_text(self._mm[self._start:self._end])
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class _BufferSource:
+    """Même interface que DigitSource pour un buffer en mémoire."""
+
+    format = 'buffer'
+
+    def __init__(self, digits):
+        self.digits = digits
+        self.d = len(digits)
+
+    def window(self, lo: int, hi: int) -> bytes:
+        return bytes(self.digits[lo:hi])
+
+
+def _block_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:BLOCK_HASH_HEX]
+
+
+def hash_record(source, block_digits: int = BLOCK_DIGITS) -> Dict:
+    """Longueur, sha256 du flux LSB-first et table des hachés de blocs."""
+    full = hashlib.sha256()
+    blocks = []
+    for lo in range(0, source.d, block_digits):
+        data = source.window(lo, min(source.d, lo + block_digits))
+        full.update(data)
+        blocks.append(_block_hash(data))
+    return {'d': source.d, 'sha256': full.hexdigest(),
+            'block_digits': block_digits, 'blocks': blocks}
+
+
+# ---- magasin de snapshots ----
+class SnapshotStore:
+    """Index JSON des itérés calculés localement (hachés, données optionnelles)."""
+
+    def __init__(self, root: str = DEFAULT_STORE):
+        self.root = root
+        self.index_path = os.path.join(root, 'index.json')
+        self.records: List[Dict] = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.records = json.load(f).get('records', [])
+
+    def find(self, start: int, iteration: int, max_steps: int = 0) -> Optional[Dict]:
+        """Enregistrement de même départ le plus proche (|écart| <= max_steps)."""
+        best = None
+        for rec in self.records:
+            if rec['start'] != start:
+                continue
+            gap = abs(rec['iteration'] - iteration)
+            if gap <= max_steps and (best is None or gap < abs(best['iteration'] - iteration)):
+                best = rec
+        return best
+
+    def add(self, start: int, iteration: int, source, keep_data: bool = False,
+            block_digits: int = BLOCK_DIGITS) -> Dict:
+        rec = {'start': start, 'iteration': iteration}
+        rec.update(hash_record(source, block_digits))
+        if keep_data:
+            rel = os.path.join(f'start{start}', f'iter{iteration}.pkd')
+            path = os.path.join(self.root, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            packed_orbit.write_packed(path, source.window(0, source.d), iteration)
+            rec['file'] = rel.replace(os.sep, '/')
+        self.records = [r for r in self.records
+                        if (r['start'], r['iteration']) != (start, iteration)]
+        self.records.append(rec)
+        self.records.sort(key=lambda r: (r['start'], r['iteration']))
+        return rec
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'block_digits': BLOCK_DIGITS, 'records': self.records}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.index_path)
+
+    def load_digits(self, rec: Dict) -> bytearray:
+        with DigitSource(os.path.join(self.root, rec['file'])) as src:
+            return src.to_buffer()
+
+
+def spot_check(source, rec: Dict, spot: int = SPOT_BLOCKS, full: bool = False,
+               rng: Optional[random.Random] = None) -> Dict:
+    """Compare ``source`` à un enregistrement ; renvoie le détail (ok, blocs vérifiés)."""
+    if source.d != rec['d']:
+        return {'ok': False, 'reason': f"length {source.d} != recorded {rec['d']}"}
+    bd = rec['block_digits']
+    nblocks = len(rec['blocks'])
+    if full:
+        picked = list(range(nblocks))
+    else:
+        rng = rng or random.Random()
+        inner = range(1, max(1, nblocks - 1))
+        picked = sorted({0, nblocks - 1} | set(rng.sample(inner, min(spot, len(inner)))))
+    for b in picked:
+        data = source.window(b * bd, min(source.d, (b + 1) * bd))
+        if _block_hash(data) != rec['blocks'][b]:
+            return {'ok': False, 'reason': f'block {b} differs', 'blocks_checked': picked}
+    return {'ok': True, 'blocks_checked': len(picked), 'blocks_total': nblocks}
+
+
+def _advance(digits: bytearray, steps: int) -> bytearray:
+    for _ in range(steps):
+        digits, _ = reverse_add_step(digits)
+    return digits
+
+
+class ExternalIterate:
+    """Itéré importé : ``digits`` (LSB-first), ``iteration``, ``verification``."""
+
+    def __init__(self, digits: bytearray, iteration: int, start: int, verification: Dict):
+        self.digits = digits
+        self.iteration = iteration
+        self.start = start
+        self.verification = verification
+
+    @property
+    def d(self) -> int:
+        return len(self.digits)
+
+    def orbit(self, max_iter: int):
+        """``iterate_orbit`` repris à partir de cet itéré."""
+        return iterate_orbit(digits=self.digits, max_iter=max_iter,
+                             start_iteration=self.iteration)
+
+
+def verify_claim(path: str, iteration: Optional[int] = None, start: int = 196,
+                 store: Optional[SnapshotStore] = None, spot: int = SPOT_BLOCKS,
+                 full: bool = False, max_steps: int = 0, seed: Optional[int] = None,
+                 _buffer: Optional[bytearray] = None) -> Dict:
+    """Vérifie « ``path`` est T^iteration(start) » contre le magasin de snapshots."""
+    store = store if store is not None else SnapshotStore()
+    rng = random.Random(seed)
+    with DigitSource(path) as src:
+        if iteration is None:
+            iteration = src.header_iteration
+        if iteration is None:
+            raise ValueError(f'{path}: no iteration index given')
+        rec = store.find(start, iteration, max_steps)
+        report = {'path': path, 'format': src.format, 'd': src.d, 'start': start,
+                  'iteration': iteration}
+        if rec is None:
+            report['status'] = 'unverified'
+            return report
+        report['record_iteration'] = rec['iteration']
+        gap = rec['iteration'] - iteration
+        if gap == 0:
+            res = spot_check(src, rec, spot, full, rng)
+        elif gap > 0:
+            ours = _BufferSource(_advance(_buffer if _buffer is not None else src.to_buffer(), gap))
+            res = spot_check(ours, rec, spot, full, rng)
+        else:
+            if 'file' not in rec:
+                report['status'] = 'unverified'
+                report['reason'] = 'nearest earlier record has no data'
+                return report
+            ours = _advance(store.load_digits(rec), -gap)
+            res = spot_check(src, hash_record(_BufferSource(ours)), spot, full, rng)
+        report.update(res)
+        report['steps'] = gap
+        report['status'] = 'verified' if res['ok'] else 'mismatch'
+        return report
+
+
+def load_external_iterate(path: str, iteration: Optional[int] = None, start: int = 196,
+                          store: Optional[SnapshotStore] = None, spot: int = SPOT_BLOCKS,
+                          full: bool = False, max_steps: int = 0,
+                          seed: Optional[int] = None) -> ExternalIterate:
+    """Charge et vérifie un itéré externe ; ``ValueError`` si la vérification échoue."""
+    with DigitSource(path) as src:
+        digits = src.to_buffer()
+        if iteration is None:
+            iteration = src.header_iteration
+    report = verify_claim(path, iteration, start, store, spot, full, max_steps, seed,
+                          _buffer=digits)
+    if report['status'] == 'mismatch':
+        raise ValueError(f"{path}: not T^{report['iteration']}({start}): {report.get('reason')}")
+    return ExternalIterate(digits, report['iteration'], start, report)
+
+
+def add_import_arguments(parser):
+    """Options CLI communes pour reprendre depuis un itéré externe."""
+    parser.add_argument('--from-iterate', type=str, default=None,
+                        help='itéré externe (décimal MSB-first ou snapshot compacté)')
+    parser.add_argument('--from-iteration', type=int, default=None,
+                        help="indice d'itération revendiqué pour --from-iterate")
+    parser.add_argument('--snapshot-store', type=str, default=DEFAULT_STORE,
+                        help='magasin de snapshots pour la vérification ponctuelle')
+    parser.add_argument('--verify-steps', type=int, default=0,
+                        help="écart maximal (itérations) avec un snapshot pour vérifier")
+
+
+def iterate_from_args(args, start: int) -> Optional[ExternalIterate]:
+    if not args.from_iterate:
+        return None
+    imp = load_external_iterate(args.from_iterate, args.from_iteration, start,
+                                SnapshotStore(args.snapshot_store),
+                                max_steps=args.verify_steps)
+    v = imp.verification
+    print(f"Imported iteration {imp.iteration} ({imp.d} digits) from {args.from_iterate}: "
+          f"{v['status']}" + (f" ({v['blocks_checked']} blocks)" if v.get('ok') else ''))
+    return imp
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import and verify external reverse-and-add iterates.')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('record', help="calculer l'orbite et enregistrer des snapshots")
+    p.add_argument('--start', type=int, default=196)
+    p.add_argument('--iterations', type=int, required=True)
+    p.add_argument('--every', type=int, default=1000)
+    p.add_argument('--keep-data', action='store_true', help='conserver aussi les chiffres (compactés)')
+    p.add_argument('--store', type=str, default=DEFAULT_STORE)
+
+    p = sub.add_parser('add', help='enregistrer un itéré de confiance')
+    p.add_argument('path')
+    p.add_argument('--iteration', type=int, default=None)
+    p.add_argument('--start', type=int, default=196)
+    p.add_argument('--keep-data', action='store_true')
+    p.add_argument('--store', type=str, default=DEFAULT_STORE)
+
+    p = sub.add_parser('verify', help='vérifier un itéré externe')
+    p.add_argument('path')
+    p.add_argument('--iteration', type=int, default=None)
+    p.add_argument('--start', type=int, default=196)
+    p.add_argument('--spot', type=int, default=SPOT_BLOCKS)
+    p.add_argument('--full', action='store_true')
+    p.add_argument('--max-steps', type=int, default=0)
+    p.add_argument('--seed', type=int, default=None)
+    p.add_argument('--store', type=str, default=DEFAULT_STORE)
+
+    p = sub.add_parser('to-packed', help='vérifier puis initialiser un répertoire packed_orbit')
+    p.add_argument('path')
+    p.add_argument('workdir')
+    p.add_argument('--iteration', type=int, default=None)
+    p.add_argument('--start', type=int, default=196)
+    p.add_argument('--store', type=str, default=DEFAULT_STORE)
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.store)
+
+    if args.cmd == 'record':
+        every = max(1, args.every)
+        for j, digits, _, _ in iterate_orbit(args.start, args.iterations + 1):
+            if j % every == 0:
+                store.add(args.start, j, _BufferSource(digits), args.keep_data)
+        store.save()
+        print(f'Recorded {args.iterations // every + 1} snapshots in {store.index_path}')
+    elif args.cmd == 'add':
+        with DigitSource(args.path) as src:
+            iteration = args.iteration if args.iteration is not None else src.header_iteration
+            if iteration is None:
+                parser.error('--iteration is required for decimal files')
+            rec = store.add(args.start, iteration, src, args.keep_data)
+        store.save()
+        print(f"Recorded iteration {iteration} ({rec['d']} digits)")
+    elif args.cmd == 'verify':
+        report = verify_claim(args.path, args.iteration, args.start, store, args.spot,
+                              args.full, args.max_steps, args.seed)
+        print(json.dumps(report, indent=2))
+        if report['status'] == 'mismatch':
+            raise SystemExit(2)
+    elif args.cmd == 'to-packed':
+        report = verify_claim(args.path, args.iteration, args.start, store)
+        if report['status'] == 'mismatch':
+            print(json.dumps(report, indent=2))
+            raise SystemExit(2)
+        os.makedirs(args.workdir, exist_ok=True)
+        for name in packed_orbit.FILES:
+            path = os.path.join(args.workdir, name)
+            if os.path.exists(path):
+                os.remove(path)
+        dst = os.path.join(args.workdir, packed_orbit.FILES[0])
+        if report['format'] == 'packed':
+            shutil.copyfile(args.path, dst)
+            with open(dst, 'r+b') as f:
+                f.write(packed_orbit.HEADER.pack(packed_orbit.MAGIC, packed_orbit.VERSION,
+                                                 packed_orbit.FLAG_COMPLETE, 0,
+                                                 report['d'], report['iteration']))
+        else:
+            packed_orbit.import_decimal_text(args.path, dst, report['iteration'])
+        print(f"Initialized {dst} at iteration {report['iteration']} ({report['status']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Invertible maximal minors mod 2 of the palindromicity Jacobian.
+
+Hensel lifting needs m columns of the m x n Jacobian whose m x m minor is
+invertible mod 2. Trying the C(n, m) column subsets is hopeless beyond a
+few digits; a pivoted elimination over GF(2) finds one directly.
+
+Columns are ranked sparsest first (fewest nonzero entries over Z, ties by
+index) and eliminated in that order, so a column becomes a pivot when it is
+independent of the lighter ones already taken. Column sets independent over
+GF(2) form a matroid, so this greedy choice is a minimum-weight basis: the
+sparsest invertible minor. The elimination runs on bit-packed rows
+(``GF2Matrix.rref`` with numpy, Python-int rows otherwise).
+
+The reduced form R writes every other column c in that basis, A_c = sum of
+R[i][c] A_{p_i}, so replacing pivot p_i by c where R[i][c] = 1 gives another
+invertible minor, and one pivot on (i, c) updates R. Alternatives are
+enumerated best-first over these exchanges. The k-th lightest basis is one
+exchange away from a lighter one, and ranks at most k among that basis's
+exchanges, so each expanded basis only queues its ``count`` best ones. With
+columns renumbered by weight those are the lowest non-pivot bits of each
+row, and expanding a basis costs O(m count) besides one pivot.
+
+A minor invertible mod 2 has odd determinant, so it stays invertible mod
+2^k for every k and a single inverse serves the whole lift. When the rank
+mod 2 is below m no minor is invertible mod any 2^k and the list is empty.
+
+Usage:
+    python scripts/jacobian_minors.py --lengths 5 6 7 --count 3
+    python scripts/jacobian_minors.py --lengths 3000 --out results/jacobian_minors.json
+"""
+import argparse
+import heapq
+import json
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from check_jacobian_mod2 import build_jacobian
+from gf2 import NUMPY_AVAILABLE, SMALL_CELLS, GF2Matrix
+
+
+def column_weights(rows: Sequence[Sequence[int]]) -> List[int]:
+    """Nombre d'entrées non nulles (sur Z) de chaque colonne."""
+    n = len(rows[0]) if rows else 0
+    w = [0] * n
+    for row in rows:
+        for j, x in enumerate(row):
+            if x:
+                w[j] += 1
+    return w
+
+
+def _rref_int(rows_int: List[int], ncols: int) -> Tuple[List[int], List[int]]:
+    """Forme échelonnée réduite sur des lignes entières : (lignes pivots, colonnes pivots)."""
+    rows_int = list(rows_int)
+    nrows = len(rows_int)
+    r = 0
+    pivots = []
+    for c in range(ncols):
+        mask = 1 << c
+        sel = next((i for i in range(r, nrows) if rows_int[i] & mask), None)
+        if sel is None:
+            continue
+        rows_int[r], rows_int[sel] = rows_int[sel], rows_int[r]
+        pr = rows_int[r]
+        for i in range(nrows):
+            if i != r and rows_int[i] & mask:
+                rows_int[i] ^= pr
+        pivots.append(c)
+        r += 1
+        if r == nrows:
+            break
+    return rows_int[:r], pivots
+
+
+def _reduced_by_weight(rows, order: List[int]) -> Tuple[List[int], List[int]]:
+    """R et pivots, colonnes renumérotées selon ``order`` (la position t est la colonne order[t])."""
+    m = len(rows)
+    n = len(order)
+    rank_of = {c: t for t, c in enumerate(order)}
+    if NUMPY_AVAILABLE and m * n > SMALL_CELLS:
+        ri, ci = [], []
+        for i, row in enumerate(rows):
+            for j, x in enumerate(row):
+                if x & 1:
+                    ri.append(i)
+                    ci.append(rank_of[j])
+        R, pivots = GF2Matrix.from_positions(m, n, ri, ci).rref()
+        return R.to_int_rows(), pivots
+    rows_int = []
+    for row in rows:
+        v = 0
+        for j, x in enumerate(row):
+            if x & 1:
+                v |= 1 << rank_of[j]
+        rows_int.append(v)
+    return _rref_int(rows_int, n)
+
+
+def _lowest_bits(x: int, count: int) -> List[int]:
+    out = []
+    while x and len(out) < count:
+        low = x & -x
+        out.append(low.bit_length() - 1)
+        x ^= low
+    return out
+
+
+def find_minors(rows: Sequence[Sequence[int]], count: int = 1) -> List[Dict]:
+    """Jusqu'à ``count`` mineurs m x m inversibles mod 2, du plus creux au moins creux.
+
+    Each entry is ``{'cols': [...], 'weight': w}`` with the columns in
+    increasing order and w the number of nonzero entries of the minor over
+    Z. The list is empty when the rank mod 2 is below m.
+    """
+    m = len(rows)
+    if m == 0:
+        return []
+    weights = column_weights(rows)
+    order = sorted(range(len(weights)), key=lambda j: (weights[j], j))
+    w = [weights[c] for c in order]
+    R, pivots = _reduced_by_weight(rows, order)
+    if len(pivots) < m:
+        return []
+
+    def describe(piv):
+        return {'cols': sorted(order[t] for t in piv), 'weight': sum(w[t] for t in piv)}
+
+    out = []
+    start = tuple(sorted(pivots))
+    seen = {start}
+    # (poids, colonnes triées, base parente, échange (ligne, colonne))
+    heap = [(sum(w[t] for t in start), start, None, None)]
+    while heap and len(out) < count:
+        weight, key, parent, swap = heapq.heappop(heap)
+        if parent is None:
+            R_cur, piv_cur = R, list(pivots)
+        else:
+            R_par, piv_par = parent
+            i, c = swap
+            R_cur = [row ^ R_par[i] if r != i and (row >> c) & 1 else row for r, row in enumerate(R_par)]
+            piv_cur = list(piv_par)
+            piv_cur[i] = c
+        out.append(describe(piv_cur))
+        if len(out) == count:
+            break
+        pivmask = 0
+        for t in piv_cur:
+            pivmask |= 1 << t
+        cands = []
+        for i, row in enumerate(R_cur):
+            for c in _lowest_bits(row & ~pivmask, count):
+                cands.append((w[c] - w[piv_cur[i]], i, c))
+        state = (R_cur, piv_cur)
+        for delta, i, c in heapq.nsmallest(count, cands):
+            nxt = tuple(sorted(set(piv_cur) - {piv_cur[i]} | {c}))
+            if nxt in seen:
+                continue
+            seen.add(nxt)
+            heapq.heappush(heap, (weight + delta, nxt, state, (i, c)))
+    return out
+
+
+def analyze_length(d: int, count: int = 1) -> Dict:
+    """Mineurs inversibles mod 2 de la jacobienne des contraintes pour la longueur d."""
+    rows = build_jacobian([0] * d)
+    t0 = time.perf_counter()
+    minors = find_minors(rows, count)
+    return dict(d=d, n_constraints=len(rows), n_vars=d + 1, full_row_rank=bool(minors),
+                minors=minors, seconds=round(time.perf_counter() - t0, 4))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find invertible minors mod 2 of the palindromicity Jacobian.')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[5, 6, 7, 8])
+    parser.add_argument('--count', type=int, default=3, help='nombre de mineurs par longueur')
+    parser.add_argument('--out', type=str, default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    for d in args.lengths:
+        res = analyze_length(d, args.count)
+        results.append(res)
+        best = res['minors'][0] if res['minors'] else None
+        shown = '' if best is None else (f"cols {best['cols']}" if d <= 16 else f"weight {best['weight']}")
+        print(f"d={d}: {len(res['minors'])} minors ({res['seconds']}s) {shown}")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print('Wrote', args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""Persistent index of formulas, labels and references in the LaTeX sources.
+
+One pass per file extracts the math environments (equation, align, gather,
+multline, displaymath, ``\\[..\\]``, ``$$..$$``, ``$..$``), the ``\\label``s
+and the ``\\ref``-like commands, with line numbers; comments and verbatim /
+lstlisting bodies are blanked first so line numbers are preserved. Formulas
+are normalized (comments, ``\\label``, ``\\nonumber``, spacing commands and
+``\\mathrm``-style wrappers removed, whitespace collapsed) and carry a
+32-value MinHash signature over 5-character shingles.
+
+The index (``.latex_index.json`` at the repository root) is keyed by file;
+``update`` re-parses a file only when its size/mtime changed *and* its
+sha256 differs, so checking after an edit costs one parse of the edited
+file. Queries run on in-memory structures rebuilt from the index:
+
+ - exact presence: dict lookup on the normalized formula;
+ - containment (``fragment in formula``, what compare_formulas did with
+   120-character prefixes): the fragment's rarest shingles select a short
+   posting list, only those formulas are substring-checked;
+ - similarity: LSH over the MinHash signatures (8 bands of 4 rows, a pair
+   at Jaccard 0.8 collides with probability > 0.999), candidates verified
+   on the exact shingle Jaccard;
+ - duplicate labels and dangling references (per document, each .tex being
+   compiled on its own, or across all indexed files with ``--global``).
+
+Usage:
+    python scripts/latex_index.py update
+    python scripts/latex_index.py check [--global]
+    python scripts/latex_index.py find 'T(n) = n + \\mathrm{rev}(n)' [--similar 0.8]
+    python scripts/latex_index.py compare Lychrel.tex certificate.tex supplementary.tex
+"""
+import argparse
+import json
+import re
+import sys
+import zlib
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from manifest_engine import ROOT, atomic_write_text, rel_posix, sha256_file
+
+INDEX_PATH = ROOT / '.latex_index.json'
+INDEX_VERSION = 1
+
+SHINGLE = 5
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+# permutations universelles a*x + b mod p, fixées pour que les signatures persistent
+_PERMS = [((0x9E3779B97F4A7C15 * (i + 1)) % _PRIME | 1, (0xC2B2AE3D27D4EB4F * (i + 7)) % _PRIME)
+          for i in range(NUM_PERM)]
+
+MATH_ENVS = 'equation|align|gather|multline|eqnarray|displaymath|math'
+MATH_RE = re.compile(
+    r'\\begin\{(' + MATH_ENVS + r')(\*?)\}(.*?)\\end\{\1\2\}'
+    r'|\\\[(.*?)\\\]'
+    r'|\$\$(.*?)\$\$'
+    r'|(?<!\\)\$((?:[^$\\]|\\.)+?)\$', re.S)
+LABEL_RE = re.compile(r'\\label\{([^}]+)\}')
+REF_RE = re.compile(r'\\(ref|eqref|pageref|autoref|cref|Cref|nameref)\*?\{([^}]+)\}')
+COMMENT_RE = re.compile(r'(?<!\\)%.*')
+VERBATIM_RE = re.compile(r'\\begin\{(verbatim|lstlisting|minted)\*?\}.*?\\end\{\1\*?\}', re.S)
+
+
+def source_rel(path, root: Path = ROOT) -> str:
+    """Chemin d'un source (relatif au répertoire courant ou à la racine) -> clé d'index."""
+    p = Path(path)
+    if not p.is_absolute() and not p.exists():
+        p = root / p
+    try:
+        return rel_posix(p, root)
+    except ValueError:
+        return p.resolve().as_posix()
+
+
+def _blank(m) -> str:
+    """Remplace un bloc par des espaces en gardant les sauts de ligne."""
+    return re.sub(r'[^\n]', ' ', m.group(0))
+
+
+def normalize_formula(s: str) -> str:
+    s = COMMENT_RE.sub('', s)
+    s = LABEL_RE.sub('', s)
+    s = re.sub(r'\\(nonumber|notag)\b', '', s)
+    s = re.sub(r'\\(texttt|mathrm|operatorname|text|textrm)\{([^}]*)\}', r'\2', s)
+    for sp in ('\\,', '\\;', '\\:', '\\!', '\\quad', '\\qquad', '~'):
+        s = s.replace(sp, ' ')
+    s = re.sub(r'\s+', ' ', s)
+    return s.strip()
+
+
+def shingles(s: str, k: int = SHINGLE) -> Set[str]:
+    if len(s) <= k:
+        return {s} if s else set()
+    return {s[i:i + k] for i in range(len(s) - k + 1)}
+
+
+def minhash(sh: Iterable[str]) -> List[int]:
+    base = [zlib.crc32(x.encode('utf-8')) for x in sh]
+    if not base:
+        return [0] * NUM_PERM
+    return [min((a * x + b) % _PRIME for x in base) for a, b in _PERMS]
+
+
+def parse_tex(text: str) -> Dict:
+    """Formules, labels et références d'un source LaTeX (lignes 1-indexées)."""
+    text = VERBATIM_RE.sub(_blank, text)
+    text = COMMENT_RE.sub(lambda m: ' ' * len(m.group(0)), text)
+    newlines = [i for i, ch in enumerate(text) if ch == '\n']
+
+    def line_of(pos):
+        return bisect_right(newlines, pos - 1) + 1
+
+    formulas = []
+    for m in MATH_RE.finditer(text):
+        if m.group(1):
+            env, body = m.group(1) + m.group(2), m.group(3)
+        elif m.group(4) is not None:
+            env, body = 'displaymath', m.group(4)
+        elif m.group(5) is not None:
+            env, body = '$$', m.group(5)
+        else:
+            env, body = '$', m.group(6)
+        norm = normalize_formula(body)
+        labels = LABEL_RE.findall(body)
+        formulas.append({'env': env, 'line': line_of(m.start()), 'norm': norm,
+                         'labels': labels, 'sig': minhash(shingles(norm)) if norm else None})
+    labels = [{'name': m.group(1).strip(), 'line': line_of(m.start())} for m in LABEL_RE.finditer(text)]
+    refs = []
+    for m in REF_RE.finditer(text):
+        for name in m.group(2).split(','):
+            if name.strip():
+                refs.append({'name': name.strip(), 'cmd': m.group(1), 'line': line_of(m.start())})
+    return {'formulas': [f for f in formulas if f['norm']], 'labels': labels, 'refs': refs}
+
+
+class FormulaIndex:
+    """Formules normalisées avec listes inverses de shingles et bandes LSH."""
+
+    def __init__(self, formulas: Iterable = ()):
+        self.formulas: List[str] = []
+        self.locations: List[List] = []
+        self.exact: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        self.buckets: Dict[tuple, List[int]] = {}
+        self.sigs: List[List[int]] = []
+        for f in formulas:
+            if isinstance(f, str):
+                self.add(f)
+            else:
+                self.add(f['norm'], f.get('loc'), f.get('sig'))
+
+    def add(self, norm: str, loc=None, sig: Optional[List[int]] = None) -> int:
+        fid = self.exact.get(norm)
+        if fid is None:
+            fid = len(self.formulas)
+            self.exact[norm] = fid
+            self.formulas.append(norm)
+            self.locations.append([])
+            for sh in shingles(norm):
+                self.postings.setdefault(sh, []).append(fid)
+            sig = sig or minhash(shingles(norm))
+            self.sigs.append(sig)
+            for b in range(BANDS):
+                self.buckets.setdefault((b, tuple(sig[b * ROWS:(b + 1) * ROWS])), []).append(fid)
+        if loc is not None:
+            self.locations[fid].append(loc)
+        return fid
+
+    def __len__(self):
+        return len(self.formulas)
+
+    def __contains__(self, norm: str) -> bool:
+        return norm in self.exact
+
+    def containing(self, fragment: str) -> List[int]:
+        """Formules contenant ``fragment`` (sous-chaîne)."""
+        if len(fragment) < SHINGLE:
+            return [i for i, f in enumerate(self.formulas) if fragment in f]
+        lists = []
+        for sh in shingles(fragment):
+            post = self.postings.get(sh)
+            if post is None:
+                return []
+            lists.append(post)
+        lists.sort(key=len)
+        cand = set(lists[0])
+        for post in lists[1:3]:
+            cand.intersection_update(post)
+        return sorted(i for i in cand if fragment in self.formulas[i])
+
+    def similar(self, norm: str, threshold: float = 0.8) -> List[tuple]:
+        """(jaccard, id) des formules proches au sens des shingles, meilleures d'abord."""
+        sh = shingles(norm)
+        sig = minhash(sh)
+        cand = set()
+        for b in range(BANDS):
+            cand.update(self.buckets.get((b, tuple(sig[b * ROWS:(b + 1) * ROWS])), ()))
+        out = []
+        for i in cand:
+            other = shingles(self.formulas[i])
+            j = len(sh & other) / len(sh | other) if sh or other else 1.0
+            if j >= threshold:
+                out.append((j, i))
+        return sorted(out, reverse=True)
+
+    def present(self, norm: str, prefix: int = 120) -> Optional[str]:
+        """'exact', 'contained' (préfixe contenu dans une formule) ou None."""
+        if norm in self.exact:
+            return 'exact'
+        if self.containing(norm[:prefix]):
+            return 'contained'
+        return None
+
+
+class LatexIndex:
+    """Index persistant par fichier (mis à jour par empreinte)."""
+
+    def __init__(self, path: Path = INDEX_PATH, root: Path = ROOT):
+        self.path = Path(path)
+        self.root = root
+        self.files: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+                if data.get('version') == INDEX_VERSION:
+                    self.files = data.get('files', {})
+            except ValueError:
+                self.files = {}
+
+    def default_sources(self) -> List[str]:
+        return sorted(rel_posix(p, self.root) for p in self.root.glob('*.tex'))
+
+    def update(self, sources: Optional[Sequence[str]] = None) -> List[str]:
+        """Réindexe les fichiers modifiés ; renvoie ceux qui ont été reparsés."""
+        sources = list(sources) if sources else self.default_sources()
+        changed = []
+        for src in sources:
+            rel = source_rel(src, self.root)
+            p = self.root / rel
+            st = p.stat()
+            rec = self.files.get(rel)
+            if rec and rec['size'] == st.st_size and rec['mtime_ns'] == st.st_mtime_ns:
+                continue
+            digest = sha256_file(p)
+            if rec and rec['sha256'] == digest:
+                rec.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+                continue
+            parsed = parse_tex(p.read_text(encoding='utf-8', errors='ignore'))
+            self.files[rel] = dict(parsed, sha256=digest, size=st.st_size, mtime_ns=st.st_mtime_ns)
+            changed.append(rel)
+        for rel in list(self.files):
+            if not (self.root / rel).exists():
+                del self.files[rel]
+                changed.append(rel)
+        return changed
+
+    def save(self):
+        atomic_write_text(self.path, json.dumps({'version': INDEX_VERSION, 'files': self.files},
+                                                separators=(',', ':')))
+
+    def _select(self, files: Optional[Sequence[str]]) -> List[str]:
+        if not files:
+            return sorted(self.files)
+        out = []
+        for f in files:
+            if f not in self.files:
+                raise KeyError(f'{f} is not indexed (run update)')
+            out.append(f)
+        return out
+
+    def formula_index(self, files: Optional[Sequence[str]] = None) -> FormulaIndex:
+        idx = FormulaIndex()
+        for rel in self._select(files):
+            for f in self.files[rel]['formulas']:
+                idx.add(f['norm'], (rel, f['line'], f['env']), f['sig'])
+        return idx
+
+    def labels(self, files: Optional[Sequence[str]] = None) -> Dict[str, List[tuple]]:
+        out: Dict[str, List[tuple]] = {}
+        for rel in self._select(files):
+            for lab in self.files[rel]['labels']:
+                out.setdefault(lab['name'], []).append((rel, lab['line']))
+        return out
+
+    def duplicate_labels(self, files=None) -> Dict[str, List[tuple]]:
+        # chaque document est compilé seul : doublons cherchés fichier par fichier
+        out = {}
+        for rel in self._select(files):
+            for name, locs in self.labels([rel]).items():
+                if len(locs) > 1:
+                    out.setdefault(name, []).extend(locs)
+        return out
+
+    def dangling_refs(self, files=None, global_scope: bool = False) -> List[Dict]:
+        selected = self._select(files)
+        all_labels = set(self.labels(selected)) if global_scope else None
+        out = []
+        for rel in selected:
+            known = all_labels if global_scope else set(self.labels([rel]))
+            for ref in self.files[rel]['refs']:
+                if ref['name'] not in known:
+                    out.append(dict(ref, file=rel))
+        return out
+
+
+def compare(index: LatexIndex, reference: str, others: Sequence[str], prefix: int = 120) -> Dict:
+    """Formules de ``reference`` absentes des autres fichiers (exactes / contenues / manquantes)."""
+    ref_idx = index.formula_index([reference])
+    doc_idx = index.formula_index(others)
+    missing, paraphrased = [], []
+    for fid, norm in enumerate(ref_idx.formulas):
+        status = doc_idx.present(norm, prefix)
+        if status == 'contained':
+            paraphrased.append(norm)
+        elif status is None:
+            missing.append({'formula': norm, 'locations': ref_idx.locations[fid]})
+    return {'reference_formula_count': len(ref_idx), 'docs_formula_count': len(doc_idx),
+            'n_missing': len(missing), 'n_paraphrased': len(paraphrased),
+            'missing': missing, 'paraphrased': paraphrased}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Formula / label / reference index of the LaTeX sources.')
+    parser.add_argument('--index', type=str, default=str(INDEX_PATH))
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('update')
+    p.add_argument('files', nargs='*')
+    p = sub.add_parser('check', help='labels dupliqués et références pendantes')
+    p.add_argument('files', nargs='*')
+    p.add_argument('--global', dest='global_scope', action='store_true',
+                   help='références résolues sur tous les fichiers indexés')
+    p.add_argument('--json', type=str, default=None)
+    p = sub.add_parser('find')
+    p.add_argument('formula')
+    p.add_argument('--similar', type=float, default=None, metavar='JACCARD')
+    p.add_argument('--files', nargs='*', default=None)
+    p = sub.add_parser('compare')
+    p.add_argument('reference')
+    p.add_argument('others', nargs='+')
+    p.add_argument('--prefix', type=int, default=120)
+    p.add_argument('--out', type=str, default=None)
+    args = parser.parse_args(argv)
+
+    index = LatexIndex(Path(args.index))
+    files = getattr(args, 'files', None) or None
+    changed = index.update(files if args.cmd in ('update', 'check') else None)
+    if changed:
+        index.save()
+    if args.cmd == 'update':
+        total = sum(len(r['formulas']) for r in index.files.values())
+        print(f"{len(index.files)} files indexed ({total} formulas), reparsed: {', '.join(changed) or 'none'}")
+        return 0
+    if args.cmd == 'check':
+        sel = [source_rel(f) for f in files] if files else None
+        dups = index.duplicate_labels(sel)
+        dangling = index.dangling_refs(sel, args.global_scope)
+        for name, locs in sorted(dups.items()):
+            print(f"duplicate label {name}: " + ', '.join(f'{f}:{l}' for f, l in locs))
+        for ref in dangling:
+            print(f"{ref['file']}:{ref['line']}: \\{ref['cmd']}{{{ref['name']}}} has no label")
+        print(f'{len(dups)} duplicate labels, {len(dangling)} dangling references')
+        if args.json:
+            Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(Path(args.json), json.dumps(
+                {'duplicate_labels': {k: v for k, v in dups.items()}, 'dangling_refs': dangling}, indent=2))
+        return 1 if dups or dangling else 0
+    if args.cmd == 'find':
+        idx = index.formula_index(args.files)
+        norm = normalize_formula(args.formula)
+        if args.similar is not None:
+            hits = [(j, i) for j, i in idx.similar(norm, args.similar)]
+        else:
+            hits = [(1.0, i) for i in ([idx.exact[norm]] if norm in idx else idx.containing(norm))]
+        for j, i in hits[:50]:
+            locs = ', '.join(f'{f}:{l}' for f, l, _ in idx.locations[i][:5])
+            print(f'{j:.2f}  {locs}  {idx.formulas[i][:100]}')
+        print(f'{len(hits)} matches')
+        return 0 if hits else 1
+    if args.cmd == 'compare':
+        ref = source_rel(args.reference)
+        others = [source_rel(o) for o in args.others]
+        if index.update([ref] + others):
+            index.save()
+        report = compare(index, ref, others, args.prefix)
+        print(f"{report['reference_formula_count']} formulas in {ref}, {report['docs_formula_count']} in the others")
+        print(f"missing: {report['n_missing']}, paraphrased (prefix contained): {report['n_paraphrased']}")
+        if args.out:
+            atomic_write_text(Path(args.out), json.dumps(report, indent=2, ensure_ascii=False))
+            print('Wrote', args.out)
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
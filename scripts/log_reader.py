@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Streaming reader for large result logs.
+
+The result files written by check_trajectory_obstruction.py (and the
+checkpoint ``.part_*`` files) use the layout ``{'config': {...},
+'results': [entry, entry, ...]}``; the extractors used to ``json.load`` them
+whole. This module walks the file incrementally, decoding one array element
+at a time with the C ``raw_decode`` on a sliding 1 MiB text buffer, so memory
+is bounded by the largest single entry:
+
+ - ``iter_log(path, fields=..., where=...)``  entries of the results array
+   (or of a top-level list, or of a ``.jsonl`` file, one entry per line);
+ - ``read_log_header(path)``  top-level fields other than the array
+   (``config``), without decoding the array;
+ - ``iter_top_level(path, want=...)``  (key, value) pairs of a top-level
+   object, or (index, item) of a top-level list; unwanted values are skipped
+   without being built.
+
+Projection / pushdown: integer literals longer than ``LAZY_INT_DIGITS``
+(the iterates ``n``) are kept as ``BigIntText`` (a ``str`` subclass) while
+decoding and are converted to ``int`` only for the fields actually returned,
+so reading ``jacobian_rank_mod2`` from a 10^5-iteration log never parses the
+multi-thousand-digit iterates. ``where`` is either a dict of required values
+(compared after conversion) or a callable applied to the raw entry before
+projection.
+
+``source`` may be a path or an open binary/text file object (e.g. a stream
+from ``artifact_store.open_artifact``).
+"""
+import io
+import json
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+READ_SIZE = 1 << 20
+LAZY_INT_DIGITS = 64
+_WS = ' \t\n\r'
+
+
+class BigIntText(str):
+    """Littéral entier JSON non encore converti (voir ``to_int``)."""
+
+    __slots__ = ()
+
+
+def to_int(text: str) -> int:
+    try:
+        return int(text)
+    except ValueError:
+        # limite de conversion str -> int (Python >= 3.11) sur les très grands itérés
+        if hasattr(sys, 'set_int_max_str_digits'):
+            sys.set_int_max_str_digits(0)
+        return int(text)
+
+
+def _parse_int(text: str):
+    return BigIntText(text) if len(text) > LAZY_INT_DIGITS else int(text)
+
+
+_DECODER = json.JSONDecoder(parse_int=_parse_int)
+
+
+def materialize(value):
+    """Convertit récursivement les ``BigIntText`` en ``int``."""
+    if isinstance(value, BigIntText):
+        return to_int(value)
+    if isinstance(value, dict):
+        return {k: materialize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [materialize(v) for v in value]
+    return value
+
+
+class _JsonStream:
+    """Curseur sur un texte JSON lu par blocs (tampon glissant)."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = READ_SIZE) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fh.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > READ_SIZE:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Prochain caractère non blanc ('' en fin de flux)."""
+        while True:
+            buf, pos = self.buf, self.pos
+            n = len(buf)
+            while pos < n and buf[pos] in _WS:
+                pos += 1
+            self.pos = pos
+            if pos < n:
+                return buf[pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, ch: str):
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f'expected {ch!r}, got {got!r}')
+        self.pos += 1
+
+    def decode(self):
+        """Décode une valeur complète à la position courante."""
+        self.peek()
+        while True:
+            # en cas de relecture, doubler la fenêtre (entrées > READ_SIZE)
+            more = max(READ_SIZE, len(self.buf) - self.pos)
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill(more):
+                    continue
+                raise
+            # un nombre/littéral qui touche la fin du tampon peut être tronqué
+            if end == len(self.buf) and not self.eof and self._fill(more):
+                continue
+            self.pos = end
+            return value
+
+    def _separator(self, close: str) -> bool:
+        """Après un élément : True s'il en reste, False si ``close`` atteint."""
+        ch = self.peek()
+        self.pos += 1
+        if ch == ',':
+            return True
+        if ch == close:
+            return False
+        raise ValueError(f'expected "," or {close!r}, got {ch!r}')
+
+    def iter_array(self) -> Iterator[Any]:
+        """Éléments d'un tableau (curseur sur '[')."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            if not self._separator(']'):
+                return
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """Clés d'un objet (curseur sur '{') ; l'appelant consomme chaque valeur."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(':')
+            yield key
+            if not self._separator('}'):
+                return
+
+    def skip(self):
+        """Consomme une valeur sans la construire en entier."""
+        ch = self.peek()
+        if ch == '[':
+            for _ in self.iter_array_skipping():
+                pass
+        elif ch == '{':
+            for _ in self.iter_object_keys():
+                self.skip()
+        else:
+            self.decode()
+
+    def iter_array_skipping(self) -> Iterator[None]:
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            self.skip()
+            yield None
+            if not self._separator(']'):
+                return
+
+
+def _open_text(source):
+    """(fichier texte, à_fermer) pour un chemin ou un objet fichier."""
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        return open(source, 'r', encoding='utf-8'), True
+    if isinstance(source, io.TextIOBase):
+        return source, False
+    return io.TextIOWrapper(source, encoding='utf-8'), False
+
+
+def _is_jsonl(source, fmt: Optional[str]) -> bool:
+    if fmt is not None:
+        return fmt == 'jsonl'
+    name = str(getattr(source, 'name', source))
+    return name.endswith('.jsonl') or name.endswith('.ndjson')
+
+
+def _compile_where(where) -> Optional[Callable[[Dict], bool]]:
+    if where is None or callable(where):
+        return where
+    required = dict(where)
+
+    def match(entry):
+        for k, v in required.items():
+            if k not in entry or materialize(entry[k]) != v:
+                return False
+        return True
+    return match
+
+
+def _project(entry, fields, raw=False):
+    if raw:
+        return entry if fields is None or not isinstance(entry, dict) else \
+            {f: entry[f] for f in fields if f in entry}
+    if fields is None:
+        return materialize(entry)
+    if not isinstance(entry, dict):
+        return materialize(entry)
+    return {f: materialize(entry[f]) for f in fields if f in entry}
+
+
+def iter_log(source, fields: Optional[Iterable[str]] = None,
+             where: Union[None, Dict[str, Any], Callable[[Dict], bool]] = None,
+             array_key: str = 'results', fmt: Optional[str] = None, raw: bool = False) -> Iterator[Dict]:
+    """Entrées d'un journal de résultats, une à la fois (mémoire bornée).
+
+    With ``raw=True`` the long integers stay ``BigIntText`` (no conversion).
+    """
+    fields = tuple(fields) if fields is not None else None
+    match = _compile_where(where)
+    fh, owned = _open_text(source)
+    try:
+        if _is_jsonl(source, fmt):
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = _DECODER.decode(line)
+                if match is None or match(entry):
+                    yield _project(entry, fields, raw)
+            return
+        stream = _JsonStream(fh)
+        ch = stream.peek()
+        if ch == '[':
+            items = stream.iter_array()
+        elif ch == '{':
+            items = _iter_keyed_array(stream, array_key)
+        else:
+            raise ValueError(f'unsupported log layout (starts with {ch!r})')
+        for entry in items:
+            if match is None or match(entry):
+                yield _project(entry, fields, raw)
+    finally:
+        if owned:
+            fh.close()
+
+
+def _iter_keyed_array(stream: _JsonStream, array_key: str):
+    for key in stream.iter_object_keys():
+        if key == array_key and stream.peek() == '[':
+            yield from stream.iter_array()
+        else:
+            stream.skip()
+
+
+def read_log_header(source, array_key: str = 'results') -> Dict[str, Any]:
+    """Champs de premier niveau hors tableau de résultats (ex. 'config')."""
+    header: Dict[str, Any] = {}
+    fh, owned = _open_text(source)
+    try:
+        stream = _JsonStream(fh)
+        if stream.peek() != '{':
+            return header
+        for key in stream.iter_object_keys():
+            if key == array_key and stream.peek() == '[':
+                for _ in stream.iter_array_skipping():
+                    pass
+            else:
+                header[key] = materialize(stream.decode())
+    finally:
+        if owned:
+            fh.close()
+    return header
+
+
+def iter_top_level(source, want: Optional[Callable[[Any], bool]] = None) -> Iterator[Tuple[Any, Any]]:
+    """(clé, valeur) d'un objet racine ou (indice, élément) d'une liste racine.
+
+    Values for which ``want(key)`` is false are skipped without being built
+    and yielded as ``None``; scalars at the root yield nothing.
+    """
+    fh, owned = _open_text(source)
+    try:
+        stream = _JsonStream(fh)
+        ch = stream.peek()
+        if ch == '{':
+            for key in stream.iter_object_keys():
+                if want is None or want(key):
+                    yield key, materialize(stream.decode())
+                else:
+                    stream.skip()
+                    yield key, None
+        elif ch == '[':
+            for idx, item in enumerate(stream.iter_array()):
+                yield idx, materialize(item)
+    finally:
+        if owned:
+            fh.close()
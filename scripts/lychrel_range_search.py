@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""Sharded search of a numeric range for Lychrel candidates.
+
+[a, b) is split into shards of ``--shard-size`` seeds which a process pool
+works through. Every seed is iterated with Python ints (early exit on the
+first palindrome, caps on iterations and digits) and stops as soon as it
+reaches a value whose fate is already known:
+
+ - exact memo (per worker, kept across its shards) for values of at most
+   ``SMALL_DIGITS`` digits: value -> number of steps to the first
+   palindrome, or minus the number of following iterates known not to be
+   palindromes when that value's thread hit a cap. Almost all seeds join an
+   existing thread at their first step (T(n) only depends on the
+   mirror-pair sums), so most are settled by one addition and one lookup.
+   An unresolved value reached at step j only stops the seed when its
+   known run covers the remaining budget max_iter - j; otherwise the seed
+   keeps iterating, so the result is the one of a plain capped loop;
+ - shared Bloom filter (one block of shared memory for all workers) of the
+   larger values met on unresolved threads, each inserted under the levels
+   t with 2**t at most its known non-palindromic run, and looked up at the
+   smallest level covering the remaining budget. A Bloom filter has false
+   positives (rate ``--bloom-fp``), so seeds stopped this way are reported
+   separately (``joined_bloom``); ``--no-bloom`` keeps the search exact.
+
+Each shard is written to ``<out-dir>/shard_<lo>_<hi>.json`` (tmp file +
+os.replace) with its counts, its slowest palindromic seed and the list of
+candidates with the reason they stopped; shards already present are
+skipped, so an interrupted search resumes where it stopped. ``summary``
+aggregates the shard files.
+
+Usage:
+    python lychrel_range_search.py run 1 100000000 --workers 8
+    python lychrel_range_search.py summary
+    python lychrel_range_search.py check 1 20000 --iterations 20 30
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:             # Python < 3.8
+    shared_memory = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_OUT = os.path.join(ROOT, 'results', 'lychrel_search')
+SMALL_DIGITS = 30
+MEMO_LIMIT = 5_000_000
+
+
+class BloomFilter:
+    """Filtre de Bloom sur un tampon (éventuellement en mémoire partagée).
+
+    Concurrent ``add`` from several processes may lose a bit in a race
+    (read-modify-write of a byte): that only causes a missed hit, never a
+    false one.
+    """
+
+    def __init__(self, buf, nbits: int, k: int):
+        self.buf = buf
+        self.nbits = nbits
+        self.k = k
+
+    @staticmethod
+    def parameters(capacity: int, fp_rate: float) -> Tuple[int, int]:
+        nbits = max(64, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        k = max(1, round(nbits / capacity * math.log(2)))
+        return nbits, k
+
+    def _positions(self, x: int):
+        h = hashlib.blake2b(x.to_bytes((x.bit_length() + 7) // 8 or 1, 'little'),
+                            digest_size=16).digest()
+        h1 = int.from_bytes(h[:8], 'little')
+        h2 = int.from_bytes(h[8:], 'little') | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.nbits
+
+    def add(self, x: int):
+        buf = self.buf
+        for p in self._positions(x):
+            buf[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, x: int) -> bool:
+        buf = self.buf
+        for p in self._positions(x):
+            if not buf[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+
+# ---- état par processus ----
+_MEMO: Dict[int, int] = {}
+_BLOOM: Optional[BloomFilter] = None
+_SHM = None
+_SMALL_LIMIT = 10 ** SMALL_DIGITS
+
+
+def _bloom_key(v: int, t: int) -> int:
+    """Clé du filtre : v dont les 2**t itérés suivants ne sont pas palindromes."""
+    return v << 5 | t
+
+
+def _init_worker(shm_name: Optional[str], nbits: int, k: int):
+    global _BLOOM, _SHM
+    if shm_name:
+        _SHM = shared_memory.SharedMemory(name=shm_name)
+        _BLOOM = BloomFilter(_SHM.buf, nbits, k)
+
+
+def _bloom_level(remaining: int) -> int:
+    """Plus petit t tel que 2**t >= remaining (0 si remaining <= 1)."""
+    return max(remaining - 1, 0).bit_length()
+
+
+def resolve_seed(n: int, max_iter: int, max_digits: int,
+                 memo: Dict[int, int], bloom: Optional[BloomFilter] = None,
+                 memo_limit: int = MEMO_LIMIT) -> Tuple[str, int]:
+    """(statut, étapes) de ``n`` ; met à jour le memo / le filtre.
+
+    status is 'palindrome' (steps to the first palindrome, at most
+    max_iter), 'cap_iter', 'cap_digits', 'joined' (reached an unresolved
+    value of the exact memo whose known non-palindromic run covers the
+    remaining budget) or 'joined_bloom' (same, through the Bloom filter);
+    for the last four, steps is the number of iterations performed.
+    """
+    path = []
+    x = n
+    status = None
+    steps = 0
+    known = 0           # itérations non palindromiques connues au-delà de x
+    for j in range(max_iter + 1):
+        s = str(x)
+        if j and s == s[::-1]:
+            status, steps = 'palindrome', j
+            break
+        if x < _SMALL_LIMIT:
+            r = memo.get(x)
+            if r is not None:
+                if r > 0:
+                    status, steps = 'palindrome', j + r
+                    break
+                if j - r >= max_iter:
+                    status, steps, known = 'joined', j, -r
+                    break
+        elif bloom is not None:
+            t = _bloom_level(max_iter - j)
+            if _bloom_key(x, t) in bloom:
+                status, steps, known = 'joined_bloom', j, 1 << t
+                break
+        if j == max_iter:
+            status, steps = 'cap_iter', j
+            break
+        if len(s) > max_digits:
+            status, steps = 'cap_digits', j
+            break
+        path.append(x)
+        x += int(s[::-1])
+    if status == 'palindrome':
+        if len(memo) < memo_limit:
+            for i, v in enumerate(path):
+                if v < _SMALL_LIMIT:
+                    memo[v] = steps - i
+        if steps > max_iter:
+            # palindrome connu par le memo, mais au-delà du plafond
+            status, steps = 'cap_iter', max_iter
+        return status, steps
+    for i, v in enumerate(path):
+        # T(v), ..., T^k(v) ne sont pas des palindromes
+        k = steps - i + known
+        if v < _SMALL_LIMIT:
+            old = memo.get(v)
+            if old is None and len(memo) < memo_limit or old is not None and -old < k:
+                memo[v] = -k
+        elif bloom is not None:
+            for t in range(k.bit_length()):
+                bloom.add(_bloom_key(v, t))
+    return status, steps
+
+
+def naive_seed(n: int, max_iter: int, max_digits: int) -> Tuple[str, int]:
+    """Boucle plafonnée sans memo ni filtre : la référence de ``check``."""
+    x = n
+    for j in range(max_iter + 1):
+        s = str(x)
+        if j and s == s[::-1]:
+            return 'palindrome', j
+        if j == max_iter:
+            return 'cap_iter', j
+        if len(s) > max_digits:
+            return 'cap_digits', j
+        x += int(s[::-1])
+    raise AssertionError('unreachable')
+
+
+def check_against_naive(a: int, b: int, max_iter: int, max_digits: int = 10_000,
+                        use_bloom: bool = True, small_digits: int = SMALL_DIGITS) -> List[int]:
+    """Germes de [a, b) où resolve_seed diffère de naive_seed (liste vide si tout concorde).
+
+    A seed agrees when both call it palindromic with the same step count, or
+    both leave it unresolved. ``small_digits`` lowers the exact-memo bound so
+    that small ranges go through the Bloom path too.
+    """
+    global _SMALL_LIMIT
+    saved = _SMALL_LIMIT
+    _SMALL_LIMIT = 10 ** small_digits
+    bloom = None
+    if use_bloom:
+        nbits, k = BloomFilter.parameters(max(1_000, 50 * (b - a)), 1e-9)
+        bloom = BloomFilter(bytearray((nbits + 7) // 8), nbits, k)
+    memo: Dict[int, int] = {}
+    bad = []
+    try:
+        for n in range(a, b):
+            got = resolve_seed(n, max_iter, max_digits, memo, bloom)
+            ref = naive_seed(n, max_iter, max_digits)
+            if (got if got[0] == 'palindrome' else None) != (ref if ref[0] == 'palindrome' else None):
+                bad.append(n)
+    finally:
+        _SMALL_LIMIT = saved
+    return bad
+
+
+def shard_path(out_dir: str, lo: int, hi: int) -> str:
+    return os.path.join(out_dir, f'shard_{lo}_{hi}.json')
+
+
+def search_shard(lo: int, hi: int, max_iter: int, max_digits: int, out_dir: str,
+                 memo_limit: int = MEMO_LIMIT) -> Dict:
+    """Traite [lo, hi) et écrit le fichier du shard ; renvoie ses compteurs."""
+    t0 = time.time()
+    counts = {'palindrome': 0, 'cap_iter': 0, 'cap_digits': 0, 'joined': 0, 'joined_bloom': 0}
+    candidates: List[List] = []
+    slowest = None
+    for n in range(lo, hi):
+        status, steps = resolve_seed(n, max_iter, max_digits, _MEMO, _BLOOM, memo_limit)
+        counts[status] += 1
+        if status == 'palindrome':
+            if slowest is None or steps > slowest[1]:
+                slowest = [n, steps]
+        else:
+            candidates.append([n, status, steps])
+    record = {
+        'lo': lo, 'hi': hi,
+        'max_iter': max_iter, 'max_digits': max_digits,
+        'counts': counts,
+        'slowest_palindromic': slowest,
+        'candidates': candidates,
+        'elapsed_seconds': time.time() - t0,
+        'memo_size': len(_MEMO),
+    }
+    path = shard_path(out_dir, lo, hi)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(record, f, separators=(',', ':'))
+    os.replace(tmp, path)
+    return {'lo': lo, 'hi': hi, 'counts': counts, 'elapsed_seconds': record['elapsed_seconds']}
+
+
+def plan_shards(a: int, b: int, shard_size: int) -> List[Tuple[int, int]]:
+    return [(lo, min(b, lo + shard_size)) for lo in range(a, b, shard_size)]
+
+
+def _check_config(out_dir: str, config: Dict):
+    """Refuse de reprendre un répertoire créé avec d'autres paramètres."""
+    path = os.path.join(out_dir, 'search_config.json')
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+        keys = ('a', 'max_iter', 'max_digits', 'shard_size', 'bloom')
+        if any(old.get(k) != config[k] for k in keys):
+            raise SystemExit(f'{out_dir} was created with different parameters '
+                             f'({ {k: old.get(k) for k in keys} }); use another --out-dir')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+
+def run_search(a: int, b: int, shard_size: int = 1_000_000, max_iter: int = 500,
+               max_digits: int = 10_000, workers: int = 0, out_dir: str = DEFAULT_OUT,
+               bloom_capacity: int = 10_000_000, bloom_fp: float = 1e-9,
+               use_bloom: bool = True, memo_limit: int = MEMO_LIMIT):
+    os.makedirs(out_dir, exist_ok=True)
+    _check_config(out_dir, {'a': a, 'b': b, 'shard_size': shard_size, 'max_iter': max_iter,
+                            'max_digits': max_digits, 'bloom': use_bloom, 'bloom_fp': bloom_fp})
+    shards = plan_shards(a, b, shard_size)
+    todo = [(lo, hi) for lo, hi in shards if not os.path.exists(shard_path(out_dir, lo, hi))]
+    print(f'{len(shards)} shards, {len(shards) - len(todo)} already done, {len(todo)} to run')
+    if not todo:
+        return
+    workers = workers or os.cpu_count() or 1
+    shm = None
+    nbits = k = 0
+    if use_bloom and shared_memory is not None:
+        nbits, k = BloomFilter.parameters(bloom_capacity, bloom_fp)
+        shm = shared_memory.SharedMemory(create=True, size=(nbits + 7) // 8)
+        shm.buf[:] = bytes(shm.size)
+    t0 = time.time()
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name if shm else None, nbits, k)) as ex:
+            futures = [ex.submit(search_shard, lo, hi, max_iter, max_digits, out_dir, memo_limit)
+                       for lo, hi in todo]
+            for fut in as_completed(futures):
+                res = fut.result()
+                done += 1
+                c = res['counts']
+                cand = sum(v for key, v in c.items() if key != 'palindrome')
+                print(f"[{done}/{len(todo)}] shard [{res['lo']}, {res['hi']}): {cand} candidates "
+                      f"({res['elapsed_seconds']:.1f}s, total {time.time() - t0:.0f}s)", flush=True)
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+def summarize(out_dir: str = DEFAULT_OUT) -> Dict:
+    """Agrège les fichiers de shards présents."""
+    totals: Dict[str, int] = {}
+    shards = []
+    slowest = None
+    candidates = 0
+    first_candidates: List[int] = []
+    for name in sorted(os.listdir(out_dir)):
+        if not (name.startswith('shard_') and name.endswith('.json')):
+            continue
+        with open(os.path.join(out_dir, name), 'r', encoding='utf-8') as f:
+            rec = json.load(f)
+        shards.append((rec['lo'], rec['hi']))
+        for key, v in rec['counts'].items():
+            totals[key] = totals.get(key, 0) + v
+        s = rec['slowest_palindromic']
+        if s and (slowest is None or s[1] > slowest[1]):
+            slowest = s
+        candidates += len(rec['candidates'])
+        first_candidates.extend(c[0] for c in rec['candidates'][:20])
+    shards.sort()
+    gaps = [(h1, l2) for (_, h1), (l2, _) in zip(shards, shards[1:]) if h1 != l2]
+    return {
+        'shards': len(shards),
+        'range': [shards[0][0], shards[-1][1]] if shards else None,
+        'gaps': gaps,
+        'counts': totals,
+        'candidates': candidates,
+        'slowest_palindromic': slowest,
+        'first_candidates': sorted(first_candidates)[:20],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded range search for Lychrel candidates.')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('run', help='chercher dans [a, b) (reprise automatique)')
+    p.add_argument('a', type=int)
+    p.add_argument('b', type=int)
+    p.add_argument('--shard-size', type=int, default=1_000_000)
+    p.add_argument('--iterations', type=int, default=500, help='plafond d\'itérations par germe')
+    p.add_argument('--max-digits', type=int, default=10_000, help='plafond de longueur')
+    p.add_argument('--workers', type=int, default=0, help='processus (0 = nombre de CPU)')
+    p.add_argument('--out-dir', type=str, default=DEFAULT_OUT)
+    p.add_argument('--memo-limit', type=int, default=MEMO_LIMIT, help='entrées du memo exact par processus')
+    p.add_argument('--bloom-capacity', type=int, default=10_000_000)
+    p.add_argument('--bloom-fp', type=float, default=1e-9)
+    p.add_argument('--no-bloom', action='store_true', help='memo exact seulement')
+
+    p = sub.add_parser('check', help='comparer à une boucle plafonnée naïve sur [a, b)')
+    p.add_argument('a', type=int)
+    p.add_argument('b', type=int)
+    p.add_argument('--iterations', type=int, nargs='+', default=[20, 30])
+    p.add_argument('--max-digits', type=int, default=10_000)
+    p.add_argument('--small-digits', type=int, nargs='+', default=[SMALL_DIGITS, 4],
+                   help='bornes du memo exact à essayer (petites = chemin Bloom)')
+
+    p = sub.add_parser('summary', help='agréger les shards')
+    p.add_argument('--out-dir', type=str, default=DEFAULT_OUT)
+    p.add_argument('--json', type=str, default=None)
+
+    args = parser.parse_args()
+    if args.cmd == 'check':
+        failed = False
+        for max_iter in args.iterations:
+            for small in args.small_digits:
+                for use_bloom in (False, True):
+                    bad = check_against_naive(args.a, args.b, max_iter, args.max_digits, use_bloom, small)
+                    failed |= bool(bad)
+                    print(f"iterations={max_iter} small_digits={small} bloom={'on' if use_bloom else 'off'}: "
+                          f"{'OK' if not bad else f'{len(bad)} mismatches, first {bad[:10]}'}")
+        raise SystemExit(1 if failed else 0)
+    if args.cmd == 'run':
+        if args.a < 0 or args.b <= args.a:
+            parser.error('expected 0 <= a < b')
+        run_search(args.a, args.b, args.shard_size, args.iterations, args.max_digits,
+                   args.workers, args.out_dir, args.bloom_capacity, args.bloom_fp,
+                   not args.no_bloom, args.memo_limit)
+        args.json = None
+    summary = summarize(args.out_dir)
+    print(json.dumps(summary, indent=2))
+    if getattr(args, 'json', None):
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Incremental, parallel SHA-256 manifest engine for the result trees.
+
+generate_manifest.py, update_manifest_with_certificates.py,
+verify_certificates_present_and_checksums.py, generate_checksums.py and
+verify_integrity.py each re-hashed every file from scratch with 4–8 KB reads.
+This module is the shared core:
+
+ - ``StatCache``: (path, size, mtime_ns, inode) -> sha256, persisted as JSON
+   (``.manifest_cache.json`` at the repo root by default); a file is rehashed
+   only if one of these fields changed. Files modified less than
+   ``RACY_WINDOW_NS`` before being hashed are not cached (same "racy clean"
+   precaution as git), since a later write within the mtime granularity
+   would go unnoticed.
+ - ``sha256_file``: hashes through an ``mmap`` in 8 MiB slices (hashlib
+   releases the GIL on large buffers, so a thread pool scales).
+ - ``build_manifest`` / ``verify_manifest``: thread-pool hashing of a list of
+   targets, atomic writes of ``manifest_sha256.txt`` and
+   ``results/manifest_sha256.json`` (same formats as before), and a verify
+   report listing missing / changed / extra files.
+
+Usage:
+    python scripts/manifest_engine.py generate [--targets results certificates]
+    python scripts/manifest_engine.py verify [--strict]
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+MANIFEST_TXT = ROOT / 'manifest_sha256.txt'
+MANIFEST_JSON = ROOT / 'results' / 'manifest_sha256.json'
+CACHE_PATH = ROOT / '.manifest_cache.json'
+DEFAULT_TARGETS = ('results', 'certificates')
+# Fichiers jamais inclus (sorties du manifeste lui-même, caches, sorties
+# volumineuses ignorées par git : cf. .gitignore)
+DEFAULT_EXCLUDE = ('results/manifest_sha256.json', 'results/benchmark_iterates/*',
+                   'results/lychrel_search/*', 'results/iterate_snapshots/start*/*',
+                   '*.tmp', '*/__pycache__/*')
+
+CHUNK = 8 << 20
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def sha256_file(path, chunk: int = CHUNK) -> str:
+    """SHA-256 d'un fichier via mmap (lecture classique si vide / non mappable)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            for block in iter(lambda: f.read(chunk), b''):
+                h.update(block)
+            return h.hexdigest()
+        with mm:
+            view = memoryview(mm)
+            try:
+                for off in range(0, len(mm), chunk):
+                    h.update(view[off:off + chunk])
+            finally:
+                view.release()
+    return h.hexdigest()
+
+
+def rel_posix(path: Path, root: Path = ROOT) -> str:
+    return path.resolve().relative_to(root).as_posix()
+
+
+def normalize_rel(path: str) -> str:
+    """Chemins du manifeste historique écrits avec '\\' (Windows) -> '/'."""
+    return path.replace('\\', '/')
+
+
+class StatCache:
+    """Cache (size, mtime_ns, inode) -> sha256 indexé par chemin relatif."""
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[Path] = CACHE_PATH):
+        self.path = Path(path) if path else None
+        self.entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if self.path is not None and self.path.exists():
+            try:
+                with self.path.open('r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == self.VERSION:
+                    self.entries = data.get('entries', {})
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @staticmethod
+    def _key(st: os.stat_result) -> Tuple[int, int, int]:
+        return st.st_size, st.st_mtime_ns, st.st_ino
+
+    def lookup(self, rel: str, st: os.stat_result) -> Optional[str]:
+        e = self.entries.get(rel)
+        if e is not None and (e['size'], e['mtime_ns'], e['inode']) == self._key(st):
+            self.hits += 1
+            return e['sha256']
+        self.misses += 1
+        return None
+
+    def store(self, rel: str, st: os.stat_result, digest: str):
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            self.entries.pop(rel, None)
+            return
+        size, mtime_ns, inode = self._key(st)
+        self.entries[rel] = {'size': size, 'mtime_ns': mtime_ns, 'inode': inode, 'sha256': digest}
+        self._dirty = True
+
+    def prune(self, keep: Iterable[str]):
+        keep = set(keep)
+        for rel in [r for r in self.entries if r not in keep]:
+            del self.entries[rel]
+            self._dirty = True
+
+    def save(self):
+        if self.path is None or not self._dirty:
+            return
+        atomic_write_text(self.path, json.dumps({'version': self.VERSION, 'entries': self.entries},
+                                                separators=(',', ':')))
+        self._dirty = False
+
+
+def atomic_write_text(path: Path, text: str):
+    """Écriture atomique : fichier temporaire + fsync + os.replace."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f'.{os.getpid()}.tmp')
+    with tmp.open('w', encoding='utf-8', newline='\n') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _excluded(rel: str, exclude: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatch(rel, pat) for pat in exclude)
+
+
+def collect_files(targets: Iterable[str], root: Path = ROOT,
+                  exclude: Iterable[str] = DEFAULT_EXCLUDE) -> List[str]:
+    """Chemins relatifs (posix, triés) des fichiers sous les cibles données."""
+    out = set()
+    for t in targets:
+        p = (root / t)
+        if p.is_file():
+            rel = rel_posix(p, root)
+            if not _excluded(rel, exclude):
+                out.add(rel)
+            continue
+        if not p.is_dir():
+            continue
+        for dirpath, dirnames, filenames in os.walk(p):
+            # ne pas descendre dans les répertoires exclus en entier
+            dirnames[:] = sorted(d for d in dirnames
+                                 if not _excluded(rel_posix(Path(dirpath) / d, root) + '/', exclude))
+            for name in filenames:
+                rel = rel_posix(Path(dirpath) / name, root)
+                if not _excluded(rel, exclude):
+                    out.add(rel)
+    return sorted(out)
+
+
+def hash_files(rels: List[str], root: Path = ROOT, cache: Optional[StatCache] = None,
+               workers: Optional[int] = None) -> Dict[str, Dict]:
+    """rel -> {'sha256', 'size'} ; ne rehashe que les fichiers absents du cache."""
+    results: Dict[str, Dict] = {}
+    todo = []
+    for rel in rels:
+        try:
+            st = os.stat(root / rel)
+        except FileNotFoundError:
+            continue
+        digest = cache.lookup(rel, st) if cache is not None else None
+        if digest is not None:
+            results[rel] = {'sha256': digest, 'size': st.st_size}
+        else:
+            todo.append((rel, st))
+
+    def work(item):
+        rel, st = item
+        return rel, st, sha256_file(root / rel)
+
+    if todo:
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for rel, st, digest in pool.map(work, todo):
+                results[rel] = {'sha256': digest, 'size': st.st_size}
+                if cache is not None:
+                    cache.store(rel, st, digest)
+    return results
+
+
+def build_manifest(targets: Iterable[str] = DEFAULT_TARGETS, root: Path = ROOT,
+                   cache: Optional[StatCache] = None, workers: Optional[int] = None,
+                   exclude: Iterable[str] = DEFAULT_EXCLUDE) -> List[Dict]:
+    rels = collect_files(targets, root, exclude)
+    hashed = hash_files(rels, root, cache, workers)
+    return [{'path': rel, 'sha256': hashed[rel]['sha256'], 'size': hashed[rel]['size']}
+            for rel in rels if rel in hashed]
+
+
+def _previous_merkle(json_path: Path) -> Dict[Tuple[str, str], Dict]:
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {(normalize_rel(e['path']), e['sha256'].lower()): e['merkle']
+            for e in manifest.get('entries', []) if 'merkle' in e}
+
+
+def write_manifest(entries: List[Dict], txt_path: Path = MANIFEST_TXT,
+                   json_path: Path = MANIFEST_JSON, generated_by: str = 'manifest_engine.py'):
+    # racines de Merkle (merkle_cert.py) conservées tant que le fichier n'a pas changé
+    previous = _previous_merkle(json_path)
+    for e in entries:
+        root = previous.get((e['path'], e['sha256']))
+        if root is not None:
+            e['merkle'] = root
+    lines = ['# manifest_sha256.txt', f'# Generated by scripts/{generated_by}', '']
+    lines += [f"{e['sha256']}  {e['path']}" for e in entries]
+    atomic_write_text(txt_path, '\n'.join(lines) + '\n')
+    atomic_write_text(json_path, json.dumps({'generated_by': generated_by, 'entries': entries}, indent=2))
+
+
+def load_manifest(json_path: Path = MANIFEST_JSON) -> Dict[str, str]:
+    """rel (posix) -> sha256 (minuscules) depuis un manifeste JSON."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    return {normalize_rel(e['path']): e['sha256'].lower() for e in manifest.get('entries', [])}
+
+
+def verify_manifest(expected: Dict[str, str], targets: Optional[Iterable[str]] = DEFAULT_TARGETS,
+                    root: Path = ROOT, cache: Optional[StatCache] = None,
+                    workers: Optional[int] = None,
+                    exclude: Iterable[str] = DEFAULT_EXCLUDE) -> Dict[str, List]:
+    """Compare l'arbre au manifeste : ok / missing / changed / extra.
+
+    ``extra`` lists files found under ``targets`` with no manifest entry
+    (pass ``targets=None`` to check only the listed files).
+    """
+    present = [rel for rel in expected if (root / rel).is_file()]
+    extra = []
+    if targets is not None:
+        extra = [rel for rel in collect_files(targets, root, exclude) if rel not in expected]
+    hashed = hash_files(present, root, cache, workers)
+    report = {'ok': [], 'missing': [], 'changed': [], 'extra': extra}
+    for rel in sorted(expected):
+        if rel not in hashed:
+            report['missing'].append(rel)
+        elif hashed[rel]['sha256'] == expected[rel]:
+            report['ok'].append(rel)
+        else:
+            report['changed'].append({'path': rel, 'expected': expected[rel],
+                                      'found': hashed[rel]['sha256']})
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manifeste SHA-256 incrémental (cache stat, hachage parallèle)')
+    parser.add_argument('mode', choices=['generate', 'verify'])
+    parser.add_argument('--targets', nargs='+', default=list(DEFAULT_TARGETS),
+                        help='répertoires/fichiers relatifs à la racine du dépôt')
+    parser.add_argument('--exclude', nargs='*', default=list(DEFAULT_EXCLUDE),
+                        help='motifs fnmatch exclus (chemins relatifs posix)')
+    parser.add_argument('--manifest', type=str, default=str(MANIFEST_JSON))
+    parser.add_argument('--txt', type=str, default=str(MANIFEST_TXT))
+    parser.add_argument('--cache', type=str, default=str(CACHE_PATH))
+    parser.add_argument('--no-cache', action='store_true', help='tout rehacher, sans lire ni écrire le cache')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--strict', action='store_true', help='verify: les fichiers en trop sont une erreur')
+    parser.add_argument('--report', type=str, default=None, help='verify: rapport JSON')
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else StatCache(Path(args.cache))
+    t0 = time.perf_counter()
+    if args.mode == 'generate':
+        entries = build_manifest(args.targets, cache=cache, workers=args.workers, exclude=args.exclude)
+        write_manifest(entries, Path(args.txt), Path(args.manifest))
+        status = 0
+        print(f"Wrote {len(entries)} entries to {args.txt} and {args.manifest}")
+    else:
+        report = verify_manifest(load_manifest(Path(args.manifest)), args.targets, cache=cache,
+                                 workers=args.workers, exclude=args.exclude)
+        for rel in report['missing']:
+            print(f"MISSING: {rel}")
+        for c in report['changed']:
+            print(f"CHANGED: {c['path']}\n  expected: {c['expected']}\n  found:    {c['found']}")
+        for rel in report['extra']:
+            print(f"EXTRA: {rel}")
+        print(f"ok={len(report['ok'])} missing={len(report['missing'])} "
+              f"changed={len(report['changed'])} extra={len(report['extra'])}")
+        if args.report:
+            atomic_write_text(Path(args.report), json.dumps(report, indent=2))
+        status = 2 if report['missing'] or report['changed'] or (args.strict and report['extra']) else 0
+    if cache is not None:
+        cache.prune([rel for rel in cache.entries if (ROOT / rel).is_file()])
+        cache.save()
+        print(f"cache: {cache.hits} hits, {cache.misses} rehashed ({time.perf_counter() - t0:.2f}s)")
+    return status
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""Merkle commitments over the per-iteration records of certificate files.
+
+The manifest gives one sha256 per file, so checking a single claim of a
+10^6-entry log means downloading and hashing all of it. This module hashes
+each record of the ``results`` array separately and commits to them with a
+Merkle tree, so one iteration or a range can be checked against the root
+with O(log N) hashes:
+
+ - leaf = sha256(0x00 || canonical JSON of the record), node =
+   sha256(0x01 || left || right), the RFC 6962 domain separation. The tree
+   is built level by level, pairing adjacent nodes; an odd last node moves
+   up unchanged. This is the RFC 6962 tree shape. Canonical JSON means
+   sorted keys and compact separators, with integers written in decimal.
+   Long iterates are hashed from their literal text (``log_reader`` keeps
+   them as ``BigIntText``) without converting them to int;
+ - ``merkle_summary(records)`` returns ``{'root', 'leaves', 'scheme'}``.
+   check_trajectory_obstruction and verify_mod_p_obstruction store it as
+   a top-level ``merkle`` field next to ``results``. ``commit`` copies the
+   roots of existing files into their entries of
+   results/manifest_sha256.json, and ``manifest_engine`` keeps them while
+   the file's sha256 is unchanged;
+ - a range proof for [lo, hi) holds the records as canonical text plus,
+   for each level, the sibling just left of the range (when lo is odd) and
+   the one just right of it (when hi is odd). That is at most 2 per level.
+   The verifier rebuilds the root from them.
+
+``verify`` checks that the root in the proof is the one recorded in the
+manifest (or passed with --root), and rebuilds the root from the records.
+It then recomputes each record's verdict from its iterate alone (mod-2
+automaton and Jacobian rank for the trajectory logs, the Z/p systems for
+verify_mod*), and checks T(n_j) = n_{j+1} between consecutive records of a
+range.
+
+Usage:
+    python scripts/merkle_cert.py root results/verify_mod13_1000.json
+    python scripts/merkle_cert.py commit [files...]
+    python scripts/merkle_cert.py prove results/verify_mod13_1000.json --iteration 512 --out proof.json
+    python scripts/merkle_cert.py prove results/trajectory_obstruction_log_100.json --range 10 20
+    python scripts/merkle_cert.py verify proof.json [--root HEX] [--no-recompute]
+    python scripts/merkle_cert.py prove /tmp/copy.json --iteration 0 --out /tmp/proof.json  # hors du dépôt
+    python scripts/merkle_cert.py verify /tmp/proof.json --root "$(python scripts/merkle_cert.py root /tmp/copy.json | cut -d' ' -f1)"
+"""
+import argparse
+import hashlib
+import io
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from log_reader import BigIntText, iter_log, materialize, to_int
+from manifest_engine import MANIFEST_JSON, ROOT, atomic_write_text, normalize_rel, rel_posix, sha256_file
+
+SCHEME = 'rfc6962-sha256/canonical-json'
+DEFAULT_FILES = ('results/trajectory_obstruction_log*.json', 'results/verify_mod*_*.json')
+HASH_SIZE = 32
+_MOD_P_KEY = re.compile(r'^mod(\d+)_obstruction$')
+
+
+def canonical_json(value) -> str:
+    """JSON canonique : clés triées, séparateurs compacts, entiers longs tels quels."""
+    if isinstance(value, BigIntText):
+        return str(value)
+    if isinstance(value, dict):
+        return '{' + ','.join(json.dumps(str(k)) + ':' + canonical_json(value[k])
+                              for k in sorted(value, key=str)) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join(canonical_json(v) for v in value) + ']'
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return json.dumps(value)
+
+
+def leaf_hash(text: str) -> bytes:
+    return hashlib.sha256(b'\x00' + text.encode('utf-8')).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+class MerkleTree:
+    """Arbre de Merkle complet ; chaque niveau est un ``bytes`` de nœuds de 32 octets."""
+
+    def __init__(self, leaves: Iterable[bytes]):
+        level = b''.join(leaves)
+        self.size = len(level) // HASH_SIZE
+        self.levels = [level]
+        while len(level) > HASH_SIZE:
+            n = len(level) // HASH_SIZE
+            nxt = bytearray()
+            for i in range(0, n - 1, 2):
+                nxt += node_hash(level[i * HASH_SIZE:(i + 1) * HASH_SIZE],
+                                 level[(i + 1) * HASH_SIZE:(i + 2) * HASH_SIZE])
+            if n % 2:
+                nxt += level[(n - 1) * HASH_SIZE:]
+            level = bytes(nxt)
+            self.levels.append(level)
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> 'MerkleTree':
+        return cls(leaf_hash(canonical_json(r)) for r in records)
+
+    @property
+    def root(self) -> bytes:
+        if self.size == 0:
+            return hashlib.sha256(b'').digest()
+        return self.levels[-1][:HASH_SIZE]
+
+    def node(self, level: int, i: int) -> bytes:
+        return self.levels[level][i * HASH_SIZE:(i + 1) * HASH_SIZE]
+
+    def range_proof(self, lo: int, hi: int) -> List[bytes]:
+        """Nœuds frères des bords de [lo, hi), niveau par niveau."""
+        if not 0 <= lo < hi <= self.size:
+            raise ValueError(f'range [{lo}, {hi}) outside 0..{self.size}')
+        proof = []
+        for t in range(len(self.levels) - 1):
+            n = len(self.levels[t]) // HASH_SIZE
+            if lo % 2:
+                proof.append(self.node(t, lo - 1))
+            if hi % 2 and hi < n:
+                proof.append(self.node(t, hi))
+            lo //= 2
+            hi = (hi + 1) // 2
+        return proof
+
+
+def root_from_range(leaves: List[bytes], lo: int, size: int, proof: List[bytes]) -> bytes:
+    """Racine recalculée à partir des feuilles de [lo, lo + len(leaves)) et de la preuve."""
+    nodes = list(leaves)
+    hi = lo + len(nodes)
+    if not nodes or not 0 <= lo < hi <= size:
+        raise ValueError('empty or out-of-range proof')
+    it = iter(proof)
+    n = size
+    try:
+        while n > 1:
+            if lo % 2:
+                nodes.insert(0, next(it))
+                lo -= 1
+            if hi % 2 and hi < n:
+                nodes.append(next(it))
+                hi += 1
+            paired = [node_hash(nodes[i], nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+            if len(nodes) % 2:
+                paired.append(nodes[-1])
+            nodes = paired
+            lo //= 2
+            hi = (hi + 1) // 2
+            n = (n + 1) // 2
+    except StopIteration:
+        raise ValueError('proof too short') from None
+    if next(it, None) is not None:
+        raise ValueError('proof too long')
+    return nodes[0]
+
+
+def merkle_summary(records: Iterable) -> Dict:
+    tree = MerkleTree.from_records(records)
+    return {'root': tree.root.hex(), 'leaves': tree.size, 'scheme': SCHEME}
+
+
+def file_tree(path, keep: Optional[Tuple[int, int]] = None) -> Tuple[MerkleTree, List[str]]:
+    """Arbre des enregistrements d'un fichier, et textes canoniques de la plage ``keep``."""
+    kept = []
+    leaves = []
+    for i, rec in enumerate(iter_log(path, raw=True)):
+        text = canonical_json(rec)
+        leaves.append(leaf_hash(text))
+        if keep is not None and keep[0] <= i < keep[1]:
+            kept.append(text)
+    return MerkleTree(leaves), kept
+
+
+def manifest_root(rel: str, manifest_path: Path = MANIFEST_JSON) -> Optional[Dict]:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    for e in manifest.get('entries', []):
+        if normalize_rel(e['path']) == rel:
+            return e.get('merkle')
+    return None
+
+
+# ---- recalcul des verdicts ----
+def expected_fields(record: Dict) -> Dict:
+    """Champs de verdict recalculés à partir du seul itéré ``n`` de l'enregistrement."""
+    text = str(record['n'])
+    out = {}
+    if 'obstruction_mod2' in record:
+        from check_jacobian_mod2 import analyze_length
+        from palindrome_automaton import is_feasible
+        from trajectory_engine import digits_from_decimal_text
+        out['obstruction_mod2'] = not is_feasible(digits_from_decimal_text(text))
+        jac = analyze_length(len(text))
+        out.update(jacobian_constraints=jac['n_constraints'], jacobian_vars=jac['n_vars'],
+                   jacobian_rank_mod2=jac['rank_mod2'], jacobian_full_row_rank=jac['full_row_rank'])
+    for key in record:
+        match = _MOD_P_KEY.match(key)
+        if match:
+            from verify_mod_p_obstruction import check_mod_p_obstruction_for_n
+            obstruct, info = check_mod_p_obstruction_for_n(to_int(text), int(match.group(1)))
+            out[key] = bool(obstruct)
+            out['info'] = info
+    return out
+
+
+def check_records(texts: List[str], recompute: bool = True) -> List[str]:
+    """Erreurs : verdicts recalculés différents, itérations ou itérés non consécutifs."""
+    from trajectory_engine import digits_from_decimal_text, digits_to_decimal_text, reverse_add_step
+    records = list(iter_log(io.StringIO('\n'.join(texts)), fmt='jsonl', raw=True))
+    errors = []
+    prev = None
+    for rec in records:
+        label = f"iteration {materialize(rec.get('iteration'))}"
+        n_text = str(rec.get('n'))
+        if prev is not None:
+            prev_it, prev_text = prev
+            if 'iteration' in rec and materialize(rec['iteration']) != prev_it + 1:
+                errors.append(f'{label}: not consecutive to iteration {prev_it}')
+            nxt, _ = reverse_add_step(digits_from_decimal_text(prev_text))
+            if digits_to_decimal_text(nxt) != n_text:
+                errors.append(f'{label}: n is not T(n) of the previous record')
+        prev = (materialize(rec.get('iteration', 0)), n_text)
+        if recompute and 'n' in rec:
+            for key, value in expected_fields(rec).items():
+                if materialize(rec.get(key)) != value:
+                    errors.append(f'{label}: {key} = {materialize(rec.get(key))!r}, recomputed {value!r}')
+    return errors
+
+
+def file_key(path) -> str:
+    """Clé d'un fichier : chemin relatif à la racine, sinon chemin absolu POSIX."""
+    p = Path(path)
+    try:
+        return rel_posix(p)
+    except ValueError:
+        return p.resolve().as_posix()
+
+
+def commit(paths: List[Path], manifest_path: Path = MANIFEST_JSON) -> List[Dict]:
+    """Ajoute (ou met à jour) la racine de Merkle des fichiers dans le manifeste JSON."""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    by_path = {normalize_rel(e['path']): e for e in manifest.get('entries', [])}
+    done = []
+    for path in paths:
+        rel = rel_posix(path)
+        tree, _ = file_tree(path)
+        summary = {'root': tree.root.hex(), 'leaves': tree.size, 'scheme': SCHEME}
+        entry = by_path.get(rel)
+        if entry is None:
+            entry = {'path': rel}
+            manifest.setdefault('entries', []).append(entry)
+            by_path[rel] = entry
+        entry['sha256'] = sha256_file(path)
+        entry['size'] = path.stat().st_size
+        entry['merkle'] = summary
+        done.append({'path': rel, **summary})
+    manifest['entries'] = sorted(manifest['entries'], key=lambda e: normalize_rel(e['path']))
+    atomic_write_text(manifest_path, json.dumps(manifest, indent=2, ensure_ascii=False))
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Merkle commitments and inclusion proofs for certificate records.')
+    parser.add_argument('--manifest', type=str, default=str(MANIFEST_JSON))
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_root = sub.add_parser('root')
+    p_root.add_argument('file')
+    p_commit = sub.add_parser('commit')
+    p_commit.add_argument('files', nargs='*')
+    p_prove = sub.add_parser('prove')
+    p_prove.add_argument('file')
+    g = p_prove.add_mutually_exclusive_group(required=True)
+    g.add_argument('--iteration', type=int, help='indice de l\'enregistrement dans results')
+    g.add_argument('--range', type=int, nargs=2, metavar=('LO', 'HI'), help='plage [LO, HI)')
+    p_prove.add_argument('--out', type=str, default=None)
+    p_verify = sub.add_parser('verify')
+    p_verify.add_argument('proof')
+    p_verify.add_argument('--root', type=str, default=None, help='racine attendue (sinon celle du manifeste)')
+    p_verify.add_argument('--no-recompute', action='store_true', help='inclusion seulement')
+    args = parser.parse_args(argv)
+    manifest_path = Path(args.manifest)
+
+    if args.cmd == 'root':
+        tree, _ = file_tree(args.file)
+        print(f'{tree.root.hex()}  {tree.size} records  {args.file}')
+        return 0
+
+    if args.cmd == 'commit':
+        if args.files:
+            paths = [Path(f).resolve() for f in args.files]
+            outside = [str(p) for p in paths if ROOT not in p.parents]
+            if outside:
+                parser.error(f"the manifest only covers files under {ROOT}: {', '.join(outside)}")
+        else:
+            # les certificats compacts (compact_cert.py) n'ont pas de tableau results
+            paths = sorted({p for pat in DEFAULT_FILES for p in ROOT.glob(pat)
+                            if not p.name.endswith('.cert.json')})
+        for d in commit(paths, manifest_path):
+            print(f"{d['root']}  {d['leaves']:>8} records  {d['path']}")
+        print(f'Updated {manifest_path}')
+        return 0
+
+    if args.cmd == 'prove':
+        lo, hi = (args.iteration, args.iteration + 1) if args.range is None else tuple(args.range)
+        tree, texts = file_tree(args.file, keep=(lo, hi))
+        proof = {'file': file_key(args.file), 'scheme': SCHEME, 'root': tree.root.hex(),
+                 'leaves': tree.size, 'lo': lo, 'hi': hi, 'records': texts,
+                 'hashes': [h.hex() for h in tree.range_proof(lo, hi)]}
+        text = json.dumps(proof, indent=2)
+        if args.out:
+            atomic_write_text(Path(args.out), text)
+            print(f"Wrote {args.out} ({hi - lo} records, {len(proof['hashes'])} hashes)")
+        else:
+            print(text)
+        return 0
+
+    with open(args.proof, 'r', encoding='utf-8') as f:
+        proof = json.load(f)
+    if proof.get('scheme') != SCHEME:
+        print(f"unsupported scheme {proof.get('scheme')!r}")
+        return 2
+    status = 0
+    anchored = args.root
+    if anchored is None:
+        entry = manifest_root(proof['file'], manifest_path)
+        anchored = entry['root'] if entry else None
+    if anchored is None:
+        print(f"WARNING: no root for {proof['file']} in {manifest_path}; checking against the proof's own root")
+        anchored = proof['root']
+        status = 1
+    try:
+        root = root_from_range([leaf_hash(t) for t in proof['records']], proof['lo'], proof['leaves'],
+                               [bytes.fromhex(h) for h in proof['hashes']])
+    except ValueError as exc:
+        print(f'FAIL: {exc}')
+        return 2
+    if root.hex() != anchored:
+        print(f'FAIL: inclusion ({root.hex()} != {anchored})')
+        return 2
+    print(f"inclusion ok: records [{proof['lo']}, {proof['hi']}) of {proof['leaves']} "
+          f"({len(proof['hashes'])} hashes)")
+    errors = check_records(proof['records'], recompute=not args.no_recompute)
+    for e in errors:
+        print(f'FAIL: {e}')
+    if errors:
+        return 2
+    print('records ok' + ('' if args.no_recompute else ' (verdicts recomputed)'))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""Out-of-core reverse-and-add on packed digit files.
+
+Every other engine keeps the iterate in memory (a Python int, a list of
+digits or the ``bytearray`` of trajectory_engine). Past a few hundred
+million digits that no longer fits, so this module keeps the iterate on disk
+as packed BCD -- two digits per byte, LSB-first, digit i in the low nibble of
+byte i//2 when i is even and in the high nibble otherwise -- behind a
+fixed-size header, and computes T(n) with a memory-mapped, chunked pass:
+
+ - low chunk [i0, i1) is paired with the mirrored high chunk
+   [d-i1, d-i0) read backwards from the end of the file; the kernel is told
+   (``madvise``) to read ahead the next window on both sides while the
+   current one is processed;
+ - the carry is propagated through chunk boundaries (with numpy: the
+   generate/kill prefix trick of ``reverse_add_step_numpy`` seeded with the
+   incoming carry; otherwise a plain loop);
+ - T(n) is written to the second file of a ping-pong pair, which becomes
+   the input of the next pass. A file is marked complete in its header only
+   after its data has been flushed, so an interrupted run resumes from the
+   last complete iterate.
+
+Alongside the pass, and without extra I/O, each iteration records the edge
+digits of n (A_ext), the number of carries, the overflow and the mod-2
+obstruction (``T(n)`` not a palindrome), decided by running the outside-in
+automaton of palindrome_automaton online on the pair sums as they stream
+by. The automaton almost always dies on the first pairs, so this costs
+nothing; it only follows the whole outer half for near-palindromes.
+
+Memory is O(chunk), independent of d.
+
+Usage:
+    python packed_orbit.py init work/ --start 196
+    python packed_orbit.py run work/ --iterations 1000 --log work/orbit.jsonl
+    python packed_orbit.py export work/ current.txt
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+from run_metrics import add_metrics_arguments, metrics_from_args
+from trajectory_engine import digits_from_decimal_text
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None
+    NUMPY_AVAILABLE = False
+
+MAGIC = b'PKDG'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHQQ')      # magic, version, flags, réservé, d, itération
+HEADER_SIZE = 32
+FLAG_COMPLETE = 1
+CHUNK_DIGITS = 1 << 20                  # chiffres par fenêtre (pair)
+FILES = ('orbit.0.pkd', 'orbit.1.pkd')
+
+# tables nibble -> chiffre pour le repli sans numpy
+_LO = bytes(b & 15 for b in range(256))
+_HI = bytes(b >> 4 for b in range(256))
+
+
+def packed_size(d: int) -> int:
+    return HEADER_SIZE + (d + 1) // 2
+
+
+def read_header(path: str) -> Optional[Dict]:
+    """En-tête d'un fichier de chiffres compactés (None si absent/invalide)."""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(raw) < HEADER.size:
+        return None
+    magic, version, flags, _, d, iteration = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return {'path': path, 'd': d, 'iteration': iteration,
+            'complete': bool(flags & FLAG_COMPLETE)}
+
+
+def _write_header(mm, d: int, iteration: int, complete: bool):
+    mm[:HEADER.size] = HEADER.pack(MAGIC, VERSION, FLAG_COMPLETE if complete else 0, 0, d, iteration)
+
+
+# ---- (dé)compactage ----
+def unpack_digits(data: bytes, first: int, count: int):
+    """Chiffres [first, first+count) d'un bloc commençant au chiffre pair ``2*k``.
+
+    ``first`` is relative to the start of ``data`` (0 or 1 when the window
+    starts on a high nibble). Returns a uint8 array (numpy) or a bytearray.
+    """
+    if NUMPY_AVAILABLE:
+        raw = np.frombuffer(data, dtype=np.uint8)
+        out = np.empty(2 * raw.shape[0], dtype=np.uint8)
+        out[0::2] = raw & 15
+        out[1::2] = raw >> 4
+        return out[first:first + count]
+    out = bytearray(2 * len(data))
+    out[0::2] = data.translate(_LO)
+    out[1::2] = data.translate(_HI)
+    return out[first:first + count]
+
+
+def pack_digits(digits) -> bytes:
+    """Compacte un nombre pair de chiffres (ou impair, nibble haut final nul)."""
+    if NUMPY_AVAILABLE:
+        if isinstance(digits, (bytes, bytearray, memoryview)):
+            a = np.frombuffer(digits, dtype=np.uint8)
+        else:
+            a = np.asarray(digits, dtype=np.uint8)
+        if a.shape[0] % 2:
+            a = np.append(a, np.uint8(0))
+        return (a[0::2] | (a[1::2] << 4)).tobytes()
+    a = bytearray(digits)
+    if len(a) % 2:
+        a.append(0)
+    return bytes(x | (y << 4) for x, y in zip(a[0::2], a[1::2]))
+
+
+def read_window(mm, lo: int, hi: int):
+    """Chiffres [lo, hi) du fichier mappé (LSB-first)."""
+    b0 = lo // 2
+    b1 = (hi + 1) // 2
+    return unpack_digits(mm[HEADER_SIZE + b0:HEADER_SIZE + b1], lo - 2 * b0, hi - lo)
+
+
+def _willneed(mm, lo: int, hi: int):
+    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_WILLNEED') and lo < hi:
+        start = (HEADER_SIZE + lo // 2) // mmap.PAGESIZE * mmap.PAGESIZE
+        end = HEADER_SIZE + (hi + 1) // 2
+        try:
+            mm.madvise(mmap.MADV_WILLNEED, start, end - start)
+        except (OSError, ValueError):
+            pass
+
+
+# ---- noyau d'addition par fenêtre ----
+def _add_chunk(low, high, carry: int):
+    """(chiffres, sommes de paires, retenue sortante, nb de retenues) pour une fenêtre.
+
+    ``high`` is the mirrored window already in low-position order.
+    """
+    if NUMPY_AVAILABLE:
+        s = low + high
+        n = s.shape[0]
+        idx = np.arange(n)
+        last_gen = np.maximum.accumulate(np.where(s >= 10, idx, -1))
+        last_kill = np.maximum.accumulate(np.where(s <= 8, idx, -1))
+        out = last_gen > last_kill
+        if carry:
+            out |= last_kill < 0        # que des 9 depuis le début : la retenue passe
+        carries = np.empty(n, dtype=np.uint8)
+        carries[0] = carry
+        carries[1:] = out[:-1]
+        res = s + carries
+        res[res >= 10] -= 10
+        return res, s, int(out[-1]), int(carries.sum())
+    n = len(low)
+    res = bytearray(n)
+    s_all = bytearray(n)
+    c = carry
+    count = 0
+    for i in range(n):
+        s = low[i] + high[i]
+        s_all[i] = s
+        count += c
+        t = s + c
+        if t >= 10:
+            res[i] = t - 10
+            c = 1
+        else:
+            res[i] = t
+            c = 0
+    return res, s_all, c, count
+
+
+class OnlinePalindromeCheck:
+    """Automate bords -> centre (mode exact) alimenté paire par paire.
+
+    Feed the pair sums p_k = a_k + a_{d-1-k} for k = 0, 1, ... (only the
+    first ``pairs_needed`` matter); ``result()`` tells whether T(n) is a
+    palindrome. Same transitions as ``palindrome_automaton._run`` with
+    carries in {0, 1}: one run for a d-digit result, one for d+1 digits.
+    """
+
+    __slots__ = ('d', 'runs', 'k', 'pairs_needed', 'last', 'fails_at')
+
+    def __init__(self, d: int):
+        self.d = d
+        # [L, lo, hi, p_{k-1}, vivant]
+        self.runs = [[d, 0, 0, 0, True], [d + 1, 0, 0, 0, True]]
+        self.k = 0
+        self.pairs_needed = (d + 1) // 2
+        self.last = 0
+        self.fails_at = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.runs[0][4] or self.runs[1][4]
+
+    def feed(self, p: int) -> bool:
+        """Consomme p_k ; renvoie False dès que toutes les passes sont mortes."""
+        k = self.k
+        d = self.d
+        for run in self.runs:
+            if not run[4]:
+                continue
+            L, lo, hi, prev = run[0], run[1], run[2], run[3]
+            run[3] = p
+            if k >= L // 2:
+                continue
+            # position haute h = L-1-k : somme p_k (L = d) ou p_{k-1} (L = d+1)
+            p_h = p if L == d else (prev if k else 0)
+            s = p + lo
+            c_next = s // 10
+            r = s - 10 * c_next
+            c_h = r - p_h + 10 * hi
+            if (k == 0 and r == 0) or c_h not in (0, 1) or (L - 1 - k == k + 1 and c_h != c_next):
+                run[4] = False
+                self.fails_at = max(self.fails_at, k)
+                continue
+            run[1] = c_next
+            run[2] = c_h
+        self.last = p
+        self.k = k + 1
+        return self.alive
+
+    def result(self) -> bool:
+        """T(n) palindrome ? (à appeler après ``pairs_needed`` paires)."""
+        for L, lo, hi, _, alive in self.runs:
+            if not alive:
+                continue
+            if L % 2 == 0:
+                return True
+            # chiffre central : somme de la dernière paire lue (p_m ou son miroir)
+            if 0 <= self.last + lo - 10 * hi <= 9:
+                return True
+        return False
+
+
+# ---- fichiers ----
+def write_packed(path: str, digits, iteration: int = 0):
+    """Écrit un buffer de chiffres LSB-first (en mémoire) comme fichier complet."""
+    d = len(digits)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, FLAG_COMPLETE, 0, d, iteration).ljust(HEADER_SIZE, b'\0'))
+        f.write(pack_digits(digits))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def import_decimal_text(text_path: str, out_path: str, iteration: int = 0,
+                        chunk: int = CHUNK_DIGITS) -> int:
+    """Convertit un fichier texte décimal (MSB-first) par blocs, depuis la fin."""
+    with open(text_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as src:
+        start, end = 0, len(src)
+        while start < end and src[start:start + 1].isspace():
+            start += 1
+        while end > start and src[end - 1:end].isspace():
+            end -= 1
+        d = end - start
+        if d == 0:
+            raise ValueError('empty decimal file')
+        chunk -= chunk % 2
+        with open(out_path, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, VERSION, 0, 0, d, iteration).ljust(HEADER_SIZE, b'\0'))
+            pos = end
+            while pos > start:
+                lo = max(start, pos - chunk)
+                out.write(pack_digits(digits_from_decimal_text(src[lo:pos])))
+                pos = lo
+            out.flush()
+            os.fsync(out.fileno())
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, VERSION, FLAG_COMPLETE, 0, d, iteration))
+    return d
+
+
+def export_decimal_text(path: str, out_path: str, chunk: int = CHUNK_DIGITS):
+    """Écrit l'itéré en texte décimal (MSB-first) sans le charger en entier."""
+    hdr = read_header(path)
+    d = hdr['d']
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            open(out_path, 'w', encoding='ascii') as out:
+        hi = d
+        while hi > 0:
+            lo = max(0, hi - chunk)
+            w = read_window(mm, lo, hi)
+            out.write(bytes(x + 48 for x in reversed(bytes(w))).decode('ascii'))
+            hi = lo
+        out.write('\n')
+
+
+def read_packed(path: str) -> bytearray:
+    """Charge tout l'itéré en mémoire (petits d : tests, comparaisons)."""
+    hdr = read_header(path)
+    with open(path, 'rb') as f:
+        f.seek(HEADER_SIZE)
+        data = f.read((hdr['d'] + 1) // 2)
+    return bytearray(unpack_digits(data, 0, hdr['d']))
+
+
+def reverse_add_file(src_path: str, dst_path: str, chunk: int = CHUNK_DIGITS) -> Dict:
+    """Une passe T(n) de ``src_path`` vers ``dst_path`` ; renvoie le relevé de l'itération."""
+    hdr = read_header(src_path)
+    if hdr is None or not hdr['complete']:
+        raise ValueError(f'{src_path}: not a complete packed digit file')
+    d = hdr['d']
+    chunk = max(2, chunk - chunk % 2)
+    check = OnlinePalindromeCheck(d)
+    carry = 0
+    n_carries = 0
+    first_digit = last_digit = None
+    with open(src_path, 'rb') as fs, mmap.mmap(fs.fileno(), 0, access=mmap.ACCESS_READ) as src:
+        if hasattr(src, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            src.madvise(mmap.MADV_SEQUENTIAL)
+        with open(dst_path, 'wb') as f:
+            f.truncate(packed_size(d + 1))
+        with open(dst_path, 'r+b') as fd, mmap.mmap(fd.fileno(), 0) as dst:
+            _write_header(dst, d, hdr['iteration'] + 1, complete=False)
+            for i0 in range(0, d, chunk):
+                i1 = min(d, i0 + chunk)
+                _willneed(src, i1, min(d, i1 + chunk))
+                _willneed(src, max(0, d - i1 - chunk), d - i1)
+                low = read_window(src, i0, i1)
+                high = read_window(src, d - i1, d - i0)[::-1]
+                if i0 == 0:
+                    last_digit = int(low[0])
+                    first_digit = int(high[0])
+                res, sums, carry, cnt = _add_chunk(low, high, carry)
+                n_carries += cnt
+                if check.alive and i0 < check.pairs_needed:
+                    for p in sums[:check.pairs_needed - i0]:
+                        if not check.feed(int(p)):
+                            break
+                b0 = HEADER_SIZE + i0 // 2
+                packed = pack_digits(res)
+                dst[b0:b0 + len(packed)] = packed
+            if carry:
+                pos = HEADER_SIZE + d // 2
+                dst[pos] = (dst[pos] | 0x10) if d % 2 else 1
+            dst.flush()
+        new_d = d + carry
+        with open(dst_path, 'r+b') as fd:
+            fd.truncate(packed_size(new_d))
+            fd.flush()
+            os.fsync(fd.fileno())
+            fd.seek(0)
+            fd.write(HEADER.pack(MAGIC, VERSION, FLAG_COMPLETE, 0, new_d, hdr['iteration'] + 1))
+            fd.flush()
+            os.fsync(fd.fileno())
+    palindrome = check.result()
+    return {
+        'iteration': hdr['iteration'],
+        'd': d,
+        'first_digit': first_digit,
+        'last_digit': last_digit,
+        'A_ext': abs(first_digit - last_digit),
+        'carries': n_carries,
+        'overflow': bool(carry),
+        'obstruction_mod2': not palindrome,
+        'automaton_depth': check.fails_at,
+    }
+
+
+# ---- répertoire de travail (ping-pong) ----
+def current_file(workdir: str) -> Tuple[str, Dict]:
+    """Fichier complet le plus avancé du couple ping-pong."""
+    best = None
+    for name in FILES:
+        hdr = read_header(os.path.join(workdir, name))
+        if hdr and hdr['complete'] and (best is None or hdr['iteration'] > best['iteration']):
+            best = hdr
+    if best is None:
+        raise FileNotFoundError(f'no complete iterate in {workdir} (run "init" first)')
+    return best['path'], best
+
+
+def run(workdir: str, iterations: int, chunk: int = CHUNK_DIGITS,
+        log_path: Optional[str] = None, metrics=None, stop_on_palindrome: bool = True
+        ) -> Iterator[Dict]:
+    """Enchaîne ``iterations`` passes en alternant les deux fichiers."""
+    log = open(log_path, 'a', encoding='utf-8') if log_path else None
+    try:
+        for _ in range(iterations):
+            src, hdr = current_file(workdir)
+            dst = os.path.join(workdir, FILES[1 - FILES.index(os.path.basename(src))])
+            if metrics is not None:
+                metrics.begin_iteration(hdr['iteration'])
+                with metrics.stage('T'):
+                    rec = reverse_add_file(src, dst, chunk)
+                metrics.add_bytes(packed_size(rec['d'] + rec['overflow']))
+                metrics.end_iteration(rec['iteration'], rec['d'])
+            else:
+                rec = reverse_add_file(src, dst, chunk)
+            if log:
+                log.write(json.dumps(rec) + '\n')
+                log.flush()
+            yield rec
+            if stop_on_palindrome and not rec['obstruction_mod2']:
+                return
+    finally:
+        if log:
+            log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Out-of-core reverse-and-add on packed digit files.')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('init', help='créer le répertoire de travail')
+    p.add_argument('workdir')
+    p.add_argument('--start', type=int, default=196)
+    p.add_argument('--from-text', type=str, default=None, help='fichier décimal (MSB-first)')
+    p.add_argument('--iteration', type=int, default=0, help="numéro d'itération de l'itéré importé")
+
+    p = sub.add_parser('run', help='itérer T')
+    p.add_argument('workdir')
+    p.add_argument('--iterations', type=int, default=100)
+    p.add_argument('--chunk-digits', type=int, default=CHUNK_DIGITS)
+    p.add_argument('--log', type=str, default=None, help='relevés par itération (JSON Lines, ajout)')
+    p.add_argument('--progress-every', type=int, default=10)
+    add_metrics_arguments(p)
+
+    p = sub.add_parser('export', help="écrire l'itéré courant en décimal")
+    p.add_argument('workdir')
+    p.add_argument('output')
+
+    p = sub.add_parser('status', help="itéré courant (d, itération)")
+    p.add_argument('workdir')
+
+    args = parser.parse_args()
+
+    if args.cmd == 'init':
+        os.makedirs(args.workdir, exist_ok=True)
+        for name in FILES:
+            path = os.path.join(args.workdir, name)
+            if os.path.exists(path):
+                os.remove(path)
+        path = os.path.join(args.workdir, FILES[0])
+        if args.from_text:
+            d = import_decimal_text(args.from_text, path, args.iteration)
+        else:
+            digits = digits_from_decimal_text(str(args.start))
+            write_packed(path, digits, args.iteration)
+            d = len(digits)
+        print(f'Initialized {path}: d={d}, iteration={args.iteration}')
+    elif args.cmd == 'run':
+        _, hdr = current_file(args.workdir)
+        m = metrics_from_args(args, run_info={'script': 'packed_orbit', 'workdir': args.workdir,
+                                              'start_iteration': hdr['iteration'], 'd': hdr['d']})
+        t0 = time.time()
+        rec = None
+        for k, rec in enumerate(run(args.workdir, args.iterations, args.chunk_digits,
+                                    args.log, metrics=m), 1):
+            if k % max(1, args.progress_every) == 0:
+                print(f"iter {rec['iteration']}: d={rec['d']} A_ext={rec['A_ext']} "
+                      f"({time.time() - t0:.1f}s)", flush=True)
+            if not rec['obstruction_mod2']:
+                print(f"T(n) is a palindrome at iteration {rec['iteration']}")
+        m.close(rec['iteration'] if rec else None, rec['d'] if rec else None)
+        _, hdr = current_file(args.workdir)
+        print(f"Current iterate: iteration {hdr['iteration']}, d={hdr['d']}")
+    elif args.cmd == 'export':
+        path, hdr = current_file(args.workdir)
+        export_decimal_text(path, args.output)
+        print(f"Wrote iteration {hdr['iteration']} ({hdr['d']} digits) to {args.output}")
+    elif args.cmd == 'status':
+        path, hdr = current_file(args.workdir)
+        print(json.dumps(hdr))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Outside-in automaton deciding whether reverse-and-add can give a palindrome.
+
+Notation (LSB-first): p_i = a_i + a_{d-1-i} for i < d and p_i = 0 for i >= d;
+result digit r_i = p_i + c_i - 10*c_{i+1} with c_0 = 0; the result has
+L = d or d+1 digits and must satisfy r_i = r_{L-1-i} and r_{L-1} != 0.
+
+Pairs of result positions (i, h = L-1-i) are read from the outside in, with
+state (c_i, c_{h+1}): the carry entering the low position and the carry the
+high position must emit. ``0 <= r_i <= 9`` fixes c_{i+1} = (p_i + c_i) // 10
+and r_h = r_i fixes c_h = r_i - p_h + 10*c_{h+1}, so from a given initial
+state the run is deterministic and stops at the first pair whose required
+carry falls outside the allowed range -- for almost every non-palindrome this
+is the first or second pair, i.e. O(1) instead of a full O(d) addition.
+
+ - exact mode (``k=None``): carries in {0, 1}, L in {d, d+1}, c_L = 0. An
+   accepted run is exactly the schoolbook addition, so this decides whether
+   T(n) is a palindrome (the question answered by the
+   ``check_palindrome_obstruction_mod2_fast`` copies);
+ - relaxed mode (``k``): carries are free in range(2^k), L = d and the top
+   carry c_d is free (one run per initial value) -- the relaxation of
+   ``verify_196_modk.exists_carries_for_k``.
+
+``decide`` returns ``(feasible, certificate)``: for a feasible instance the
+witness ``{'L', 'carries': [c_0..c_L], 'digits': [r_0..r_{L-1}]}`` (LSB-first),
+otherwise the refutation ``{'runs': [{'L', 'top_carry', 'fails_at'}, ...]}``
+listing, for every initial state, the pair index at which it died.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from trajectory_engine import digits_from_decimal_text
+
+
+def _pair_sum(a: Sequence[int], d: int, i: int) -> int:
+    return a[i] + a[d - 1 - i] if i < d else 0
+
+
+def _run(a: Sequence[int], L: int, top: int, cmax: int, exact: bool = True,
+         record: bool = False):
+    """Une passe déterministe depuis l'état (c_0 = 0, c_L = top).
+
+    Returns ``(fails_at, path)`` : ``fails_at`` is None when the run is
+    accepted; ``path`` holds (carries, digits) when ``record`` is set.
+    """
+    d = len(a)
+    lo = 0
+    hi = top
+    half = L // 2
+    if record:
+        carries = [0] * (L + 1)
+        digits = [0] * L
+        carries[L] = top
+    for i in range(half):
+        h = L - 1 - i
+        s = (a[i] + a[d - 1 - i] if i < d else 0) + lo
+        c_next = s // 10
+        if c_next >= cmax:
+            return i, None
+        r = s - 10 * c_next
+        if exact and i == 0 and r == 0:
+            return i, None          # chiffre de tête r_{L-1} = r_0 nul
+        c_h = r - (a[h] + a[d - 1 - h] if h < d else 0) + 10 * hi
+        if c_h < 0 or c_h >= cmax:
+            return i, None
+        if h == i + 1 and c_h != c_next:
+            return i, None          # L pair : les deux côtés se rejoignent
+        if record:
+            carries[i + 1] = c_next
+            carries[h] = c_h
+            digits[i] = digits[h] = r
+        lo = c_next
+        hi = c_h
+    if L % 2:
+        m = half
+        r = _pair_sum(a, d, m) + lo - 10 * hi
+        if not 0 <= r <= 9:
+            return half, None
+        if record:
+            digits[m] = r
+            carries[m + 1] = hi
+    if record:
+        return None, (carries, digits)
+    return None, None
+
+
+def _cases(d: int, k: Optional[int]):
+    """(L, valeurs initiales de c_L, cmax) selon le mode."""
+    if k is None:
+        return [(d, (0,), 2), (d + 1, (0,), 2)]
+    M = 2 ** k
+    return [(d, range(M), M)]
+
+
+def decide(a: Sequence[int], k: Optional[int] = None) -> Tuple[bool, Dict]:
+    """Décide la faisabilité palindromique pour les chiffres ``a`` (LSB-first).
+
+    In relaxed mode the carries c_0..c_{d-1} of the witness are the ones of
+    ``verify_196_modk`` shifted by one (their c_j is the carry out of
+    position j) and c_d is the free top carry.
+    """
+    d = len(a)
+    exact = k is None
+    runs = []
+    for L, tops, cmax in _cases(d, k):
+        for top in tops:
+            fails_at, _ = _run(a, L, top, cmax, exact)
+            if fails_at is None:
+                _, (carries, digits) = _run(a, L, top, cmax, exact, record=True)
+                return True, {'L': L, 'carries': carries, 'digits': digits}
+            runs.append({'L': L, 'top_carry': top, 'fails_at': fails_at})
+    return False, {'runs': runs}
+
+
+def is_feasible(a: Sequence[int], k: Optional[int] = None) -> bool:
+    """Comme ``decide`` sans certificat (aucune allocation hors de l'état)."""
+    d = len(a)
+    exact = k is None
+    for L, tops, cmax in _cases(d, k):
+        for top in tops:
+            if _run(a, L, top, cmax, exact)[0] is None:
+                return True
+    return False
+
+
+def digits_of(n: int) -> bytearray:
+    return digits_from_decimal_text(str(n))
+
+
+def t_is_palindrome(n: int) -> bool:
+    """T(n) est-il un palindrome ? (mode exact, sortie anticipée)"""
+    return is_feasible(digits_of(n))
+
+
+def mod2_obstruction(n: int) -> Tuple[bool, Optional[List[int]]]:
+    """(obstruction, carries) : carries c_0..c_d de T(n) si T(n) est palindrome.
+
+    Same contract as the ``check_palindrome_obstruction_mod2_fast`` copies:
+    ``(True, None)`` when no carry assignment gives a palindrome.
+    """
+    a = digits_of(n)
+    feasible, cert = decide(a)
+    if not feasible:
+        return True, None
+    # L = d : c_d = 0 ; L = d+1 : c_d = 1 (retenue finale), c_{d+1} = 0
+    return False, cert['carries'][:len(a) + 1]
+
+
+def mod2k_witness(a_msb: Sequence[int], k: int) -> Optional[Tuple[int, ...]]:
+    """Témoin au format ``verify_196_modk`` (c_0..c_d, c_d = 0) ou None."""
+    a = list(reversed(a_msb))
+    feasible, cert = decide(a, k)
+    if not feasible:
+        return None
+    d = len(a)
+    c = cert['carries']
+    # leur c_j = retenue sortant de la position j = notre c_{j+1}
+    return tuple(c[1:d + 1]) + (0,)
+
+
+def verify_certificate(a: Sequence[int], cert: Dict, k: Optional[int] = None) -> bool:
+    """Rejoue un témoin : bornes des chiffres/retenues, palindrome, addition."""
+    d = len(a)
+    L = cert['L']
+    c = cert['carries']
+    r = cert['digits']
+    exact = k is None
+    cmax = 2 if exact else 2 ** k
+    if len(c) != L + 1 or len(r) != L or c[0] != 0:
+        return False
+    if exact and (c[L] != 0 or (r[L - 1] == 0 and L > 1) or L not in (d, d + 1)):
+        return False
+    if not exact and L != d:
+        return False
+    for i in range(L):
+        if not 0 <= c[i + 1] < cmax:
+            return False
+        if r[i] != _pair_sum(a, d, i) + c[i] - 10 * c[i + 1] or not 0 <= r[i] <= 9:
+            return False
+    return r == r[::-1]
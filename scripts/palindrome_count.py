@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""Exact counts of d-digit n whose reverse-and-add T(n) is a palindrome.
+
+T(n) depends on n only through the mirror-pair sums s_j = a_j + a_{d-1-j}
+(and the middle digit for odd d), so instead of enumerating 10^d numbers we
+run the outside-in automaton of palindrome_automaton over pair sums, each
+weighted by the number of digit pairs with that sum, and count accepted
+paths:
+
+ - state ``(lo, hi, pending, sym)``: carry into the next low position, carry
+   the next high position must emit, the high result digit still waiting for
+   its mirror (only when T(n) has d+1 digits; None otherwise) and whether
+   every inner pair seen so far is symmetric (A_int = 0);
+ - for d-digit results the high carry is forced by r_low = r_high; with an
+   overflow digit it is guessed and checked one step later. The sides must
+   agree where they meet, which pins every guess to the true addition, so
+   each n has exactly one accepted path and the path counts are exact.
+
+Cost: O(d * 19 * #states) big-int additions (#states <= 44), i.e. lengths
+of a few hundred digits take milliseconds. Counts are broken down by outer
+pair (first digit, last digit) -- hence by A_ext = |first - last| -- and by
+the A_int = 0 status (A_int as in validate_aext*: the weighted asymmetry of
+the inner pairs, middle digit excluded). ``sample`` draws uniformly from
+any of these classes using the same tables.
+
+Usage:
+    python palindrome_count.py 8 50 100 --by-aext
+    python palindrome_count.py 60 --sample 5 --aext 0 --aint-zero no
+"""
+import argparse
+import json
+import random
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from palindrome_automaton import t_is_palindrome
+
+State = Tuple[int, int, Optional[int], bool]
+
+
+def _pairs_with_sum(s: int) -> int:
+    """Nombre de couples (x, y) de chiffres avec x + y = s."""
+    return min(s, 18 - s) + 1 if 0 <= s <= 18 else 0
+
+
+def _step(state: State, s: int, symmetric: Optional[bool]):
+    """Successeurs de ``state`` après une paire de somme ``s``.
+
+    ``symmetric`` is None for the outer pair (not part of A_int).
+    """
+    lo, hi, pending, sym = state
+    t = s + lo
+    r = t % 10
+    lo2 = t // 10
+    sym2 = sym if symmetric is None else (sym and symmetric)
+    if pending is None:
+        # résultat à d chiffres : r_haut = r_bas fixe la retenue entrante
+        cin = r - s + 10 * hi
+        if cin in (0, 1):
+            yield (lo2, cin, None, sym2)
+        return
+    if r != pending:
+        return
+    for cin in (0, 1):
+        r_hi = s + cin - 10 * hi
+        if 0 <= r_hi <= 9:
+            yield (lo2, cin, r_hi, sym2)
+
+
+def _accept(d: int, state: State, aint_zero: Optional[bool]) -> int:
+    """Nombre de complétions au point de rencontre (chiffre central inclus)."""
+    lo, hi, pending, sym = state
+    if aint_zero is not None and sym != aint_zero:
+        return 0
+    if d % 2 == 0:
+        return 1 if lo == hi else 0
+    count = 0
+    for x in range(1 if d == 1 else 0, 10):
+        t = 2 * x + lo
+        if t // 10 == hi and (pending is None or t % 10 == pending):
+            count += 1
+    return count
+
+
+def _initial_states():
+    # (c_0 = 0, c_d = 0) : d chiffres ; (c_0 = 0, c_d = 1, r_d = 1) : d+1 chiffres
+    return [(0, 0, None, True), (0, 1, 1, True)]
+
+
+@lru_cache(maxsize=None)
+def _tables(d: int, aint_zero: Optional[bool]) -> Tuple[Dict[State, int], ...]:
+    """tables[j][état] = complétions depuis la paire j (j = 1 .. d//2)."""
+    half = d // 2
+    tables: List[Dict[State, int]] = [dict() for _ in range(half + 1)]
+    states = _reachable(d)
+    for st in states[half]:
+        tables[half][st] = _accept(d, st, aint_zero)
+    for j in range(half - 1, 0, -1):
+        nxt = tables[j + 1]
+        cur = tables[j]
+        for st in states[j]:
+            total = 0
+            for s in range(19):
+                w = _pairs_with_sum(s)
+                w_sym = 1 if s % 2 == 0 else 0
+                if w_sym:
+                    for st2 in _step(st, s, True):
+                        total += w_sym * nxt.get(st2, 0)
+                if w - w_sym:
+                    for st2 in _step(st, s, False):
+                        total += (w - w_sym) * nxt.get(st2, 0)
+            cur[st] = total
+    return tuple(tables)
+
+
+@lru_cache(maxsize=None)
+def _reachable(d: int) -> Tuple[frozenset, ...]:
+    """États atteignables avant chaque paire j = 0 .. d//2."""
+    half = d // 2
+    layers = [frozenset(_initial_states())]
+    for j in range(half):
+        nxt = set()
+        for st in layers[-1]:
+            for s in range(19):
+                for symmetric in ((None,) if j == 0 else (True, False)):
+                    nxt.update(_step(st, s, symmetric))
+        layers.append(frozenset(nxt))
+    return tuple(layers)
+
+
+def _outer_weights(d: int, first: int, last: int, aint_zero: Optional[bool]):
+    """[(poids, état après la paire externe)] pour un couple (premier, dernier)."""
+    tables = _tables(d, aint_zero)
+    out = []
+    for st in _initial_states():
+        for st2 in _step(st, first + last, None):
+            w = tables[1].get(st2, 0)
+            if w:
+                out.append((w, st2))
+    return out
+
+
+def count_by_outer_pair(d: int, aint_zero: Optional[bool] = None) -> Dict[Tuple[int, int], int]:
+    """{(premier chiffre, dernier chiffre): nombre de n à d chiffres avec T(n) palindrome}.
+
+    ``aint_zero`` restricts to A_int = 0 (True) or A_int >= 1 (False).
+    """
+    if d < 1:
+        raise ValueError('length must be >= 1')
+    if d == 1:
+        # n = x : T(n) = 2x, palindrome ssi 2x < 10 ; A_int = 0 toujours
+        if aint_zero is False:
+            return {(x, x): 0 for x in range(1, 10)}
+        return {(x, x): 1 if 2 * x < 10 else 0 for x in range(1, 10)}
+    counts = {}
+    for first in range(1, 10):
+        for last in range(10):
+            counts[(first, last)] = sum(w for w, _ in _outer_weights(d, first, last, aint_zero))
+    return counts
+
+
+def count_palindromic(d: int, aext: Optional[int] = None, aint_zero: Optional[bool] = None) -> int:
+    """Nombre de n à d chiffres (premier chiffre non nul) avec T(n) palindrome."""
+    return sum(c for (f, l), c in count_by_outer_pair(d, aint_zero).items()
+               if aext is None or abs(f - l) == aext)
+
+
+def class_size(d: int, aext: Optional[int] = None, aint_zero: Optional[bool] = None) -> int:
+    """Nombre total de n à d chiffres dans la classe (dénominateur des proportions)."""
+    if d == 1:
+        return 9 if aext in (None, 0) and aint_zero is not False else 0
+    inner = d // 2 - 1
+    free = 10 ** (d % 2)
+    n_outer = sum(1 for f in range(1, 10) for l in range(10) if aext is None or abs(f - l) == aext)
+    all_inner = 100 ** inner
+    sym_inner = 10 ** inner
+    if aint_zero is None:
+        per = all_inner
+    elif aint_zero:
+        per = sym_inner
+    else:
+        per = all_inner - sym_inner
+    return n_outer * per * free
+
+
+def breakdown(d: int) -> Dict:
+    """Comptes par A_ext et statut A_int = 0, avec les tailles de classes."""
+    rows = {}
+    by_pair = {flag: count_by_outer_pair(d, flag) for flag in (True, False)}
+    for aext in range(10):
+        row = {}
+        for flag, key in ((True, 'aint_zero'), (False, 'aint_pos')):
+            size = class_size(d, aext, flag)
+            if not size:
+                continue
+            cnt = sum(c for (f, l), c in by_pair[flag].items() if abs(f - l) == aext)
+            row[key] = {'palindromic': cnt, 'total': size}
+        if row:
+            rows[aext] = row
+    return rows
+
+
+def sample(d: int, k: int = 1, rng: Optional[random.Random] = None,
+           aext: Optional[int] = None, aint_zero: Optional[bool] = None,
+           first: Optional[int] = None, last: Optional[int] = None) -> List[int]:
+    """``k`` tirages uniformes (avec remise) parmi les n comptés par ``count_palindromic``."""
+    rng = rng or random.Random()
+    if d == 1:
+        pool = [x for (x, _), c in count_by_outer_pair(1, aint_zero).items()
+                if c and (aext in (None, 0)) and first in (None, x) and last in (None, x)]
+        if not pool:
+            raise ValueError('empty class')
+        return [rng.choice(pool) for _ in range(k)]
+    tables = _tables(d, aint_zero)
+    outer = []
+    for f in range(1, 10):
+        for l in range(10):
+            if (first is not None and f != first) or (last is not None and l != last):
+                continue
+            if aext is not None and abs(f - l) != aext:
+                continue
+            for w, st in _outer_weights(d, f, l, aint_zero):
+                outer.append((w, (f, l, st)))
+    if not outer:
+        raise ValueError('empty class')
+    return [_sample_one(d, tables, outer, rng) for _ in range(k)]
+
+
+def _pick(options, rng):
+    total = sum(w for w, _ in options)
+    if not total:
+        raise ValueError('empty class')
+    x = rng.randrange(total)
+    for w, item in options:
+        if x < w:
+            return item
+        x -= w
+    raise AssertionError('unreachable')
+
+
+def _sample_one(d, tables, outer, rng) -> int:
+    half = d // 2
+    a = [0] * d                     # LSB-first
+    f, l, st = _pick(outer, rng)
+    a[d - 1], a[0] = f, l
+    for j in range(1, half):
+        options = []
+        for s in range(19):
+            w = _pairs_with_sum(s)
+            w_sym = 1 if s % 2 == 0 else 0
+            for symmetric, ws in ((True, w_sym), (False, w - w_sym)):
+                if not ws:
+                    continue
+                for st2 in _step(st, s, symmetric):
+                    c = tables[j + 1].get(st2, 0)
+                    if c:
+                        options.append((ws * c, (s, symmetric, st2)))
+        s, symmetric, st = _pick(options, rng)
+        if symmetric:
+            x = y = s // 2
+        else:
+            x = rng.choice([x for x in range(max(0, s - 9), min(9, s) + 1) if 2 * x != s])
+            y = s - x
+        a[j], a[d - 1 - j] = x, y
+    if d % 2:
+        lo, hi, pending, _ = st
+        mids = [x for x in range(10)
+                if (2 * x + lo) // 10 == hi and (pending is None or (2 * x + lo) % 10 == pending)]
+        a[half] = rng.choice(mids)
+    return int(''.join(map(str, reversed(a))))
+
+
+def brute_force_by_outer_pair(d: int, aint_zero: Optional[bool] = None) -> Dict[Tuple[int, int], int]:
+    """Énumération de référence (petits d seulement)."""
+    counts = {}
+    for n in range(10 ** (d - 1) if d > 1 else 1, 10 ** d):
+        s = str(n)
+        if aint_zero is not None:
+            zero = all(s[i] == s[d - 1 - i] for i in range(1, d // 2))
+            if zero != aint_zero:
+                continue
+        key = (int(s[0]), int(s[-1]))
+        counts.setdefault(key, 0)
+        if t_is_palindrome(n):
+            counts[key] += 1
+    return counts
+
+
+def _yes_no(text: str) -> Optional[bool]:
+    return {'yes': True, 'no': False, 'any': None}[text]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count d-digit n with palindromic T(n) (exact DP).')
+    parser.add_argument('lengths', type=int, nargs='+', help='nombres de chiffres d')
+    parser.add_argument('--aext', type=int, default=None, help='restreindre à A_ext = |premier - dernier|')
+    parser.add_argument('--aint-zero', choices=('yes', 'no', 'any'), default='any',
+                        help='restreindre à A_int = 0 (yes) ou A_int >= 1 (no)')
+    parser.add_argument('--by-aext', action='store_true', help='tableau par A_ext et statut A_int')
+    parser.add_argument('--by-pair', action='store_true', help='comptes par couple (premier, dernier)')
+    parser.add_argument('--sample', type=int, default=0, help='tirer N éléments uniformes de la classe')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--check', action='store_true',
+                        help='comparer à l\'énumération (d <= 6) et revérifier les tirages')
+    parser.add_argument('--json', type=str, default=None, help='écrire les résultats en JSON')
+    args = parser.parse_args()
+
+    aint_zero = _yes_no(args.aint_zero)
+    rng = random.Random(args.seed)
+    report = []
+    for d in args.lengths:
+        cnt = count_palindromic(d, args.aext, aint_zero)
+        size = class_size(d, args.aext, aint_zero)
+        print(f'd={d}: {cnt} / {size} n with palindromic T(n)'
+              + (f' ({cnt / size:.3e})' if size else ''))
+        entry = {'d': d, 'aext': args.aext, 'aint_zero': aint_zero,
+                 'palindromic': str(cnt), 'total': str(size)}
+        if args.by_aext:
+            rows = breakdown(d)
+            for aext, row in rows.items():
+                cells = '  '.join(f"{key}: {v['palindromic']}/{v['total']}" for key, v in row.items())
+                print(f'  A_ext={aext}  {cells}')
+            entry['by_aext'] = {str(a): {key: {k: str(v) for k, v in cell.items()} for key, cell in row.items()}
+                                for a, row in rows.items()}
+        if args.by_pair:
+            pairs = count_by_outer_pair(d, aint_zero)
+            nonzero = {p: c for p, c in pairs.items() if c}
+            for (f, l), c in sorted(nonzero.items()):
+                print(f'  ({f}, {l}): {c}')
+            entry['by_pair'] = {f'{f}{l}': str(c) for (f, l), c in pairs.items()}
+        if args.check and d <= 6:
+            # seuls les couples non nuls : l'énumération ne crée pas les autres clés
+            dp = {k: v for k, v in count_by_outer_pair(d, aint_zero).items() if v}
+            brute = {k: v for k, v in brute_force_by_outer_pair(d, aint_zero).items() if v}
+            ok = dp == brute
+            print(f'  brute-force check: {"OK" if ok else "MISMATCH"}')
+            entry['brute_force_ok'] = ok
+        if args.sample and cnt:
+            xs = sample(d, args.sample, rng, aext=args.aext, aint_zero=aint_zero)
+            for x in xs:
+                print(f'  sample: {x}')
+            if args.check:
+                bad = [x for x in xs if not t_is_palindrome(x)]
+                print(f'  samples re-checked: {len(xs) - len(bad)}/{len(xs)} palindromic')
+            entry['samples'] = [str(x) for x in xs]
+        report.append(entry)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results saved to {args.json}')
+
+
+if __name__ == '__main__':
+    main()
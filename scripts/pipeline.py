@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Dependency-aware runner for the certificate chain.
+
+The chain trajectory log -> Jacobian summary -> orbit moduli -> Hensel
+lifts -> manifest was run by hand, script by script. Here each stage
+declares its command, its input and output artifacts (files or directories,
+relative to the repository root) and the parameters it uses; the DAG is
+derived from outputs feeding inputs (plus explicit ``after``), and
+independent stages run concurrently, each in its own Python process.
+
+A stage is skipped when its key -- the formatted command, its parameters,
+the sha256 of every input file and of the script with the local modules it
+imports (followed through ``import`` statements) -- equals the one recorded
+after its last successful run and its outputs still have the recorded
+hashes. Hashing goes through the stat cache of manifest_engine, so an
+unchanged tree costs a few ``stat`` calls. A stage whose source inputs are
+missing (produced by no stage and absent) is reported as blocked, as are
+the stages consuming the outputs of a failed or blocked one; ``after`` only
+orders stages (the manifest still runs when the Hensel inputs are absent).
+
+State, per-stage logs and the last timing report live in ``.pipeline/``.
+
+Usage:
+    python scripts/pipeline.py run [--jobs 4] [--set iterations=2001 kmax=12]
+    python scripts/pipeline.py run --only jacobian_summary --force jacobian_summary
+    python scripts/pipeline.py plan
+"""
+import argparse
+import ast
+import hashlib
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+from manifest_engine import (DEFAULT_EXCLUDE, ROOT, StatCache, atomic_write_text, collect_files,
+                             hash_files)
+
+STATE_DIR = ROOT / '.pipeline'
+STATE_PATH = STATE_DIR / 'state.json'
+REPORT_PATH = STATE_DIR / 'last_run.json'
+
+DEFAULT_PARAMS = {'iterations': 1001, 'kmax': 10}
+
+
+class Stage:
+    """Étape : commande (script + arguments formatés), entrées, sorties, paramètres."""
+
+    def __init__(self, name: str, script: str, args: Sequence[str] = (),
+                 inputs: Sequence[str] = (), outputs: Sequence[str] = (),
+                 params: Sequence[str] = (), after: Sequence[str] = ()):
+        self.name = name
+        self.script = script
+        self.args = list(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = list(params)
+        self.after = list(after)
+
+    def command(self, params: Dict) -> List[str]:
+        return [sys.executable, self.script] + [a.format(**params) for a in self.args]
+
+
+STAGES = [
+    Stage('trajectory', 'scripts/check_trajectory_obstruction.py',
+          args=['--iterations', '{iterations}', '--kmax', '{kmax}',
+                '--out', 'results/trajectory_obstruction_log.json'],
+          outputs=['results/trajectory_obstruction_log.json'],
+          params=['iterations', 'kmax']),
+    Stage('jacobian_summary', 'scripts/extract_jacobian_summary.py',
+          args=['results/trajectory_obstruction_log.json'],
+          inputs=['results/trajectory_obstruction_log.json'],
+          outputs=['results/jacobian_summary_extracted.json', 'results/jacobian_summary.tex']),
+    Stage('orbit_moduli', 'scripts/check_orbit_moduli.py',
+          outputs=['results/orbit_moduli_summary.json']),
+    # les résultats de clôture mod 2^k et d'applicabilité de Hensel sont des
+    # entrées sources (aucun script du dépôt ne les produit)
+    Stage('hensel_lifts', 'scripts/hensel_lift_certify.py',
+          inputs=['verifier/hensel_applicability_summary.json',
+                  'verifier/closure_mod2k_targeted_results.json'],
+          outputs=['verifier/hensel_lift_results.json']),
+    Stage('manifest', 'scripts/manifest_engine.py', args=['generate'],
+          inputs=['results', 'certificates'],
+          outputs=['manifest_sha256.txt', 'results/manifest_sha256.json'],
+          after=['trajectory', 'jacobian_summary', 'orbit_moduli', 'hensel_lifts']),
+]
+
+
+def local_imports(script: Path, seen: Optional[Set[Path]] = None) -> Set[Path]:
+    """Le script et les modules locaux (même répertoire) qu'il importe, récursivement."""
+    seen = set() if seen is None else seen
+    if script in seen or not script.is_file():
+        return seen
+    seen.add(script)
+    try:
+        tree = ast.parse(script.read_text(encoding='utf-8'))
+    except (SyntaxError, UnicodeDecodeError):
+        return seen
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            local_imports(script.parent / (name.split('.')[0] + '.py'), seen)
+    return seen
+
+
+def _under(path: str, prefix: str) -> bool:
+    return path == prefix or path.startswith(prefix.rstrip('/') + '/')
+
+
+def build_graph(stages: List[Stage]) -> Dict[str, Set[str]]:
+    """étape -> étapes dont elle dépend ; erreur si cycle."""
+    deps = {s.name: set(s.after) for s in stages}
+    for b in stages:
+        for a in stages:
+            if a is b:
+                continue
+            if any(_under(o, i) or _under(i, o) for o in a.outputs for i in b.inputs):
+                deps[b.name].add(a.name)
+    # tri topologique (détection de cycle)
+    order, state = [], {}
+
+    def visit(n, stack):
+        if state.get(n) == 'done':
+            return
+        if state.get(n) == 'active':
+            raise ValueError('dependency cycle: ' + ' -> '.join(stack + [n]))
+        state[n] = 'active'
+        for m in sorted(deps[n]):
+            visit(m, stack + [n])
+        state[n] = 'done'
+        order.append(n)
+    for s in stages:
+        visit(s.name, [])
+    return deps
+
+
+def _producers(stages: List[Stage]) -> List[str]:
+    return [o for s in stages for o in s.outputs]
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage] = STAGES, params: Optional[Dict] = None,
+                 root: Path = ROOT, jobs: int = 2):
+        self.stages = {s.name: s for s in stages}
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.root = root
+        self.jobs = max(1, jobs)
+        self.deps = build_graph(stages)
+        self.cache = StatCache()
+        self.state = {}
+        if STATE_PATH.exists():
+            self.state = json.loads(STATE_PATH.read_text(encoding='utf-8'))
+        self.report: Dict[str, Dict] = {}
+
+    # ---- clés ----
+    def _hash_paths(self, targets: Sequence[str], exclude: Sequence[str] = ()) -> Dict[str, str]:
+        rels = collect_files(targets, self.root, exclude=exclude)
+        return {rel: info['sha256'] for rel, info in hash_files(rels, self.root, self.cache).items()}
+
+    def stage_key(self, stage: Stage) -> Dict:
+        code = sorted(str(p.relative_to(self.root).as_posix())
+                      for p in local_imports(self.root / stage.script))
+        inputs = [i for i in stage.inputs if not any(_under(i, o) for o in stage.outputs)]
+        material = {
+            'command': stage.command(self.params)[1:],
+            'params': {p: self.params[p] for p in stage.params},
+            'code': self._hash_paths(code),
+            'inputs': {rel: h for rel, h in self._hash_paths(inputs, DEFAULT_EXCLUDE).items()
+                       if not any(_under(rel, o) for o in stage.outputs)},
+        }
+        blob = json.dumps(material, sort_keys=True).encode('utf-8')
+        return {'key': hashlib.sha256(blob).hexdigest(), 'files': len(material['inputs'])}
+
+    def feeds(self, a: str, b: str) -> bool:
+        """Vrai si une sortie de ``a`` est une entrée de ``b``."""
+        sa, sb = self.stages[a], self.stages[b]
+        return any(_under(o, i) or _under(i, o) for o in sa.outputs for i in sb.inputs)
+
+    def missing_sources(self, stage: Stage) -> List[str]:
+        produced = _producers(list(self.stages.values()))
+        return [i for i in stage.inputs
+                if not (self.root / i).exists() and not any(_under(i, o) for o in produced)]
+
+    def up_to_date(self, stage: Stage, key: str) -> Optional[str]:
+        """Raison de relancer, ou None si l'étape peut être sautée."""
+        prev = self.state.get(stage.name)
+        if prev is None:
+            return 'never run'
+        if prev.get('key') != key:
+            return 'inputs, code or parameters changed'
+        current = self._hash_paths(stage.outputs)
+        if current != prev.get('outputs'):
+            return 'outputs missing or modified'
+        return None
+
+    # ---- exécution ----
+    def _run_stage(self, stage: Stage) -> Dict:
+        log_path = STATE_DIR / 'logs' / f'{stage.name}.log'
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        with open(log_path, 'w', encoding='utf-8') as log:
+            proc = subprocess.run(stage.command(self.params), cwd=self.root,
+                                  stdout=log, stderr=subprocess.STDOUT)
+        return {'returncode': proc.returncode, 'seconds': time.perf_counter() - t0,
+                'log': log_path.relative_to(self.root).as_posix()}
+
+    def selection(self, only: Optional[Sequence[str]]) -> List[str]:
+        if not only:
+            return list(self.stages)
+        keep: Set[str] = set()
+
+        def add(n):
+            if n not in keep:
+                keep.add(n)
+                for m in self.deps[n]:
+                    add(m)
+        for n in only:
+            if n not in self.stages:
+                raise SystemExit(f'unknown stage {n!r} (known: {", ".join(self.stages)})')
+            add(n)
+        return [n for n in self.stages if n in keep]
+
+    def run(self, only=None, force=(), force_all=False, dry_run=False) -> bool:
+        names = self.selection(only)
+        pending = set(names)
+        done: Dict[str, str] = {}           # étape -> 'ran' | 'skipped' | 'failed' | 'blocked'
+        running = {}
+        t_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                progressed = False
+                for name in sorted(pending):
+                    deps = self.deps[name] & set(names)
+                    if any(d not in done for d in deps):
+                        continue
+                    pending.discard(name)
+                    progressed = True
+                    stage = self.stages[name]
+                    # un échec ne bloque que les dépendances de données ; ``after`` ordonne seulement
+                    bad = [d for d in deps if done[d] in ('failed', 'blocked')
+                           and self.feeds(d, name)]
+                    if bad:
+                        done[name] = 'blocked'
+                        self.report[name] = {'status': 'blocked', 'reason': f'dependency {bad[0]} {done[bad[0]]}'}
+                        continue
+                    missing = self.missing_sources(stage)
+                    if missing:
+                        done[name] = 'blocked'
+                        self.report[name] = {'status': 'blocked', 'reason': 'missing input ' + missing[0]}
+                        continue
+                    t0 = time.perf_counter()
+                    key = self.stage_key(stage)
+                    reason = 'forced' if (force_all or name in force) else self.up_to_date(stage, key['key'])
+                    check_s = time.perf_counter() - t0
+                    if reason is None:
+                        done[name] = 'skipped'
+                        self.report[name] = {'status': 'skipped', 'reason': 'up to date',
+                                             'seconds': check_s, 'input_files': key['files']}
+                        continue
+                    if dry_run:
+                        done[name] = 'skipped'
+                        self.report[name] = {'status': 'would run', 'reason': reason}
+                        continue
+                    print(f'[run] {name}: {reason}', flush=True)
+                    running[pool.submit(self._run_stage, stage)] = (name, key, reason)
+                if running:
+                    finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        name, key, reason = running.pop(fut)
+                        res = fut.result()
+                        ok = res['returncode'] == 0
+                        done[name] = 'ran' if ok else 'failed'
+                        self.report[name] = {'status': done[name], 'reason': reason,
+                                             'seconds': res['seconds'], 'log': res['log'],
+                                             'returncode': res['returncode']}
+                        if ok:
+                            self.state[name] = {'key': key['key'],
+                                                'outputs': self._hash_paths(self.stages[name].outputs),
+                                                'finished': time.time(), 'seconds': res['seconds']}
+                        print(f"[{done[name]}] {name} ({res['seconds']:.1f}s)", flush=True)
+                elif not progressed and pending:
+                    raise RuntimeError('scheduler stalled: ' + ', '.join(sorted(pending)))
+        total = time.perf_counter() - t_start
+        if not dry_run:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(STATE_PATH, json.dumps(self.state, indent=2))
+            atomic_write_text(REPORT_PATH, json.dumps({'params': self.params, 'total_seconds': total,
+                                                       'stages': self.report}, indent=2))
+            self.cache.save()
+        self.print_report(names, total)
+        # une étape bloquée (entrée source absente) est signalée mais n'est pas un échec
+        return all(self.report[n]['status'] != 'failed' for n in names)
+
+    def print_report(self, names, total):
+        print(f"\n{'stage':<18} {'status':<10} {'time':>8}  reason")
+        for n in names:
+            r = self.report.get(n, {})
+            secs = f"{r['seconds']:.2f}s" if 'seconds' in r else '-'
+            print(f"{n:<18} {r.get('status', '-'):<10} {secs:>8}  {r.get('reason', '')}")
+        print(f'total {total:.2f}s')
+
+
+def parse_params(items: Sequence[str]) -> Dict:
+    out = {}
+    for item in items or ():
+        k, v = item.split('=', 1)
+        try:
+            out[k] = int(v)
+        except ValueError:
+            out[k] = v
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the certificate pipeline, rebuilding only what changed.')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    for name in ('run', 'plan'):
+        p = sub.add_parser(name)
+        p.add_argument('--only', nargs='+', default=None, help='étapes (et leurs dépendances)')
+        p.add_argument('--set', nargs='+', default=None, metavar='KEY=VALUE', help='paramètres')
+        p.add_argument('--jobs', type=int, default=2, help='étapes simultanées')
+        if name == 'run':
+            p.add_argument('--force', nargs='+', default=(), help='relancer ces étapes')
+            p.add_argument('--force-all', action='store_true')
+    args = parser.parse_args(argv)
+
+    pipe = Pipeline(params=parse_params(args.set), jobs=args.jobs)
+    if args.cmd == 'plan':
+        for name in pipe.selection(args.only):
+            deps = ', '.join(sorted(pipe.deps[name])) or '-'
+            print(f'{name:<18} after: {deps}')
+        pipe.run(only=args.only, dry_run=True)
+        return 0
+    ok = pipe.run(only=args.only, force=set(args.force), force_all=args.force_all)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
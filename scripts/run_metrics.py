@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Lightweight per-stage timers and throughput telemetry for long runs.
+
+``RunMetrics`` accumulates wall time per named stage (T, GAP1, GAP2, ...),
+counts iterations, digits processed and bytes written, and every
+``emit_every`` iterations appends one JSON record to a JSON Lines file that
+can be tailed (``tail -f``) or plotted. Optionally, a cProfile and/or
+tracemalloc capture window can be opened for an iteration range; the
+profile is dumped next to the metrics file and summarised in the stream.
+
+With ``path=None`` every method is a cheap no-op, so scripts can call it
+unconditionally.
+
+Record fields: ``event`` ('progress', 'profile', 'tracemalloc', 'final'),
+``elapsed_s``, ``iteration``, ``d``, ``iter_per_s`` / ``digits_per_s``
+(over the last window and overall), ``bytes_written`` and ``stages``
+(per stage: total seconds, calls, seconds in the last window).
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+
+def parse_iteration_range(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    """'A:B' -> (A, B) (B exclu) ; None si vide."""
+    if not text:
+        return None
+    a, b = text.split(':', 1)
+    return int(a), int(b)
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class RunMetrics:
+    def __init__(self, path: Optional[str] = None, emit_every: int = 100,
+                 profile_range: Optional[Tuple[int, int]] = None,
+                 tracemalloc_range: Optional[Tuple[int, int]] = None,
+                 run_info: Optional[Dict] = None):
+        self.enabled = bool(path)
+        self.path = path
+        self.emit_every = max(1, int(emit_every))
+        self.profile_range = profile_range
+        self.tracemalloc_range = tracemalloc_range
+        self.stage_total: Dict[str, float] = {}
+        self.stage_calls: Dict[str, int] = {}
+        self._stage_window: Dict[str, float] = {}
+        self.iterations = 0
+        self.digits = 0
+        self.bytes_written = 0
+        self.counters: Dict[str, int] = {}
+        self._t0 = time.perf_counter()
+        self._win_t = self._t0
+        self._win_iters = 0
+        self._win_digits = 0
+        self._profiler = None
+        self._tracing = False
+        self._fh = None
+        if self.enabled:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._fh = open(path, 'a', encoding='utf-8')
+            self._write({'event': 'start', 'time': time.time(), 'run': run_info or {}})
+
+    # ---- instrumentation ----
+    def stage(self, name: str):
+        """Context manager chronométrant un étage (no-op si désactivé)."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield self
+        finally:
+            dt = time.perf_counter() - t
+            self.stage_total[name] = self.stage_total.get(name, 0.0) + dt
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+            self._stage_window[name] = self._stage_window.get(name, 0.0) + dt
+
+    def count(self, name: str, k: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + k
+
+    def add_bytes(self, k: int):
+        if self.enabled:
+            self.bytes_written += int(k)
+
+    def begin_iteration(self, iteration: int):
+        """Ouvre/ferme les fenêtres cProfile/tracemalloc selon l'itération."""
+        if not self.enabled:
+            return
+        pr = self.profile_range
+        if pr is not None:
+            if iteration == pr[0] and self._profiler is None:
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            elif iteration == pr[1] and self._profiler is not None:
+                self._finish_profile(iteration)
+        tr = self.tracemalloc_range
+        if tr is not None:
+            if iteration == tr[0] and not self._tracing:
+                tracemalloc.start()
+                self._tracing = True
+            elif iteration == tr[1] and self._tracing:
+                self._finish_tracemalloc(iteration)
+
+    def end_iteration(self, iteration: int, d: int):
+        if not self.enabled:
+            return
+        self.iterations += 1
+        self.digits += d
+        self._win_iters += 1
+        self._win_digits += d
+        if self._win_iters >= self.emit_every:
+            self.emit(iteration, d)
+
+    # ---- émission ----
+    def _write(self, record):
+        self._fh.write(json.dumps(record) + '\n')
+        self._fh.flush()
+
+    def snapshot(self, iteration: int, d: int, event: str = 'progress'):
+        now = time.perf_counter()
+        win = now - self._win_t
+        elapsed = now - self._t0
+        stages = {name: {'total_s': self.stage_total[name],
+                         'calls': self.stage_calls[name],
+                         'window_s': self._stage_window.get(name, 0.0)}
+                  for name in self.stage_total}
+        return {
+            'event': event,
+            'elapsed_s': elapsed,
+            'iteration': iteration,
+            'd': d,
+            'iter_per_s': (self._win_iters / win) if win > 0 and self._win_iters else None,
+            'digits_per_s': (self._win_digits / win) if win > 0 and self._win_iters else None,
+            'iter_per_s_overall': (self.iterations / elapsed) if elapsed > 0 else None,
+            'digits_per_s_overall': (self.digits / elapsed) if elapsed > 0 else None,
+            'bytes_written': self.bytes_written,
+            'counters': dict(self.counters),
+            'stages': stages,
+        }
+
+    def emit(self, iteration: int, d: int, event: str = 'progress'):
+        if not self.enabled:
+            return
+        self._write(self.snapshot(iteration, d, event))
+        self._win_t = time.perf_counter()
+        self._win_iters = 0
+        self._win_digits = 0
+        self._stage_window = {}
+
+    def _finish_profile(self, iteration: int):
+        self._profiler.disable()
+        prof_path = os.path.splitext(self.path)[0] + f'.iter{self.profile_range[0]}-{iteration}.prof'
+        self._profiler.dump_stats(prof_path)
+        buf = io.StringIO()
+        pstats.Stats(self._profiler, stream=buf).sort_stats('cumulative').print_stats(20)
+        self._write({'event': 'profile', 'iteration': iteration, 'range': list(self.profile_range),
+                     'file': prof_path, 'top': buf.getvalue().splitlines()[:40]})
+        self._profiler = None
+
+    def _finish_tracemalloc(self, iteration: int):
+        snap = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self._tracing = False
+        top = [str(s) for s in snap.statistics('lineno')[:15]]
+        self._write({'event': 'tracemalloc', 'iteration': iteration, 'range': list(self.tracemalloc_range),
+                     'current_bytes': current, 'peak_bytes': peak, 'top': top})
+
+    def close(self, iteration: Optional[int] = None, d: Optional[int] = None):
+        if not self.enabled or self._fh is None:
+            return
+        if self._profiler is not None:
+            self._finish_profile(iteration if iteration is not None else -1)
+        if self._tracing:
+            self._finish_tracemalloc(iteration if iteration is not None else -1)
+        self._write(self.snapshot(iteration, d, event='final'))
+        self._fh.close()
+        self._fh = None
+
+
+def add_metrics_arguments(parser):
+    """Options CLI communes (--metrics, --metrics-every, --profile-iters, --tracemalloc-iters)."""
+    parser.add_argument('--metrics', type=str, default=None,
+                        help='fichier JSON Lines de télémétrie (désactivé par défaut)')
+    parser.add_argument('--metrics-every', type=int, default=100,
+                        help='émettre un enregistrement toutes les N itérations')
+    parser.add_argument('--profile-iters', type=str, default=None,
+                        help='fenêtre cProfile A:B (itérations, B exclue)')
+    parser.add_argument('--tracemalloc-iters', type=str, default=None,
+                        help='fenêtre tracemalloc A:B (itérations, B exclue)')
+
+
+def metrics_from_args(args, run_info=None) -> RunMetrics:
+    return RunMetrics(path=args.metrics, emit_every=args.metrics_every,
+                      profile_range=parse_iteration_range(args.profile_iters),
+                      tracemalloc_range=parse_iteration_range(args.tracemalloc_iters),
+                      run_info=run_info)
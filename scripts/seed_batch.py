@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Batch reverse-and-add over many seeds with orbit-merge detection.
+
+The analysis scripts take a single ``--start``/``--n0``; checking the other
+Lychrel candidates one run at a time recomputes the same iterates over and
+over (295 -> 887 -> 1675 -> ... is the 196 thread after one step). This
+runner advances all seeds in lockstep on the shared digit step of
+trajectory_engine and keeps an index of every iterate seen so far, keyed by
+the digit bytes themselves for short iterates and by (length, blake2b-128)
+beyond ``EXACT_KEY_DIGITS`` digits:
+
+ - T^j(s) palindrome          -> seed s is resolved ('palindrome', j steps);
+ - T^j(s) == T^i(t) indexed   -> s becomes an alias of thread t with offset
+   j - i and is no longer advanced (every later iterate would coincide);
+ - otherwise the iterate is indexed and s keeps going, up to ``max_iter``.
+
+At the end aliases are resolved along their chains: an alias of a thread
+that reaches a palindrome after P steps reaches it after P + j - i steps,
+and an alias of a surviving thread is a candidate known to stay
+non-palindromic for as many more steps. Each distinct thread (root) is
+computed once, so a sweep over all seeds below 10^6 costs roughly the
+sum of the lengths of the distinct threads.
+
+Usage:
+    python seed_batch.py --seeds 196,295,394,689,879,887,1675,10677 --iterations 1000
+    python seed_batch.py --range 1:1000000 --iterations 500 --out results/seed_batch.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from run_metrics import add_metrics_arguments, metrics_from_args
+from trajectory_engine import digits_from_decimal_text, reverse_add_step
+
+EXACT_KEY_DIGITS = 32
+
+
+def iterate_key(digits) -> object:
+    """Clé d'index : les chiffres eux-mêmes (courts) ou (longueur, empreinte 128 bits)."""
+    raw = bytes(digits)
+    if len(raw) <= EXACT_KEY_DIGITS:
+        return raw
+    return len(raw), hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def parse_seeds(seeds: Optional[str] = None, seed_range: Optional[str] = None,
+                seeds_file: Optional[str] = None) -> List[int]:
+    """Germes depuis une liste 'a,b,c', un intervalle 'A:B' (B exclu) et/ou un fichier."""
+    out = []
+    if seeds:
+        out.extend(int(x) for x in seeds.replace(' ', '').split(',') if x)
+    if seed_range:
+        a, b = seed_range.split(':', 1)
+        out.extend(range(int(a), int(b)))
+    if seeds_file:
+        with open(seeds_file, 'r', encoding='utf-8') as f:
+            out.extend(int(line) for line in f if line.strip())
+    if any(s < 0 for s in out):
+        raise ValueError('seeds must be non-negative')
+    return sorted(set(out))
+
+
+class SeedBatch:
+    """Fils d'itération partagés entre germes (index des itérés vus)."""
+
+    def __init__(self, seeds: Iterable[int], max_iter: int = 1000, metrics=None):
+        self.seeds = list(seeds)
+        self.max_iter = max_iter
+        self.metrics = metrics
+        self.index: Dict[object, Tuple[int, int]] = {}      # clé -> (germe, itération)
+        # germe -> ('palindrome', j) | ('alias', cible, j, i) | ('candidate', j)
+        self.status: Dict[int, Tuple] = {}
+        self.steps_computed = 0
+
+    def run(self, report_every: int = 0):
+        m = self.metrics
+        active: List[Tuple[int, bytearray]] = []
+        for s in self.seeds:
+            digits = digits_from_decimal_text(str(s))
+            key = iterate_key(digits)
+            if key in self.index:          # impossible pour des germes distincts
+                t, i = self.index[key]
+                self.status[s] = ('alias', t, 0, i)
+                continue
+            self.index[key] = (s, 0)
+            active.append((s, digits))
+        t0 = time.time()
+        for j in range(1, self.max_iter + 1):
+            if not active:
+                break
+            if m is not None:
+                m.begin_iteration(j)
+            nxt = []
+            longest = 0
+            for s, digits in active:
+                digits, _ = reverse_add_step(digits)
+                self.steps_computed += 1
+                if digits == digits[::-1]:
+                    self.status[s] = ('palindrome', j)
+                    continue
+                key = iterate_key(digits)
+                hit = self.index.get(key)
+                if hit is not None:
+                    self.status[s] = ('alias', hit[0], j, hit[1])
+                    continue
+                self.index[key] = (s, j)
+                nxt.append((s, digits))
+                if len(digits) > longest:
+                    longest = len(digits)
+            active = nxt
+            if m is not None:
+                m.count('thread_steps', len(active))
+                m.end_iteration(j, longest)
+            if report_every and j % report_every == 0:
+                print(f'step {j}: {len(active)} active threads, {len(self.index)} indexed iterates, '
+                      f'{time.time() - t0:.1f}s', flush=True)
+        for s, _ in active:
+            self.status[s] = ('candidate', self.max_iter)
+        return self
+
+    def resolve(self, s: int) -> Dict:
+        """Statut final de ``s`` en suivant la chaîne d'alias."""
+        offset = 0
+        chain = []
+        cur = s
+        st = self.status[cur]
+        while st[0] == 'alias':
+            _, t, j, i = st
+            offset += j - i
+            chain.append(t)
+            cur = t
+            st = self.status[cur]
+        rec = {'seed': s, 'root': cur}
+        if st[0] == 'palindrome':
+            rec['status'] = 'palindrome'
+            rec['steps'] = st[1] + offset
+        else:
+            rec['status'] = 'candidate'
+            rec['checked_steps'] = st[1] + offset
+        if chain:
+            first = self.status[s]
+            rec['merged_into'] = first[1]
+            rec['merge_step'] = first[2]
+            rec['merge_target_step'] = first[3]
+        return rec
+
+    def summary(self) -> Dict:
+        counts = {'palindrome': 0, 'candidate': 0}
+        merged = 0
+        roots: Dict[int, List[int]] = {}
+        max_steps = None
+        for s in self.seeds:
+            rec = self.resolve(s)
+            counts[rec['status']] += 1
+            if 'merged_into' in rec:
+                merged += 1
+            if rec['status'] == 'candidate':
+                roots.setdefault(rec['root'], []).append(s)
+            elif max_steps is None or rec['steps'] > max_steps[1]:
+                max_steps = (s, rec['steps'])
+        return {
+            'seeds': len(self.seeds),
+            'max_iterations': self.max_iter,
+            'palindromic': counts['palindrome'],
+            'candidates': counts['candidate'],
+            'merged_seeds': merged,
+            'distinct_threads': len(self.seeds) - merged,
+            'thread_steps_computed': self.steps_computed,
+            'indexed_iterates': len(self.index),
+            'slowest_palindromic': {'seed': max_steps[0], 'steps': max_steps[1]} if max_steps else None,
+            # fils survivants, nommés par leur plus petit germe (la racine est le
+            # germe dont l'itéré a été indexé le premier)
+            'candidate_threads': sorted(({'seed': seeds[0], 'root': r, 'members': len(seeds),
+                                          'seeds': seeds} for r, seeds in roots.items()),
+                                        key=lambda t: t['seed']),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-seed reverse-and-add with orbit-merge detection.')
+    parser.add_argument('--seeds', type=str, default=None, help='liste de germes a,b,c')
+    parser.add_argument('--range', dest='seed_range', type=str, default=None,
+                        help='intervalle de germes A:B (B exclu)')
+    parser.add_argument('--seeds-file', type=str, default=None, help='un germe par ligne')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--out', type=str, default=None, help='résumé JSON')
+    parser.add_argument('--details', type=str, default=None, help='statut par germe (JSON Lines)')
+    parser.add_argument('--report-every', type=int, default=100)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    seeds = parse_seeds(args.seeds, args.seed_range, args.seeds_file)
+    if not seeds:
+        parser.error('no seeds given (--seeds, --range or --seeds-file)')
+    m = metrics_from_args(args, run_info={'script': 'seed_batch', 'seeds': len(seeds),
+                                          'iterations': args.iterations})
+    t0 = time.time()
+    batch = SeedBatch(seeds, args.iterations, metrics=m).run(args.report_every)
+    summary = batch.summary()
+    summary['elapsed_seconds'] = time.time() - t0
+    m.close(args.iterations, None)
+
+    print(f"{summary['seeds']} seeds: {summary['palindromic']} palindromic, "
+          f"{summary['candidates']} candidates after {args.iterations} steps")
+    print(f"{summary['distinct_threads']} distinct threads computed "
+          f"({summary['merged_seeds']} seeds merged), {summary['thread_steps_computed']} steps")
+    for thread in summary['candidate_threads'][:50]:
+        members = thread['seeds']
+        shown = ', '.join(map(str, members[:12])) + (' ...' if len(members) > 12 else '')
+        print(f"  thread {thread['seed']}: {len(members)} seeds ({shown})")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f'Summary saved to {args.out}')
+    if args.details:
+        os.makedirs(os.path.dirname(args.details) or '.', exist_ok=True)
+        with open(args.details, 'w', encoding='utf-8') as f:
+            for s in seeds:
+                f.write(json.dumps(batch.resolve(s)) + '\n')
+        print(f'Per-seed details saved to {args.details}')
+
+
+if __name__ == '__main__':
+    main()
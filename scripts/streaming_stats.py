@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Constant-memory aggregators for long GAP runs.
+
+The GAP testers used to append one dict per iteration to
+``results[...]['statistics']`` and ``results['trajectory']`` and scan those
+lists at the end, so memory (and the saved JSON) grew linearly with the
+number of iterations. This module provides online replacements:
+
+ - ``RunningStats``     : Welford mean/variance, min/max with arg-min/arg-max;
+ - ``CategoryCounts``   : class-count histogram;
+ - ``ReservoirSample``  : fixed-size uniform sample of violation records
+                          (plus the exact total count);
+ - ``JsonLinesStream``  : optional per-iteration detail, one JSON per line;
+ - ``GapRunAggregator`` : the GAP1/GAP2/GAP3 bookkeeping shared by
+                          ``EnhancedGapTester`` and ``UltimateGapTesterFast``.
+
+Everything here is O(1) in the number of iterations.
+"""
+import json
+import math
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+
+class RunningStats:
+    """Moments en ligne (Welford) avec min/max et leurs itérations."""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max', 'argmin', 'argmax')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.argmin = None
+        self.argmax = None
+
+    def add(self, x, key=None):
+        if x is None:
+            return
+        x = float(x)
+        if not math.isfinite(x):
+            return
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+            self.argmin = key
+        if x > self.max:
+            self.max = x
+            self.argmax = key
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min,
+            'argmin': self.argmin,
+            'max': self.max,
+            'argmax': self.argmax,
+        }
+
+
+class CategoryCounts(dict):
+    """Histogramme de catégories (dict cat -> effectif)."""
+
+    def add(self, cat, k: int = 1):
+        self[cat] = self.get(cat, 0) + k
+
+    @property
+    def total(self) -> int:
+        return sum(self.values())
+
+
+class ReservoirSample:
+    """Échantillon uniforme de taille fixe (algorithme R) + compteur exact.
+
+    The first ``keep_first`` records are always kept so the earliest
+    violation stays visible in the report; the rest of the capacity is a
+    uniform reservoir over the remaining stream.
+    """
+
+    def __init__(self, size: int = 100, keep_first: int = 10, seed: int = 0):
+        self.size = int(size)
+        self.keep_first = min(int(keep_first), self.size)
+        self.count = 0
+        self.first: List[Any] = []
+        self.reservoir: List[Any] = []
+        self._seen_after_first = 0
+        self._rng = random.Random(seed)
+
+    def add(self, item):
+        self.count += 1
+        if len(self.first) < self.keep_first:
+            self.first.append(item)
+            return
+        cap = self.size - self.keep_first
+        if cap <= 0:
+            return
+        self._seen_after_first += 1
+        if len(self.reservoir) < cap:
+            self.reservoir.append(item)
+        else:
+            j = self._rng.randrange(self._seen_after_first)
+            if j < cap:
+                self.reservoir[j] = item
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_list(self) -> List[Any]:
+        items = self.first + self.reservoir
+        if items and isinstance(items[0], dict) and 'iteration' in items[0]:
+            items = sorted(items, key=lambda r: r['iteration'])
+        return items
+
+
+class JsonLinesStream:
+    """Flux optionnel de détails par itération (JSON Lines)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._fh = open(path, 'w', encoding='utf-8')
+        self.records = 0
+        self.bytes_written = 0
+
+    def write(self, record: Dict[str, Any]) -> int:
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        self._fh.write(line)
+        self.records += 1
+        nbytes = len(line.encode('utf-8'))
+        self.bytes_written += nbytes
+        return nbytes
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class GapRunAggregator:
+    """Agrégats en ligne GAP1/GAP2/GAP3 pour les testeurs 3 GAPS."""
+
+    def __init__(self, sample_size: int = 100, seed: int = 0,
+                 detail_path: Optional[str] = None):
+        self.iterations = 0
+        self.length = RunningStats()
+        # GAP 1
+        self.gap1_tested = 0
+        self.gap1_verified = 0
+        self.gap1_C_bound_satisfied = 0
+        self.gap1_delta_ext = RunningStats()
+        self.gap1_transfer = RunningStats()
+        self.gap1_ratio = RunningStats()
+        self.gap1_violations = ReservoirSample(sample_size, seed=seed)
+        self.gap1_C_bound_violations = ReservoirSample(sample_size, seed=seed + 1)
+        # GAP 2
+        self.gap2_checked = 0
+        self.gap2_failures = ReservoirSample(sample_size, seed=seed + 2)
+        self.gap2_extended: Dict[str, CategoryCounts] = {}
+        self.gap2_primes: Dict[str, CategoryCounts] = {}
+        self.gap2_extended_samples = 0
+        self.gap2_prime_samples = 0
+        # GAP 3
+        self.gap3_classes = CategoryCounts()
+        self.gap3_violations = ReservoirSample(sample_size, seed=seed + 3)
+        self.details = JsonLinesStream(detail_path) if detail_path else None
+
+    # ---- alimentation par itération ----
+    def add_iteration(self, iteration: int, length: int):
+        self.iterations += 1
+        self.length.add(length, iteration)
+
+    def add_gap1(self, iteration: int, Delta_ext, transfer, ratio, verified: bool,
+                 C_bound_satisfied: Optional[bool] = None):
+        self.gap1_tested += 1
+        self.gap1_delta_ext.add(Delta_ext, iteration)
+        self.gap1_transfer.add(transfer, iteration)
+        self.gap1_ratio.add(ratio, iteration)
+        if verified:
+            self.gap1_verified += 1
+        if C_bound_satisfied is None or C_bound_satisfied:
+            self.gap1_C_bound_satisfied += 1
+
+    def add_gap2(self, failure: Optional[Dict[str, Any]] = None):
+        self.gap2_checked += 1
+        if failure is not None:
+            self.gap2_failures.add(failure)
+
+    def add_gap2_extended(self, results: Dict[str, bool]):
+        self.gap2_extended_samples += 1
+        for mod, obstruction in results.items():
+            self.gap2_extended.setdefault(mod, CategoryCounts()).add('true' if obstruction else 'false')
+
+    def add_gap2_primes(self, results: Dict[str, bool]):
+        self.gap2_prime_samples += 1
+        for mod, obstruction in results.items():
+            self.gap2_primes.setdefault(mod, CategoryCounts()).add('true' if obstruction else 'false')
+
+    def add_gap3(self, iteration: int, cls: str):
+        self.gap3_classes.add(cls)
+
+    def write_detail(self, record: Dict[str, Any]) -> int:
+        if self.details is not None:
+            return self.details.write(record)
+        return 0
+
+    def close(self):
+        if self.details is not None:
+            self.details.close()
+
+    # ---- résumé ----
+    def gap1_summary(self, with_C_bound: bool = True) -> Dict[str, Any]:
+        tested = self.gap1_tested
+        summary = {
+            'violations': self.gap1_violations.count,
+            'total_tested': tested,
+            'total_verified': self.gap1_verified,
+            'success_rate': (self.gap1_verified / tested * 100) if tested else 0,
+            'avg_transfer': self.gap1_transfer.mean if self.gap1_transfer.count else None,
+            'avg_delta': self.gap1_delta_ext.mean if self.gap1_delta_ext.count else None,
+            'min_ratio': self.gap1_ratio.min if self.gap1_ratio.count else None,
+            'avg_ratio': self.gap1_ratio.mean if self.gap1_ratio.count else None,
+            'transfer_stats': self.gap1_transfer.to_dict(),
+            'delta_ext_stats': self.gap1_delta_ext.to_dict(),
+            'ratio_stats': self.gap1_ratio.to_dict(),
+        }
+        if with_C_bound:
+            summary['C_bound_violations'] = self.gap1_C_bound_violations.count
+            summary['C_bound_satisfied'] = self.gap1_C_bound_satisfied
+            summary['C_bound_success_rate'] = (self.gap1_C_bound_satisfied / tested * 100) if tested else 0
+        return summary
+
+    @staticmethod
+    def _mod_counts(table: Dict[str, CategoryCounts]) -> Dict[str, Dict[str, int]]:
+        return {mod: {'true': c.get('true', 0), 'false': c.get('false', 0)} for mod, c in table.items()}
+
+    def extended_summary(self) -> Dict[str, Dict[str, int]]:
+        return self._mod_counts(self.gap2_extended)
+
+    def prime_summary(self) -> Dict[str, Dict[str, int]]:
+        return self._mod_counts(self.gap2_primes)
@@ -22,6 +22,11 @@ import math
 from datetime import datetime
 from typing import List, Tuple, Optional, Dict
 
+from asymmetry_metrics import WeightedAsymmetry, compare_difference, approx_difference, compact_number
+from streaming_stats import GapRunAggregator
+from palindrome_automaton import mod2_obstruction
+from run_metrics import RunMetrics, add_metrics_arguments, metrics_from_args
+
 # -------------------------
 # UTILITAIRES ENTIER RAPIDES
 # -------------------------
@@ -144,18 +149,9 @@ def compute_asymmetries_enhanced(digits_n: List[int], digits_Tn: List[int],
     A_ext_n = abs(digits_n[0] - digits_n[d_n - 1])
     A_ext_Tn = abs(digits_Tn[0] - digits_Tn[d_Tn - 1])
 
-    # A_int
-    A_int_n = 0
-    pow2 = 1
-    for i in range(1, d_n // 2):
-        A_int_n += pow2 * abs(digits_n[i] - digits_n[d_n - 1 - i])
-        pow2 <<= 1
-
-    A_int_Tn = 0
-    pow2 = 1
-    for i in range(1, d_Tn // 2):
-        A_int_Tn += pow2 * abs(digits_Tn[i] - digits_Tn[d_Tn - 1 - i])
-        pow2 <<= 1
+    # A_int : profil creux (positions asymétriques + amplitudes), sans bigint
+    A_int_n = WeightedAsymmetry.from_digits(digits_n)
+    A_int_Tn = WeightedAsymmetry.from_digits(digits_Tn)
 
     # A_carry
     A_carry_twice = 0
@@ -170,8 +166,10 @@ def compute_asymmetries_enhanced(digits_n: List[int], digits_Tn: List[int],
         A_carry_twice += 2
 
     A_carry_Tn = A_carry_twice / 2.0
-    A_robust_n = A_ext_n + A_int_n
-    A_robust_Tn = A_ext_Tn + A_int_Tn + A_carry_Tn
+    # A_robust / Delta_int en float (approximation log-domaine) pour l'affichage ;
+    # les décisions GAP1/GAP3 utilisent les comparaisons exactes sur les profils.
+    A_robust_n = A_ext_n + A_int_n.to_float()
+    A_robust_Tn = A_ext_Tn + A_int_Tn.to_float() + A_carry_Tn
     
     # NOUVEAU: Calcul de C(d)
     C_d = compute_C_bound(d_n)
@@ -181,7 +179,7 @@ def compute_asymmetries_enhanced(digits_n: List[int], digits_Tn: List[int],
         'T_n': {'A_ext': A_ext_Tn, 'A_int': A_int_Tn, 'A_carry': A_carry_Tn, 'A_robust': A_robust_Tn},
         'deltas': {
             'Delta_ext': A_ext_n - A_ext_Tn, 
-            'Delta_int': A_int_Tn - A_int_n, 
+            'Delta_int': approx_difference(A_int_Tn, A_int_n), 
             'Delta_carry': A_carry_Tn
         },
         'C_d': C_d  # NOUVEAU
@@ -191,33 +189,8 @@ def compute_asymmetries_enhanced(digits_n: List[int], digits_Tn: List[int],
 # GAP 2: Obstruction mod 2 (original)
 # -------------------------
 def check_palindrome_obstruction_mod2_fast(n: int) -> Tuple[bool, Optional[List[int]]]:
-    """Version originale conservée"""
-    digits = number_to_digits_int(n)
-    d = len(digits)
-    carries = [0] * (d + 1)
-    result_digits = [0] * (d + 1)
-
-    for i in range(d):
-        j = d - 1 - i
-        s = digits[i] + digits[j] + carries[i]
-        result_digits[i] = s % 10
-        carries[i + 1] = s // 10
-
-    L = d
-    if carries[d] > 0:
-        result_digits[d] = carries[d]
-        L = d + 1
-
-    is_pal = True
-    for i in range(L // 2):
-        if result_digits[i] != result_digits[L - 1 - i]:
-            is_pal = False
-            break
-
-    if is_pal:
-        return False, carries[:d+1]
-    else:
-        return True, None
+    """Version originale conservée (décidée par l'automate palindrome_automaton)"""
+    return mod2_obstruction(n)
 
 # -------------------------
 # CLASS ENHANCED
@@ -225,13 +198,21 @@ def check_palindrome_obstruction_mod2_fast(n: int) -> Tuple[bool, Optional[List[
 class EnhancedGapTester:
     def __init__(self, n0: int = 196, max_iterations: int = 10000, 
                  max_digits: int = 1000, test_extended_hensel: bool = True,
-                 test_other_primes: bool = True):
+                 test_other_primes: bool = True, sample_size: int = 100,
+                 detail_path: Optional[str] = None,
+                 metrics: Optional[RunMetrics] = None):
         self.n0 = int(n0)
         self.max_iterations = int(max_iterations)
         self.max_digits = int(max_digits)
         self.test_extended_hensel = test_extended_hensel
         self.test_other_primes = test_other_primes
+        self.detail_path = detail_path
         
+        # Agrégats en ligne (mémoire O(1)) ; le détail par itération est
+        # optionnel et part dans un flux JSON Lines séparé (detail_path).
+        self.agg = GapRunAggregator(sample_size=sample_size, detail_path=detail_path)
+        # Télémétrie par étage (no-op si aucun fichier --metrics)
+        self.metrics = metrics if metrics is not None else RunMetrics()
         self.results = {
             'config': {
                 'n0': self.n0,
@@ -239,27 +220,15 @@ class EnhancedGapTester:
                 'max_digits': self.max_digits,
                 'extended_hensel': self.test_extended_hensel,
                 'other_primes': self.test_other_primes,
+                'sample_size': sample_size,
+                'detail_file': detail_path,
                 'start_time': datetime.now().isoformat()
-            },
-            'gap1_transfer': {
-                'violations': [], 
-                'statistics': [],
-                'C_bound_violations': []  # NOUVEAU
-            },
-            'gap2_hensel': {
-                'obstructions_found': [], 
-                'checked': 0,
-                'extended_tests': [],  # NOUVEAU
-                'prime_tests': []  # NOUVEAU
-            },
-            'gap3_invariance': {
-                'violations': [], 
-                'statistics': []
-            },
-            'trajectory': []
+            }
         }
 
     def classify_number(self, A_ext, A_int):
+        # A_int : entier ou profil WeightedAsymmetry (seul A_int >= 1 compte)
+        A_int = 1 if A_int else 0
         if A_ext >= 2:
             return "I"
         elif A_ext == 1 and A_int >= 1:
@@ -282,166 +251,173 @@ class EnhancedGapTester:
             'gap2_extended_ok': True,  # NOUVEAU
             'gap3_ok': True
         }
+        m = self.metrics
 
         # ===== GAP 1: Test Original + Test C(d) =====
-        Delta_ext = details['deltas']['Delta_ext']
-        Delta_int = details['deltas']['Delta_int']
-        Delta_carry = details['deltas']['Delta_carry']
+        with m.stage('GAP1'):
+            Delta_ext = details['deltas']['Delta_ext']
+            Delta_int = details['deltas']['Delta_int']
+            Delta_carry = details['deltas']['Delta_carry']
 
-        if Delta_ext > 0:
-            result['gap1_tested'] = True
-            
-            # Test original (floor bound)
-            expected_transfer = Delta_ext // 2
-            actual_transfer = Delta_int + Delta_carry
-            if actual_transfer < expected_transfer:
-                result['gap1_ok'] = False
-                self.results['gap1_transfer']['violations'].append({
-                    'iteration': iteration,
-                    'Delta_ext': Delta_ext,
-                    'expected': expected_transfer,
-                    'actual': actual_transfer,
-                    'deficit': expected_transfer - actual_transfer
-                })
-            
-            # NOUVEAU: Test borne C(d)
-            A_ext_n = details['n']['A_ext']
-            C_d = details['C_d']
-            A_robust_Tn = details['T_n']['A_robust']
+            if Delta_ext > 0:
+                result['gap1_tested'] = True
             
-            # Si A_ext(n) > C(d), alors A_robust(T(n)) devrait être ≥ A_ext(n) - C(d)
-            if A_ext_n > C_d:
-                expected_min = A_ext_n - C_d
-                if A_robust_Tn < expected_min:
-                    result['gap1_C_bound_ok'] = False
-                    self.results['gap1_transfer']['C_bound_violations'].append({
+                # Test original (floor bound) : Delta_int + Delta_carry >= expected,
+                # décidé exactement sur les profils A_int
+                expected_transfer = Delta_ext // 2
+                actual_transfer = Delta_int + Delta_carry
+                verified = compare_difference(details['T_n']['A_int'], details['n']['A_int'],
+                                              Delta_carry - expected_transfer) >= 0
+                if not verified:
+                    result['gap1_ok'] = False
+                    self.agg.gap1_violations.add({
                         'iteration': iteration,
-                        'd': len(str(n)),
-                        'A_ext_n': A_ext_n,
-                        'C_d': C_d,
-                        'A_robust_Tn': A_robust_Tn,
-                        'expected_min': expected_min,
-                        'deficit': expected_min - A_robust_Tn
+                        'Delta_ext': Delta_ext,
+                        'expected': expected_transfer,
+                        'actual': compact_number(actual_transfer),
+                        'deficit': compact_number(expected_transfer - actual_transfer)
                     })
             
-            self.results['gap1_transfer']['statistics'].append({
-                'iteration': iteration,
-                'Delta_ext': Delta_ext,
-                'transfer': actual_transfer,
-                'ratio': (actual_transfer / Delta_ext) if Delta_ext != 0 else None,
-                'verified': actual_transfer >= expected_transfer,
-                'C_d': C_d,  # NOUVEAU
-                'C_bound_satisfied': result['gap1_C_bound_ok']  # NOUVEAU
-            })
+                # NOUVEAU: Test borne C(d)
+                A_ext_n = details['n']['A_ext']
+                C_d = details['C_d']
+                A_robust_Tn = details['T_n']['A_robust']
+            
+                # Si A_ext(n) > C(d), alors A_robust(T(n)) devrait être ≥ A_ext(n) - C(d)
+                if A_ext_n > C_d:
+                    expected_min = A_ext_n - C_d
+                    if not details['T_n']['A_int'].at_least(
+                            expected_min - details['T_n']['A_ext'] - details['T_n']['A_carry']):
+                        result['gap1_C_bound_ok'] = False
+                        self.agg.gap1_C_bound_violations.add({
+                            'iteration': iteration,
+                            'd': len(str(n)),
+                            'A_ext_n': A_ext_n,
+                            'C_d': C_d,
+                            'A_robust_Tn': compact_number(A_robust_Tn),
+                            'expected_min': expected_min,
+                            'deficit': compact_number(expected_min - A_robust_Tn)
+                        })
+            
+                ratio = actual_transfer / Delta_ext
+                gap1_stat = {
+                    'iteration': iteration,
+                    'Delta_ext': Delta_ext,
+                    'transfer': actual_transfer if math.isfinite(actual_transfer) else None,
+                    'ratio': ratio if math.isfinite(ratio) else None,
+                    'verified': verified,
+                    'C_d': C_d,  # NOUVEAU
+                    'C_bound_satisfied': result['gap1_C_bound_ok']  # NOUVEAU
+                }
+                self.agg.add_gap1(iteration, Delta_ext, gap1_stat['transfer'], gap1_stat['ratio'],
+                                  verified, result['gap1_C_bound_ok'])
+            else:
+                gap1_stat = None
 
         # ===== GAP 2: Test Original =====
-        has_obstruction, carries_cfg = check_palindrome_obstruction_mod2_fast(n)
-        self.results['gap2_hensel']['checked'] += 1
-        if not has_obstruction:
-            result['gap2_ok'] = False
-            self.results['gap2_hensel']['obstructions_found'].append({
-                'iteration': iteration,
-                'number': n,
-                'carries': carries_cfg
-            })
+        with m.stage('GAP2'):
+            has_obstruction, carries_cfg = check_palindrome_obstruction_mod2_fast(n)
+            if not has_obstruction:
+                result['gap2_ok'] = False
+                self.agg.add_gap2({
+                    'iteration': iteration,
+                    'number': n,
+                    'carries': carries_cfg
+                })
+            else:
+                self.agg.add_gap2()
 
         # NOUVEAU: Tests Hensel étendus (mod 2^k, k=2-6)
+        extended_results = prime_results = None
         if self.test_extended_hensel and iteration % 10 == 0:  # Tester tous les 10 itérations
-            extended_results = {}
-            for k in range(2, 7):  # k = 2, 3, 4, 5, 6
-                obstruction = check_hensel_mod_pk(n, 2, k)
-                extended_results[f'mod_2^{k}'] = obstruction
-                if not obstruction:
-                    result['gap2_extended_ok'] = False
+            with m.stage('GAP2_ext_2k'):
+                extended_results = {}
+                for k in range(2, 7):  # k = 2, 3, 4, 5, 6
+                    obstruction = check_hensel_mod_pk(n, 2, k)
+                    extended_results[f'mod_2^{k}'] = obstruction
+                    if not obstruction:
+                        result['gap2_extended_ok'] = False
             
-            self.results['gap2_hensel']['extended_tests'].append({
-                'iteration': iteration,
-                'results': extended_results
-            })
+                self.agg.add_gap2_extended(extended_results)
         
         # NOUVEAU: Tests autres premiers (mod 5, 7, 11)
         if self.test_other_primes and iteration % 20 == 0:  # Tester tous les 20 itérations
-            prime_results = {}
-            for p in [5, 7, 11]:
-                obstruction = check_hensel_mod_pk(n, p, 1)
-                prime_results[f'mod_{p}'] = obstruction
+            with m.stage('GAP2_primes'):
+                prime_results = {}
+                for p in [5, 7, 11]:
+                    obstruction = check_hensel_mod_pk(n, p, 1)
+                    prime_results[f'mod_{p}'] = obstruction
             
-            self.results['gap2_hensel']['prime_tests'].append({
-                'iteration': iteration,
-                'results': prime_results
-            })
+                self.agg.add_gap2_primes(prime_results)
 
         # ===== GAP 3: Test Original =====
-        A_ext_n = details['n']['A_ext']
-        A_int_n = details['n']['A_int']
-        A_ext_Tn = details['T_n']['A_ext']
-        A_int_Tn = details['T_n']['A_int']
-
-        in_validated_class = (A_ext_n >= 1) or (A_int_n >= 1)
-        if not in_validated_class:
-            result['gap3_ok'] = False
-            self.results['gap3_invariance']['violations'].append({
-                'iteration': iteration,
-                'A_ext': A_ext_n,
-                'A_int': A_int_n,
-                'message': 'Sorti des classes validées'
-            })
-
-        self.results['gap3_invariance']['statistics'].append({
-            'iteration': iteration,
-            'A_ext_n': A_ext_n,
-            'A_int_n': A_int_n,
-            'A_ext_Tn': A_ext_Tn,
-            'A_int_Tn': A_int_Tn,
-            'class': self.classify_number(A_ext_n, A_int_n)
-        })
+        with m.stage('GAP3'):
+            A_ext_n = details['n']['A_ext']
+            A_int_n = details['n']['A_int']
+            A_ext_Tn = details['T_n']['A_ext']
+            A_int_Tn = details['T_n']['A_int']
+
+            in_validated_class = (A_ext_n >= 1) or bool(A_int_n)
+            if not in_validated_class:
+                result['gap3_ok'] = False
+                self.agg.gap3_violations.add({
+                    'iteration': iteration,
+                    'A_ext': A_ext_n,
+                    'A_int': A_int_n.to_json(),
+                    'message': 'Sorti des classes validées'
+                })
 
-        return result
+            cls = self.classify_number(A_ext_n, A_int_n)
+            self.agg.add_iteration(iteration, result['length'])
+            self.agg.add_gap3(iteration, cls)
 
-    def compute_statistics(self):
-        """Calcul statistiques améliorées"""
-        gap1_stats = self.results['gap1_transfer']['statistics']
-        if gap1_stats:
-            valid_stats = [s for s in gap1_stats if s['Delta_ext'] > 0]
-            if valid_stats:
-                transfers = [s['transfer'] for s in valid_stats]
-                deltas = [s['Delta_ext'] for s in valid_stats]
-                verified_count = sum(1 for s in valid_stats if s['verified'])
-                C_bound_satisfied_count = sum(1 for s in valid_stats if s.get('C_bound_satisfied', True))
-                
-                self.results['gap1_transfer']['summary'] = {
-                    'violations': len(self.results['gap1_transfer']['violations']),
-                    'C_bound_violations': len(self.results['gap1_transfer']['C_bound_violations']),
-                    'total_tested': len(valid_stats),
-                    'total_verified': verified_count,
-                    'C_bound_satisfied': C_bound_satisfied_count,
-                    'success_rate': (verified_count / len(valid_stats) * 100) if len(valid_stats) else 0,
-                    'C_bound_success_rate': (C_bound_satisfied_count / len(valid_stats) * 100) if len(valid_stats) else 0,
-                    'avg_transfer': sum(transfers) / len(transfers),
-                    'avg_delta': sum(deltas) / len(deltas),
-                    'min_ratio': min(s['ratio'] for s in valid_stats if s['ratio'] is not None),
-                    'avg_ratio': sum(s['ratio'] for s in valid_stats if s['ratio'] is not None) / len(valid_stats)
-                }
+        if self.agg.details is not None:
+            with m.stage('IO'):
+                m.add_bytes(self.agg.write_detail({
+                    'iteration': iteration,
+                    'trajectory': result,
+                    'gap1': gap1_stat,
+                    'gap2_extended': extended_results,
+                    'gap2_primes': prime_results,
+                    'gap3': {
+                        'A_ext_n': A_ext_n,
+                        'A_int_n': A_int_n.to_json(),
+                        'A_ext_Tn': A_ext_Tn,
+                        'A_int_Tn': A_int_Tn.to_json(),
+                        'class': cls
+                    }
+                }))
 
-        # GAP 2 extended
-        extended_tests = self.results['gap2_hensel']['extended_tests']
-        if extended_tests:
-            all_obstructions = {}
-            for test in extended_tests:
-                for mod, result in test['results'].items():
-                    if mod not in all_obstructions:
-                        all_obstructions[mod] = {'true': 0, 'false': 0}
-                    all_obstructions[mod]['true' if result else 'false'] += 1
-            
-            self.results['gap2_hensel']['extended_summary'] = all_obstructions
+        return result
 
-        # GAP 3 distribution
-        gap3_stats = self.results['gap3_invariance']['statistics']
-        class_distribution = {}
-        for stat in gap3_stats:
-            cls = stat['class']
-            class_distribution[cls] = class_distribution.get(cls, 0) + 1
-        self.results['gap3_invariance']['class_distribution'] = class_distribution
+    def compute_statistics(self):
+        """Résumé final à partir des agrégats en ligne (aucune liste à rescanner)"""
+        agg = self.agg
+        self.results['gap1_transfer'] = {
+            'violations': agg.gap1_violations.to_list(),
+            'C_bound_violations': agg.gap1_C_bound_violations.to_list(),
+            'summary': agg.gap1_summary(with_C_bound=True)
+        }
+        self.results['gap2_hensel'] = {
+            'checked': agg.gap2_checked,
+            'obstructions_found': agg.gap2_failures.to_list(),
+            'obstructions_found_count': agg.gap2_failures.count,
+            'extended_samples': agg.gap2_extended_samples,
+            'extended_summary': agg.extended_summary(),
+            'prime_samples': agg.gap2_prime_samples,
+            'prime_summary': agg.prime_summary()
+        }
+        self.results['gap3_invariance'] = {
+            'violations': agg.gap3_violations.to_list(),
+            'violation_count': agg.gap3_violations.count,
+            'class_distribution': dict(agg.gap3_classes)
+        }
+        self.results['trajectory'] = {
+            'iterations': agg.iterations,
+            'length': agg.length.to_dict(),
+            'detail_file': self.detail_path,
+            'detail_records': agg.details.records if agg.details is not None else 0
+        }
 
     def print_comprehensive_report(self):
         cfg = self.results['config']
@@ -453,11 +429,11 @@ class EnhancedGapTester:
         
         if elapsed is not None:
             print(f"⏱  Durée totale: {elapsed:.2f} s")
-        print(f"📊 Itérations testées: {len(self.results['trajectory'])}")
+        print(f"📊 Itérations testées: {self.agg.iterations}")
         
         print("\n--- GAP 1: Transfert Quantitatif ---")
-        g1v = len(self.results['gap1_transfer']['violations'])
-        g1c = len(self.results['gap1_transfer']['C_bound_violations'])
+        g1v = self.agg.gap1_violations.count
+        g1c = self.agg.gap1_C_bound_violations.count
         
         if 'summary' in self.results['gap1_transfer']:
             summary = self.results['gap1_transfer']['summary']
@@ -472,10 +448,10 @@ class EnhancedGapTester:
             print(f"  ⚠️  {g1c} violations de la borne C(d) détectées")
         
         print("\n--- GAP 2: Obstruction de Hensel ---")
-        g2v = len(self.results['gap2_hensel']['obstructions_found'])
+        g2v = self.agg.gap2_failures.count
         print(f"  • Obstruction mod 2: {self.results['gap2_hensel']['checked']} tests, {g2v} échecs")
         
-        if self.test_extended_hensel and 'extended_summary' in self.results['gap2_hensel']:
+        if self.test_extended_hensel and self.results['gap2_hensel']['extended_summary']:
             print(f"  • Tests étendus mod 2^k:")
             for mod, counts in self.results['gap2_hensel']['extended_summary'].items():
                 total = counts['true'] + counts['false']
@@ -483,9 +459,9 @@ class EnhancedGapTester:
                 print(f"    - {mod}: {counts['true']}/{total} obstructions ({pct:.1f}%)")
         
         if self.test_other_primes:
-            prime_tests = self.results['gap2_hensel']['prime_tests']
-            if prime_tests:
-                print(f"  • Tests autres premiers: {len(prime_tests)} échantillons testés")
+            prime_samples = self.results['gap2_hensel']['prime_samples']
+            if prime_samples:
+                print(f"  • Tests autres premiers: {prime_samples} échantillons testés")
         
         if g2v == 0:
             print(f"  ✅ Obstruction mod 2 persistante confirmée!")
@@ -493,7 +469,7 @@ class EnhancedGapTester:
             print(f"  ⚠️  {g2v} solutions palindromiques mod 2 trouvées")
         
         print("\n--- GAP 3: Invariance de Trajectoire ---")
-        g3v = len(self.results['gap3_invariance']['violations'])
+        g3v = self.agg.gap3_violations.count
         
         if 'class_distribution' in self.results['gap3_invariance']:
             print(f"  • Distribution des classes:")
@@ -513,6 +489,7 @@ class EnhancedGapTester:
         fname = f"test_3gaps_enhanced_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         with open(fname, 'w', encoding='utf-8') as f:
             json.dump(self.results, f, indent=2, ensure_ascii=False)
+            self.metrics.add_bytes(f.tell())
         print(f"📁 Résultats sauvegardés → {fname}")
 
     def run(self):
@@ -528,11 +505,14 @@ class EnhancedGapTester:
         
         start = time.time()
         current = self.n0
+        m = self.metrics
 
         for iteration in range(self.max_iterations + 1):
-            T_current, carries, details = apply_T_with_details_enhanced(current)
+            m.begin_iteration(iteration)
+            with m.stage('T'):
+                T_current, carries, details = apply_T_with_details_enhanced(current)
             r = self.test_all_gaps_enhanced(iteration, current, T_current, details)
-            self.results['trajectory'].append(r)
+            m.end_iteration(iteration, r['length'])
 
             if len(str(current)) > self.max_digits:
                 print(f"⚠️  Arrêt: longueur > {self.max_digits} chiffres (itération {iteration})")
@@ -562,9 +542,12 @@ class EnhancedGapTester:
         end = time.time()
         self.results['config']['end_time'] = datetime.now().isoformat()
         self.results['config']['elapsed_seconds'] = end - start
+        self.agg.close()
         self.compute_statistics()
         self.print_comprehensive_report()
-        self.save_results()
+        with m.stage('IO'):
+            self.save_results()
+        m.close(iteration, len(str(current)))
 
 
 def main():
@@ -581,6 +564,11 @@ def main():
                        help="Désactiver tests Hensel étendus")
     parser.add_argument("--no-other-primes", action="store_true",
                        help="Désactiver tests autres premiers")
+    parser.add_argument("--sample-size", type=int, default=100,
+                       help="Taille des échantillons de violations conservés (default: 100)")
+    parser.add_argument("--details", type=str, default=None,
+                       help="Fichier JSON Lines du détail par itération (optionnel)")
+    add_metrics_arguments(parser)
     
     args = parser.parse_args()
 
@@ -589,7 +577,11 @@ def main():
         max_iterations=args.iterations,
         max_digits=args.max_digits,
         test_extended_hensel=not args.no_extended_hensel,
-        test_other_primes=not args.no_other_primes
+        test_other_primes=not args.no_other_primes,
+        sample_size=args.sample_size,
+        detail_path=args.details,
+        metrics=metrics_from_args(args, run_info={'script': 'test_3gaps_enhanced', 'n0': args.n0,
+                                                  'iterations': args.iterations})
     )
     tester.run()
 
@@ -12,11 +12,16 @@ mais en beaucoup plus rapide (algorithmes O(d) par itération).
 
 import argparse
 import json
+import math
 import time
 from datetime import datetime
 from math import floor
 from typing import List, Tuple, Optional
 
+from asymmetry_metrics import WeightedAsymmetry, compare_difference, approx_difference, compact_number
+from streaming_stats import GapRunAggregator
+from palindrome_automaton import mod2_obstruction
+
 # -------------------------
 # UTILITAIRES ENTIER RAPIDES
 # -------------------------
@@ -92,21 +97,13 @@ def compute_asymmetries_from_digits(digits_n: List[int], digits_Tn: List[int], c
     # A_ext : différence extrémités absolue
     A_ext_n = abs(digits_n[0] - digits_n[d_n - 1])
 
-    # A_int : somme pondérée 2^(i-1) * |d_i - d_{m-1-i}| pour i>=1
-    A_int_n = 0
-    pow2 = 1
-    for i in range(1, d_n // 2):
-        # pondération = 2^(i-1)
-        A_int_n += pow2 * abs(digits_n[i] - digits_n[d_n - 1 - i])
-        pow2 <<= 1
+    # A_int : somme pondérée 2^(i-1) * |d_i - d_{m-1-i}| pour i>=1,
+    # gardée sous forme de profil creux (voir asymmetry_metrics)
+    A_int_n = WeightedAsymmetry.from_digits(digits_n)
 
     # pour T(n)
     A_ext_Tn = abs(digits_Tn[0] - digits_Tn[d_Tn - 1])
-    A_int_Tn = 0
-    pow2 = 1
-    for i in range(1, d_Tn // 2):
-        A_int_Tn += pow2 * abs(digits_Tn[i] - digits_Tn[d_Tn - 1 - i])
-        pow2 <<= 1
+    A_int_Tn = WeightedAsymmetry.from_digits(digits_Tn)
 
     # A_carry calculation:
     # dans ton script original: A_carry_Tn += 0.5 * abs(ci - cj) pour chaque position
@@ -128,13 +125,15 @@ def compute_asymmetries_from_digits(digits_n: List[int], digits_Tn: List[int], c
     # convert back to float-like value for compatibility (div by 2)
     A_carry_Tn = A_carry_twice / 2.0
 
-    A_robust_n = A_ext_n + A_int_n
-    A_robust_Tn = A_ext_Tn + A_int_Tn + A_carry_Tn
+    # valeurs float approchées pour l'affichage ; décisions exactes sur les profils
+    A_robust_n = A_ext_n + A_int_n.to_float()
+    A_robust_Tn = A_ext_Tn + A_int_Tn.to_float() + A_carry_Tn
 
     return {
         'n': {'A_ext': A_ext_n, 'A_int': A_int_n, 'A_robust': A_robust_n},
         'T_n': {'A_ext': A_ext_Tn, 'A_int': A_int_Tn, 'A_carry': A_carry_Tn, 'A_robust': A_robust_Tn},
-        'deltas': {'Delta_ext': A_ext_n - A_ext_Tn, 'Delta_int': A_int_Tn - A_int_n, 'Delta_carry': A_carry_Tn}
+        'deltas': {'Delta_ext': A_ext_n - A_ext_Tn, 'Delta_int': approx_difference(A_int_Tn, A_int_n),
+                   'Delta_carry': A_carry_Tn}
     }
 
 
@@ -143,66 +142,40 @@ def compute_asymmetries_from_digits(digits_n: List[int], digits_Tn: List[int], c
 # -------------------------
 def check_palindrome_obstruction_mod2_fast(n: int) -> Tuple[bool, Optional[List[int]]]:
     """
-    Implémentation optimisée du test MOD 2:
-    Simule l'addition n + rev(n) en déterminant les retenues successives;
-    si le résultat est un palindrome -> obstruction absente (return False, carries)
-    Sinon -> aucune assignation valide qui fasse palindrome (return True, None)
-    REMARQUE: ceci reprend la logique correcte pour l'addition base 10.
+    Test MOD 2 : T(n) = n + rev(n) peut-il être un palindrome ?
+    Décidé par l'automate de palindrome_automaton (paires lues des bords vers
+    le centre, arrêt à la première paire incompatible) :
+    palindrome -> obstruction absente (return False, carries)
+    sinon -> aucune assignation valide qui fasse palindrome (return True, None)
     """
-    digits = number_to_digits_int(n)
-    d = len(digits)
-    carries = [0] * (d + 1)
-    result_digits = [0] * (d + 1)
-
-    # simuler et déterminer retenues
-    for i in range(d):
-        j = d - 1 - i
-        s = digits[i] + digits[j] + carries[i]
-        result_digits[i] = s % 10
-        carries[i + 1] = s // 10
-
-    # gérer overflow
-    L = d
-    if carries[d] > 0:
-        result_digits[d] = carries[d]
-        L = d + 1
-
-    # vérif palindrome
-    is_pal = True
-    for i in range(L // 2):
-        if result_digits[i] != result_digits[L - 1 - i]:
-            is_pal = False
-            break
-
-    if is_pal:
-        # obstruction absente (il existe une configuration produisant un palindrome)
-        return False, carries[:d+1]
-    else:
-        # obstruction persistante mod2
-        return True, None
+    return mod2_obstruction(n)
 
 # -------------------------
 # CLASS UltimateGapTester FAST
 # -------------------------
 class UltimateGapTesterFast:
-    def __init__(self, n0: int = 196, max_iterations: int = 10000, max_digits: int = 1000):
+    def __init__(self, n0: int = 196, max_iterations: int = 10000, max_digits: int = 1000,
+                 sample_size: int = 100, detail_path: Optional[str] = None):
         self.n0 = int(n0)
         self.max_iterations = int(max_iterations)
         self.max_digits = int(max_digits)
+        self.detail_path = detail_path
+        # agrégats en ligne (mémoire O(1)) ; détail par itération optionnel (JSON Lines)
+        self.agg = GapRunAggregator(sample_size=sample_size, detail_path=detail_path)
         self.results = {
             'config': {
                 'n0': self.n0,
                 'max_iterations': self.max_iterations,
                 'max_digits': self.max_digits,
+                'sample_size': sample_size,
+                'detail_file': detail_path,
                 'start_time': datetime.now().isoformat()
-            },
-            'gap1_transfer': {'violations': [], 'statistics': []},
-            'gap2_hensel': {'obstructions_found': [], 'checked': 0},
-            'gap3_invariance': {'violations': [], 'statistics': []},
-            'trajectory': []
+            }
         }
 
     def classify_number(self, A_ext, A_int):
+        # A_int : entier ou profil WeightedAsymmetry (seul A_int >= 1 compte)
+        A_int = 1 if A_int else 0
         if A_ext >= 2:
             return "I"
         elif A_ext == 1 and A_int >= 1:
@@ -233,33 +206,40 @@ class UltimateGapTesterFast:
             result['gap1_tested'] = True
             expected_transfer = Delta_ext // 2
             actual_transfer = Delta_int + Delta_carry
-            if actual_transfer < expected_transfer:
+            verified = compare_difference(details['T_n']['A_int'], details['n']['A_int'],
+                                          Delta_carry - expected_transfer) >= 0
+            if not verified:
                 result['gap1_ok'] = False
-                self.results['gap1_transfer']['violations'].append({
+                self.agg.gap1_violations.add({
                     'iteration': iteration,
                     'Delta_ext': Delta_ext,
                     'expected': expected_transfer,
-                    'actual': actual_transfer,
-                    'deficit': expected_transfer - actual_transfer
+                    'actual': compact_number(actual_transfer),
+                    'deficit': compact_number(expected_transfer - actual_transfer)
                 })
-            self.results['gap1_transfer']['statistics'].append({
+            ratio = actual_transfer / Delta_ext
+            gap1_stat = {
                 'iteration': iteration,
                 'Delta_ext': Delta_ext,
-                'transfer': actual_transfer,
-                'ratio': (actual_transfer / Delta_ext) if Delta_ext != 0 else None,
-                'verified': actual_transfer >= expected_transfer
-            })
+                'transfer': actual_transfer if math.isfinite(actual_transfer) else None,
+                'ratio': ratio if math.isfinite(ratio) else None,
+                'verified': verified
+            }
+            self.agg.add_gap1(iteration, Delta_ext, gap1_stat['transfer'], gap1_stat['ratio'], verified)
+        else:
+            gap1_stat = None
 
         # GAP 2 (Hensel mod 2) - deterministic O(d)
         has_obstruction, carries_cfg = check_palindrome_obstruction_mod2_fast(n)
-        self.results['gap2_hensel']['checked'] += 1
         if not has_obstruction:
             result['gap2_ok'] = False
-            self.results['gap2_hensel']['obstructions_found'].append({
+            self.agg.add_gap2({
                 'iteration': iteration,
                 'number': n,
                 'carries': carries_cfg
             })
+        else:
+            self.agg.add_gap2()
 
         # GAP 3 (invariance trajectoire)
         A_ext_n = details['n']['A_ext']
@@ -267,53 +247,59 @@ class UltimateGapTesterFast:
         A_ext_Tn = details['T_n']['A_ext']
         A_int_Tn = details['T_n']['A_int']
 
-        in_validated_class = (A_ext_n >= 1) or (A_int_n >= 1)
+        in_validated_class = (A_ext_n >= 1) or bool(A_int_n)
         if not in_validated_class:
             result['gap3_ok'] = False
-            self.results['gap3_invariance']['violations'].append({
+            self.agg.gap3_violations.add({
                 'iteration': iteration,
                 'A_ext': A_ext_n,
-                'A_int': A_int_n,
+                'A_int': A_int_n.to_json(),
                 'message': 'Sorti des classes validées'
             })
 
-        self.results['gap3_invariance']['statistics'].append({
-            'iteration': iteration,
-            'A_ext_n': A_ext_n,
-            'A_int_n': A_int_n,
-            'A_ext_Tn': A_ext_Tn,
-            'A_int_Tn': A_int_Tn,
-            'class': self.classify_number(A_ext_n, A_int_n)
-        })
+        cls = self.classify_number(A_ext_n, A_int_n)
+        self.agg.add_iteration(iteration, result['length'])
+        self.agg.add_gap3(iteration, cls)
+
+        if self.agg.details is not None:
+            self.agg.write_detail({
+                'iteration': iteration,
+                'trajectory': result,
+                'gap1': gap1_stat,
+                'gap3': {
+                    'A_ext_n': A_ext_n,
+                    'A_int_n': A_int_n.to_json(),
+                    'A_ext_Tn': A_ext_Tn,
+                    'A_int_Tn': A_int_Tn.to_json(),
+                    'class': cls
+                }
+            })
 
         return result
 
     def compute_statistics(self):
-        gap1_stats = self.results['gap1_transfer']['statistics']
-        if gap1_stats:
-            valid_stats = [s for s in gap1_stats if s['Delta_ext'] > 0]
-            if valid_stats:
-                transfers = [s['transfer'] for s in valid_stats]
-                deltas = [s['Delta_ext'] for s in valid_stats]
-                verified_count = sum(1 for s in valid_stats if s['verified'])
-                self.results['gap1_transfer']['summary'] = {
-                    'violations': len(self.results['gap1_transfer']['violations']),
-                    'total_tested': len(valid_stats),
-                    'total_verified': verified_count,
-                    'success_rate': (verified_count / len(valid_stats) * 100) if len(valid_stats) else 0,
-                    'avg_transfer': sum(transfers) / len(transfers),
-                    'avg_delta': sum(deltas) / len(deltas),
-                    'min_ratio': min(s['ratio'] for s in valid_stats if s['ratio'] is not None),
-                    'avg_ratio': sum(s['ratio'] for s in valid_stats if s['ratio'] is not None) / len(valid_stats)
-                }
-
-        # gap3 distribution
-        gap3_stats = self.results['gap3_invariance']['statistics']
-        class_distribution = {}
-        for stat in gap3_stats:
-            cls = stat['class']
-            class_distribution[cls] = class_distribution.get(cls, 0) + 1
-        self.results['gap3_invariance']['class_distribution'] = class_distribution
+        # résumé final à partir des agrégats en ligne
+        agg = self.agg
+        self.results['gap1_transfer'] = {
+            'violations': agg.gap1_violations.to_list(),
+            'summary': agg.gap1_summary(with_C_bound=False)
+        }
+        self.results['gap2_hensel'] = {
+            'checked': agg.gap2_checked,
+            'obstructions_found': agg.gap2_failures.to_list(),
+            'obstructions_found_count': agg.gap2_failures.count
+        }
+        self.results['gap3_invariance'] = {
+            'violations': agg.gap3_violations.to_list(),
+            'violation_count': agg.gap3_violations.count,
+            'class_distribution': dict(agg.gap3_classes)
+        }
+        self.results['trajectory'] = {
+            'iterations': agg.iterations,
+            'length': agg.length.to_dict(),
+            'detail_file': self.detail_path,
+            'detail_records': agg.details.records if agg.details is not None else 0
+        }
 
     def print_comprehensive_report(self):
         # short human summary
@@ -323,10 +309,10 @@ class UltimateGapTesterFast:
         print("=== FIN DU TEST 3 GAPS - RÉSUMÉ ===")
         if elapsed is not None:
             print(f"Durée totale : {elapsed:.2f} s")
-        print(f"Itérations testées : {self.max_iterations + 1}")
-        g1v = len(self.results['gap1_transfer']['violations'])
-        g2v = len(self.results['gap2_hensel']['obstructions_found'])
-        g3v = len(self.results['gap3_invariance']['violations'])
+        print(f"Itérations testées : {self.agg.iterations}")
+        g1v = self.agg.gap1_violations.count
+        g2v = self.agg.gap2_failures.count
+        g3v = self.agg.gap3_violations.count
 
         if g1v == 0:
             print("GAP1: Aucune violation détectée")
@@ -358,7 +344,6 @@ class UltimateGapTesterFast:
         for iteration in range(self.max_iterations + 1):
             T_current, carries, details = apply_T_with_details_int(current)
             r = self.test_all_gaps(iteration, current, T_current, details)
-            self.results['trajectory'].append(r)
 
             # vérif arrêt si chiffres max atteints
             if len(str(current)) > self.max_digits:
@@ -392,6 +377,7 @@ class UltimateGapTesterFast:
         end = time.time()
         self.results['config']['end_time'] = datetime.now().isoformat()
         self.results['config']['elapsed_seconds'] = end - start
+        self.agg.close()
         self.compute_statistics()
         self.print_comprehensive_report()
         self.save_results()
@@ -406,6 +392,8 @@ def main():
     parser.add_argument("--iterations", type=int, default=10000, help="Nombre d'itérations (default:10000)")
     parser.add_argument("--max_digits", type=int, default=1000, help="Longueur max de chiffres pour arrêt anticipé (default:1000)")
     parser.add_argument("--numba", action="store_true", help="Activer numba si disponible (optionnel)")
+    parser.add_argument("--sample-size", type=int, default=100, help="Taille des échantillons de violations conservés (default:100)")
+    parser.add_argument("--details", type=str, default=None, help="Fichier JSON Lines du détail par itération (optionnel)")
     args = parser.parse_args()
 
     if args.numba:
@@ -415,7 +403,8 @@ def main():
         except Exception as e:
             print("Numba non disponible ou échec import — continuer sans numba.")
 
-    tester = UltimateGapTesterFast(n0=args.n0, max_iterations=args.iterations, max_digits=args.max_digits)
+    tester = UltimateGapTesterFast(n0=args.n0, max_iterations=args.iterations, max_digits=args.max_digits,
+                                   sample_size=args.sample_size, detail_path=args.details)
     tester.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Shared reverse-and-add step on digit buffers.
+
+The analysis scripts each carry their own copy of ``apply_T`` which rebuilds
+``str(n)`` / ``int(str(n)[::-1])`` or a list of digits at every iteration.
+This module keeps the iterate as a ``bytearray`` of digits (LSB-first, one
+byte per digit) and exposes a single step that returns the digits of T(n)
+together with the carry vector, so that callers (Φ, GAP, obstruction checks)
+can reuse the same buffers instead of recomputing the reversal.
+
+Conventions (same as ``number_to_digits_int`` in the other scripts):
+ - ``digits[i]`` is the coefficient of 10^i (LSB-first);
+ - ``carries[i]`` is the carry entering position i, ``carries[0] = 0`` and
+   ``carries[d]`` is the final overflow (length d+1).
+"""
+from typing import Iterator, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# À incrémenter si les conventions de T (chiffres, retenues) changent :
+# les certificats compacts (compact_cert.py) enregistrent cette version.
+ENGINE_VERSION = 1
+_ASCII_DIGITS = bytes(range(48, 58)) + bytes(246)
+
+
+def number_to_digits(n: int) -> bytearray:
+    """Retourne les chiffres de n (LSB-first) dans un bytearray."""
+    if n < 0:
+        raise ValueError('n must be non-negative')
+    if n == 0:
+        return bytearray(1)
+    digits = bytearray()
+    while n > 0:
+        n, r = divmod(n, 10)
+        digits.append(r)
+    return digits
+
+
+def digits_to_number(digits) -> int:
+    """Conversion LSB-first -> int."""
+    val = 0
+    for d in reversed(digits):
+        val = val * 10 + d
+    return val
+
+
+def digits_from_decimal_text(text) -> bytearray:
+    """Convertit un texte décimal (MSB-first, str ou bytes) en buffer LSB-first."""
+    if isinstance(text, str):
+        text = text.encode('ascii')
+    raw = bytes(text).strip()
+    if not raw or not raw.isdigit():
+        raise ValueError('expected a non-empty decimal digit string')
+    buf = bytearray(raw[::-1])
+    for i in range(len(buf)):
+        buf[i] -= 48
+    return buf
+
+
+def digits_to_decimal_text(digits) -> str:
+    """Convertit un buffer LSB-first en texte décimal (MSB-first)."""
+    if isinstance(digits, (bytes, bytearray)):
+        return digits[::-1].translate(_ASCII_DIGITS).decode('ascii')
+    return bytes(d + 48 for d in reversed(digits)).decode('ascii')
+
+
+def reverse_add_step(digits) -> Tuple[bytearray, bytearray]:
+    """Applique T(n) = n + rev(n) sur un buffer de chiffres LSB-first.
+
+    Returns ``(T_digits, carries)`` ; ``T_digits`` a d ou d+1 chiffres.
+    """
+    d = len(digits)
+    res = bytearray(d + 1)
+    carries = bytearray(d + 1)
+    c = 0
+    i = 0
+    for lo, hi in zip(digits, reversed(digits)):
+        s = lo + hi + c
+        if s >= 10:
+            res[i] = s - 10
+            c = 1
+        else:
+            res[i] = s
+            c = 0
+        i += 1
+        carries[i] = c
+    if c:
+        res[d] = 1
+    else:
+        del res[d]
+    return res, carries
+
+
+def reverse_add_step_numpy(digits):
+    """Variante vectorisée (numpy) de ``reverse_add_step`` sur un tableau uint8.
+
+    The carry into position i is 1 iff the last position <= i-1 whose pair
+    sum is >= 10 ("generate") comes after the last one whose sum is <= 8
+    ("kill"); sums equal to 9 only propagate. Both indices are prefix maxima,
+    so the whole carry vector is obtained without a Python-level loop.
+    Returns ``(T_digits, carries)`` as uint8 arrays (same layout as above).
+    """
+    a = np.asarray(digits, dtype=np.uint8)
+    d = a.shape[0]
+    s = a + a[::-1]
+    idx = np.arange(d)
+    last_gen = np.maximum.accumulate(np.where(s >= 10, idx, -1))
+    last_kill = np.maximum.accumulate(np.where(s <= 8, idx, -1))
+    carries = np.zeros(d + 1, dtype=np.uint8)
+    carries[1:] = last_gen > last_kill
+    res = s + carries[:d]
+    res[res >= 10] -= 10
+    if carries[d]:
+        res = np.append(res, np.uint8(1))
+    return res, carries
+
+
+def is_palindrome_digits(digits) -> bool:
+    return digits == digits[::-1]
+
+
+def iterate_orbit(start: int = 196, max_iter: int = 1000,
+                  digits: Optional[bytearray] = None,
+                  start_iteration: int = 0
+                  ) -> Iterator[Tuple[int, bytearray, bytearray, bytearray]]:
+    """Itère T depuis ``start`` (ou un buffer ``digits`` déjà calculé).
+
+    Yields ``(j, digits_j, digits_{j+1}, carries_j)`` for j in
+    ``start_iteration .. start_iteration + max_iter - 1``; the buffer of
+    iteration j+1 is reused as the input of the next step.
+    """
+    cur = bytearray(digits) if digits is not None else number_to_digits(start)
+    for j in range(start_iteration, start_iteration + max_iter):
+        nxt, carries = reverse_add_step(cur)
+        yield j, cur, nxt, carries
+        cur = nxt
@@ -5,11 +5,8 @@ located in the certificates/ directory and for results/validation_results_aext9.
 if they are missing.
 """
 import json
-import hashlib
-from pathlib import Path
 
-REPO = Path('d:/Resolution_Lychrel')
-MANIFEST = REPO / 'results' / 'manifest_sha256.json'
+from manifest_engine import ROOT as REPO, MANIFEST_JSON as MANIFEST, StatCache, hash_files, atomic_write_text
 CERT_DIR = REPO / 'certificates'
 EXTRA_FILES = [REPO / 'results' / 'validation_results_aext9.json']
 
@@ -23,7 +20,7 @@ with open(MANIFEST, 'r', encoding='utf-8') as f:
 
 existing = {entry['path'].replace('\\','/'): entry['sha256'] for entry in manifest.get('entries', [])}
 
-added = []
+todo = []
 for p in candidates:
     rel = p.relative_to(REPO).as_posix()
     if rel in existing:
@@ -32,24 +29,23 @@ for p in candidates:
     if not p.exists():
         print(f"Skipping missing file: {rel}")
         continue
-    # compute sha256
-    h = hashlib.sha256()
-    with open(p, 'rb') as f:
-        while True:
-            chunk = f.read(8192)
-            if not chunk:
-                break
-            h.update(chunk)
-    digest = h.hexdigest()
-    manifest['entries'].append({'path': rel.replace('/','\\'), 'sha256': digest})
+    todo.append(rel)
+
+# compute sha256 (stat cache + thread pool)
+cache = StatCache()
+hashed = hash_files(todo, REPO, cache)
+cache.save()
+added = []
+for rel in todo:
+    digest = hashed[rel]['sha256']
+    manifest['entries'].append({'path': rel, 'sha256': digest})
     added.append((rel, digest))
 
 # Optionally sort entries by path
-manifest['entries'] = sorted(manifest['entries'], key=lambda e: e['path'])
+manifest['entries'] = sorted(manifest['entries'], key=lambda e: e['path'].replace('\\', '/'))
 
-# Write back manifest (overwrite)
-with open(MANIFEST, 'w', encoding='utf-8') as f:
-    json.dump(manifest, f, indent=2, ensure_ascii=False)
+# Write back manifest (atomic overwrite)
+atomic_write_text(MANIFEST, json.dumps(manifest, indent=2, ensure_ascii=False))
 
 print(f"Updated manifest: {MANIFEST}")
 if added:
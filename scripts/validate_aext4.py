@@ -3,7 +3,7 @@ Script de validation exhaustive pour A^(ext) >= 4
 Extension du script A^(ext) >= 5 avec plus de paires à tester
 
 Usage:
-    python validate_aext4.py
+    python validate_aext4.py [--cache]
     
 Output:
     - Rapport détaillé des tests
@@ -14,9 +14,13 @@ Output:
 
 from typing import List, Tuple, Dict, Optional
 from itertools import product
+import argparse
 import json
 from datetime import datetime
 
+from asymmetry_metrics import WeightedAsymmetry
+from compute_cache import add_cache_arguments, cache_from_args
+
 class ReverseAddValidator:
     """Validateur pour la persistance de A^(robust)"""
     
@@ -69,17 +73,7 @@ class ReverseAddValidator:
     
     def compute_A_int(self, digits: List[int]) -> float:
         """Calcule A^(int) avec poids exponentiels"""
-        d = len(digits)
-        if d < 3:
-            return 0
-        
-        total = 0
-        for i in range(1, d // 2):
-            weight = 2 ** (i - 1)
-            asymmetry = abs(digits[i] - digits[d-1-i])
-            total += weight * asymmetry
-        
-        return total
+        return WeightedAsymmetry.from_digits(digits).to_int()
     
     def compute_A_carry(self, digits: List[int], carries: List[int]) -> float:
         """Calcule A^(carry) avec asymétrie des carries"""
@@ -112,6 +106,11 @@ class ReverseAddValidator:
         
         return A_ext + A_int + A_carry
     
+    def robust_at_least(self, digits: List[int], carries: List[int], k: float = 1.0) -> bool:
+        """A^(robust) >= k décidé sur le profil creux de A^(int) (sans bigint)"""
+        A_fixed = self.compute_A_ext(digits) + self.compute_A_carry(digits, carries)
+        return WeightedAsymmetry.from_digits(digits).at_least(k - A_fixed)
+    
     def test_single_case(self, digits: List[int]) -> Optional[Dict]:
         """Teste un cas individuel"""
         # Calculer A^(ext) initial
@@ -140,7 +139,7 @@ class ReverseAddValidator:
         A_robust_final = self.compute_A_robust(T_n, carries)
         
         # Vérifier persistance
-        passed = A_robust_final >= 1.0
+        passed = self.robust_at_least(T_n, carries, 1.0)
         
         result = {
             'n': digits,
@@ -232,8 +231,8 @@ class ReverseAddValidator:
         new_pairs = pairs_4 - pairs_5
         return len(new_pairs), sorted(new_pairs)
     
-    def run_validation(self, max_length: int = 8) -> Dict:
-        """Exécute la validation complète"""
+    def run_validation(self, max_length: int = 8, cache=None) -> Dict:
+        """Exécute la validation complète (cache : ComputeCache optionnel)"""
         print(f"\n{'='*70}")
         print(f"VALIDATION A^(ext) >= {self.threshold} PERSISTENCE")
         print(f"{'='*70}\n")
@@ -243,25 +242,18 @@ class ReverseAddValidator:
         print(f"New pairs compared to A^(ext) >= 5: {n_new}")
         print(f"New pairs to test: {new_pairs[:10]}{'...' if len(new_pairs) > 10 else ''}\n")
         
-        print(f"Generating test cases (max length: {max_length})...")
-        test_cases = self.generate_test_cases(max_length)
-        print(f"\nTotal generated: {len(test_cases)} test cases")
         print(f"Expected increase over A^(ext) >= 5: ~{n_new * 1000} cases\n")
         
-        print("Running tests...")
+        if cache is not None:
+            results = cache.call(evaluate_cases, self.threshold, max_length)
+        else:
+            results = evaluate_cases(self.threshold, max_length)
+        
         passed_count = 0
         failed_count = 0
         palindrome_count = 0
         
-        for i, test_case in enumerate(test_cases):
-            if (i + 1) % 100 == 0:
-                print(f"Progress: {i+1}/{len(test_cases)} cases tested...", end='\r')
-            
-            result = self.test_single_case(test_case)
-            
-            if result is None:
-                continue
-            
+        for result in results:
             self.test_results.append(result)
             
             if result['palindrome']:
@@ -270,8 +262,7 @@ class ReverseAddValidator:
                 passed_count += 1
             else:
                 failed_count += 1
-        
-        print(f"Progress: {len(test_cases)}/{len(test_cases)} cases tested... DONE")
+                self.failures.append(result)
         
         print(f"\n{'='*70}")
         print("RESULTS")
@@ -370,15 +361,40 @@ class ReverseAddValidator:
         print(f"\nResults saved to {filename}")
 
 
+def evaluate_cases(threshold: int, max_length: int) -> List[Dict]:
+    """Génère et teste tous les cas (sans effet de bord, mémorisable)"""
+    validator = ReverseAddValidator(threshold=threshold)
+    print(f"Generating test cases (max length: {max_length})...")
+    test_cases = validator.generate_test_cases(max_length)
+    print(f"\nTotal generated: {len(test_cases)} test cases")
+    
+    print("Running tests...")
+    results = []
+    for i, test_case in enumerate(test_cases):
+        if (i + 1) % 100 == 0:
+            print(f"Progress: {i+1}/{len(test_cases)} cases tested...", end='\r')
+        
+        result = validator.test_single_case(test_case)
+        if result is not None:
+            results.append(result)
+    
+    print(f"Progress: {len(test_cases)}/{len(test_cases)} cases tested... DONE")
+    return results
+
+
 def main():
     """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description='Exhaustive validation for A^(ext) >= 4.')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    
     print("\n" + "="*70)
     print("LYCHREL PERSISTENCE VALIDATOR")
     print("Testing A^(ext) >= 4")
     print("="*70)
     
     validator = ReverseAddValidator(threshold=4)
-    results = validator.run_validation(max_length=8)
+    results = validator.run_validation(max_length=8, cache=cache_from_args(args))
     
     print("\n" + "="*70)
     print("COMPARISON WITH A^(ext) >= 5")
@@ -16,6 +16,8 @@ from itertools import product
 import json
 from datetime import datetime
 
+from asymmetry_metrics import WeightedAsymmetry
+
 class ReverseAddValidator:
     """Validateur pour la persistance de A^(robust)"""
     
@@ -67,17 +69,7 @@ class ReverseAddValidator:
     
     def compute_A_int(self, digits: List[int]) -> float:
         """Calcule A^(int) avec poids exponentiels"""
-        d = len(digits)
-        if d < 3:
-            return 0
-        
-        total = 0
-        for i in range(1, d // 2):
-            weight = 2 ** (i - 1)
-            asymmetry = abs(digits[i] - digits[d-1-i])
-            total += weight * asymmetry
-        
-        return total
+        return WeightedAsymmetry.from_digits(digits).to_int()
     
     def compute_A_carry(self, digits: List[int], carries: List[int]) -> float:
         """Calcule A^(carry) avec asymétrie des carries"""
@@ -110,6 +102,11 @@ class ReverseAddValidator:
         
         return A_ext + A_int + A_carry
     
+    def robust_at_least(self, digits: List[int], carries: List[int], k: float = 1.0) -> bool:
+        """A^(robust) >= k décidé sur le profil creux de A^(int) (sans bigint)"""
+        A_fixed = self.compute_A_ext(digits) + self.compute_A_carry(digits, carries)
+        return WeightedAsymmetry.from_digits(digits).at_least(k - A_fixed)
+    
 
     def test_single_case(self, digits: List[int]) -> Optional[Dict]:
         """Teste un cas individuel"""
@@ -139,7 +136,7 @@ class ReverseAddValidator:
         A_robust_final = self.compute_A_robust(T_n, carries)
         
         # Vérifier persistance
-        passed = A_robust_final >= 1.0
+        passed = self.robust_at_least(T_n, carries, 1.0)
         
         result = {
             'n': digits,
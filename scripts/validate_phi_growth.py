@@ -1,17 +1,73 @@
 #!/usr/bin/env python3
 """
 Validation de la croissance de l'invariant Φ sur l'orbite de 196
+
+Le mode par défaut utilise ``PhiAnalyzer`` : les chiffres et la réversion
+viennent du pas partagé de ``trajectory_engine``, v2 est calculée par
+opérations bit à bit et Φ/Δ sont écrits en flux dans un fichier float64
+(paires ``(Φ, Δ)`` little-endian) avec min/moyenne/max en ligne, ce qui
+permet de valider 10^6 itérations en mémoire bornée.
+
+Usage: python scripts/validate_phi_growth.py --iterations 1000000 --out results/phi_stream.f64
 """
+import argparse
+import json
+import math
+import os
+import sys
+from array import array
+
+from iterate_import import add_import_arguments, iterate_from_args
+from trajectory_engine import iterate_orbit
+
 
 def valuation_2(n):
     """Calcule la valuation 2-adique de n"""
     if n == 0:
         return float('inf')
-    count = 0
-    while n % 2 == 0:
-        n //= 2
-        count += 1
-    return count
+    return (n & -n).bit_length() - 1
+
+
+def valuation_2_mirror_difference(digits):
+    """Valuation 2-adique de n - rev(n) à partir du buffer LSB-first.
+
+    Comme v2(10^j) = j, n - rev(n) mod 2^k ne dépend que des k chiffres de
+    poids faible de la différence : on accumule e_j·10^j (e_j = a_j - a_{d-1-j})
+    et on s'arrête dès que la somme partielle n'est plus divisible par 2^k.
+    En pratique quelques chiffres suffisent ; aucun entier de taille d n'est
+    construit sauf si n - rev(n) est lui-même très 2-divisible.
+    """
+    d = len(digits)
+    r = 0
+    p10 = 1
+    for k in range(d):
+        r += (digits[k] - digits[d - 1 - k]) * p10
+        p10 *= 10
+        if r & ((1 << (k + 1)) - 1):
+            return (r & -r).bit_length() - 1
+    if r == 0:
+        return float('inf')
+    return (r & -r).bit_length() - 1
+
+
+def compute_A_robust_digits(digits):
+    """A_robust(n) calculée sur le buffer de chiffres (symétrique en l'ordre)."""
+    d = len(digits)
+    first, last = digits[0], digits[d - 1]
+    a_ext = max(0, abs(first - last) - 1)
+    a_int = 0
+    for i in range(1, (d - 1) // 2 + 1):
+        diff = abs(digits[i] - digits[d - 1 - i])
+        if diff > 1:
+            a_int += diff - 1
+    # n + rev(n) ≡ a_0 + a_{d-1} (mod 2)
+    a_carry = (first + last) & 1
+    return a_ext + a_int + a_carry
+
+
+def compute_phi_digits(digits, alpha=0.5):
+    """Φ(n) à partir du buffer de chiffres (équivalent à compute_phi)."""
+    return valuation_2_mirror_difference(digits) + alpha * compute_A_robust_digits(digits)
 
 def compute_A_robust(n):
     """Calcule l'asymétrie robuste A_robust(n)"""
@@ -106,13 +162,188 @@ def validate_phi_growth(start=196, max_iter=10000, alpha=0.5):
     
     return violations, phi_values
 
-if __name__ == "__main__":
-    violations, phi_values = validate_phi_growth()
-    
+class PhiAnalyzer:
+    """Analyse en flux de Φ le long d'une orbite, en mémoire bornée.
+
+    Chaque itération ajoute la paire (Φ, Δ) dans un tampon ``array('d')``
+    vidé dans ``out_path`` tous les ``flush_every`` éléments ; Δ vaut NaN
+    à la première itération. Min/moyenne/max de Φ et de Δ sont tenus en
+    ligne et seules les ``max_violations`` premières violations sont gardées.
+    """
+
+    def __init__(self, alpha=0.5, out_path=None, flush_every=65536,
+                 max_violations=100, tolerance=1e-10):
+        self.alpha = alpha
+        self.out_path = out_path
+        self.flush_every = int(flush_every)
+        self.max_violations = int(max_violations)
+        self.tolerance = tolerance
+        self._buf = array('d')
+        self._fh = None
+        self.count = 0
+        self.phi_first = None
+        self.phi_prev = None
+        self.phi_min = math.inf
+        self.phi_max = -math.inf
+        self.delta_count = 0
+        self.delta_sum = 0.0
+        self.delta_min = math.inf
+        self.delta_max = -math.inf
+        self.violation_count = 0
+        self.violations = []
+        if out_path:
+            os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+            self._fh = open(out_path, 'wb')
+
+    def update(self, iteration, digits):
+        phi = compute_phi_digits(digits, self.alpha)
+        if self.phi_prev is None:
+            delta = math.nan
+            self.phi_first = phi
+        else:
+            delta = phi - self.phi_prev
+            self.delta_count += 1
+            self.delta_sum += delta
+            if delta < self.delta_min:
+                self.delta_min = delta
+            if delta > self.delta_max:
+                self.delta_max = delta
+            if delta < -self.tolerance:
+                self.violation_count += 1
+                if len(self.violations) < self.max_violations:
+                    self.violations.append((iteration, self.phi_prev, phi, delta))
+        if phi < self.phi_min:
+            self.phi_min = phi
+        if phi > self.phi_max:
+            self.phi_max = phi
+        self.count += 1
+        self.phi_prev = phi
+        if self._fh is not None:
+            self._buf.append(phi)
+            self._buf.append(delta)
+            if len(self._buf) >= self.flush_every:
+                self.flush()
+        return phi, delta
+
+    def flush(self):
+        if self._fh is None or not self._buf:
+            return
+        if sys.byteorder != 'little':
+            self._buf.byteswap()
+        self._buf.tofile(self._fh)
+        self._buf = array('d')
+
+    def close(self):
+        self.flush()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def summary(self):
+        return {
+            'alpha': self.alpha,
+            'iterations': self.count,
+            'phi_first': self.phi_first,
+            'phi_final': self.phi_prev,
+            'phi_min': self.phi_min,
+            'phi_max': self.phi_max,
+            'croissance_totale': (self.phi_prev - self.phi_first) if self.count else None,
+            'delta_moyen': (self.delta_sum / self.delta_count) if self.delta_count else None,
+            'delta_min': self.delta_min if self.delta_count else None,
+            'delta_max': self.delta_max if self.delta_count else None,
+            'violations': self.violation_count,
+            'stream_file': self.out_path,
+            'stream_layout': '<f8 pairs (phi, delta)' if self.out_path else None,
+        }
+
+
+def validate_phi_growth_streaming(start=196, max_iter=10000, alpha=0.5,
+                                  out_path=None, report_every=1000, imported=None):
+    """Valide la croissance de Φ sur max_iter itérations en mémoire bornée.
+
+    ``imported`` (iterate_import.ExternalIterate) reprend l'orbite à partir
+    d'un itéré externe au lieu de ``start``.
+    """
+    analyzer = PhiAnalyzer(alpha=alpha, out_path=out_path)
+    print(f"Validation de la croissance de Φ sur {max_iter} itérations (flux)")
+    print(f"Paramètre α = {alpha}")
+    print("=" * 60)
+    try:
+        # itérations 0..max_iter comme validate_phi_growth
+        if imported is not None:
+            orbit = imported.orbit(max_iter + 1)
+            j0 = imported.iteration
+        else:
+            orbit = iterate_orbit(start, max_iter + 1)
+            j0 = 0
+        for j, digits, _, _ in orbit:
+            phi, delta = analyzer.update(j, digits)
+            if j == 0:
+                print(f"Itération 0: n = {start}, Φ = {phi:.6f}")
+            elif j == j0:
+                print(f"Itération {j}: n ({len(digits)} chiffres, importé), Φ = {phi:.6f}")
+            elif j % report_every == 0:
+                print(f"Itération {j}: n ({len(digits)} chiffres), Φ = {phi:.6f}, Δ = {delta:.6f}")
+            if delta < -analyzer.tolerance:
+                print(f"⚠️  Violation à l'itération {j}: Δ = {delta:.6f}")
+    finally:
+        analyzer.close()
+
+    stats = analyzer.summary()
+    print("\n" + "=" * 60)
+    print("ANALYSE FINALE")
+    print("=" * 60)
+    if stats['violations'] == 0:
+        print("✅ AUCUNE violation de la croissance détectée!")
+    else:
+        print(f"❌ {stats['violations']} violations détectées:")
+        for i, phi_prev, phi_current, delta in analyzer.violations[:5]:
+            print(f"   Itération {i}: Φ = {phi_prev:.6f} → {phi_current:.6f}, Δ = {delta:.6f}")
+    if stats['delta_moyen'] is not None:
+        print(f"📈 Croissance totale: {stats['croissance_totale']:.6f}")
+        print(f"📊 Delta moyen: {stats['delta_moyen']:.6f}")
+        print(f"📉 Delta minimum: {stats['delta_min']:.6f}")
+        print(f"📈 Delta maximum: {stats['delta_max']:.6f}")
+    print(f"🎯 Φ final: {stats['phi_final']:.6f} (min {stats['phi_min']:.6f}, max {stats['phi_max']:.6f})")
+    return analyzer.violations, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validation de la croissance de Φ")
+    parser.add_argument('--start', type=int, default=196)
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--alpha', type=float, default=0.5)
+    parser.add_argument('--out', type=str, default=None,
+                        help='fichier float64 des paires (Φ, Δ) (optionnel)')
+    parser.add_argument('--summary', type=str, default=None,
+                        help='fichier JSON du résumé (optionnel)')
+    parser.add_argument('--report-every', type=int, default=1000)
+    parser.add_argument('--legacy', action='store_true',
+                        help='utiliser validate_phi_growth (liste complète en mémoire)')
+    add_import_arguments(parser)
+    args = parser.parse_args()
+    imported = iterate_from_args(args, args.start)
+    if imported is not None and args.legacy:
+        parser.error('--from-iterate requires the streaming mode')
+
+    if args.legacy:
+        violations, _ = validate_phi_growth(args.start, args.iterations, args.alpha)
+    else:
+        violations, stats = validate_phi_growth_streaming(
+            args.start, args.iterations, args.alpha, args.out, args.report_every, imported)
+        if args.summary:
+            os.makedirs(os.path.dirname(args.summary) or '.', exist_ok=True)
+            with open(args.summary, 'w', encoding='utf-8') as f:
+                json.dump(stats, f, indent=2)
+
     if not violations:
         print("\n🎉 VALIDATION RÉUSSIE!")
-        print("L'invariant Φ montre une croissance monotone sur 10,000 itérations.")
+        print(f"L'invariant Φ montre une croissance monotone sur {args.iterations:,} itérations.")
         print("Cela confirme l'obstruction structurelle à la formation de palindromes.")
     else:
         print("\n💥 VALIDATION ÉCHOUÉE!")
-        print("Des violations de croissance ont été détectées.")
\ No newline at end of file
+        print("Des violations de croissance ont été détectées.")
+
+
+if __name__ == "__main__":
+    main()
@@ -53,6 +53,25 @@ def check_carries_mod2(a):
             valid_palindromes.append((c, b_msb_to_lsb))
     return valid_palindromes
 
+def base_carry_solutions(a):
+    # Same result as check_carries_mod2 in O(d): with c_j in {0,1} and
+    # pair[j] + c_{j-1} <= 19, the condition 0 <= b_j <= 9 forces
+    # c_j = 1 iff pair[j] + c_{j-1} >= 10, so the only candidate vectors are
+    # the actual addition carries with c_d free (c_d does not enter any b_j).
+    d = len(a)
+    c = [0]*(d+1)
+    b = [0]*d
+    prev = 0
+    for j in range(d):
+        s = a[d-1-j] + a[j] + prev
+        prev = 1 if s >= 10 else 0
+        c[j] = prev
+        b[j] = s - 10*prev
+    b_msb_to_lsb = b[::-1]
+    if b_msb_to_lsb != b_msb_to_lsb[::-1]:
+        return []
+    return [(c[:d] + [cd], b_msb_to_lsb) for cd in (0, 1)]
+
 if __name__ == '__main__':
     a = digits(196)
     res = check_carries_mod2(a)
@@ -4,10 +4,36 @@
 
 from itertools import product
 
+from palindrome_automaton import mod2k_witness
+
 def digits(n):
     return list(map(int, str(n)))
 
 def exists_carries_for_k(a, k):
+    # Décision par programmation dynamique (bords -> milieu), voir
+    # carries_dp_mod2k ; même contrat que la version exhaustive ci-dessous
+    # mais sans limite : O(d * 2^k) états au pire.
+    cvec = carries_dp_mod2k(a, k)
+    if cvec is None:
+        return None, 'none'
+    return cvec, 'found'
+
+
+def carries_dp_mod2k(a, k):
+    # a: digits MSB->LSB ; carries c_0..c_d in range(2^k), c_{-1} = 0
+    # b_j = a[d-1-j] + a[j] + c_{j-1} - 10*c_j must lie in [0, 9] and
+    # b must be a palindrome (b_j == b_{d-1-j}).
+    #
+    # Pairs (j, d-1-j) are processed from the outside in by the automaton of
+    # palindrome_automaton (relaxed mode): from each initial value of the top
+    # carry the run is deterministic, b_j in [0, 9] fixing the low carry and
+    # b_j == b_{d-1-j} the high one, so the cost is O(d * 2^k) at worst and
+    # usually O(2^k) (runs die on the first pairs). Returns the carry tuple
+    # (c_0..c_d, with the free c_d set to 0) or None.
+    return mod2k_witness(a, k)
+
+
+def exists_carries_for_k_bruteforce(a, k):
     # a: digits MSB->LSB
     d = len(a)
     maxc = 2**k
@@ -44,7 +70,35 @@ def exists_carries_for_k(a, k):
             return cvec, 'found'
     return None, 'none'
 
+def check_orbit(start=196, iterations=100, kmax=10):
+    # Existence d'un vecteur de carries mod 2^k sur les itérés de l'orbite.
+    from trajectory_engine import number_to_digits, reverse_add_step
+    cur = number_to_digits(start)
+    rows = []
+    for j in range(iterations):
+        a = list(reversed(cur))
+        found = [k for k in range(1, kmax+1) if carries_dp_mod2k(a, k) is not None]
+        rows.append(dict(iteration=j, d=len(a), k_found=found))
+        cur, _ = reverse_add_step(cur)
+    return rows
+
+
 if __name__ == '__main__':
+    import argparse
+    import json
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orbit-iterations', type=int, default=0,
+                        help='check the first N iterates of --start instead of 196 alone')
+    parser.add_argument('--start', type=int, default=196)
+    parser.add_argument('--kmax', type=int, default=10)
+    args = parser.parse_args()
+    if args.orbit_iterations:
+        rows = check_orbit(args.start, args.orbit_iterations, args.kmax)
+        hits = [r for r in rows if r['k_found']]
+        print(f'{len(rows)} iterates checked (k=1..{args.kmax}); carry vectors found for {len(hits)}')
+        for r in hits[:20]:
+            print(json.dumps(r))
+        raise SystemExit(0)
     a = digits(196)
     results = {}
     for k in range(1,6):
@@ -5,13 +5,7 @@ using results/manifest_sha256.json.
 
 Run from repository root or anywhere; paths in manifest are relative to repo root.
 """
-import json
-import hashlib
-import os
-from pathlib import Path
-
-REPO_ROOT = Path("d:/Resolution_Lychrel")
-MANIFEST = REPO_ROOT / "results" / "manifest_sha256.json"
+from manifest_engine import ROOT as REPO_ROOT, MANIFEST_JSON as MANIFEST, StatCache, hash_files, load_manifest
 
 # Files we expect according to the updated certificate.tex mapping
 EXPECTED = [
@@ -33,10 +27,12 @@ EXPECTED = [
 ]
 
 # Load manifest
-with open(MANIFEST, 'r', encoding='utf-8') as f:
-    manifest = json.load(f)
+manifest_map = load_manifest(MANIFEST)
 
-manifest_map = {entry['path'].replace('\\','/'): entry['sha256'] for entry in manifest.get('entries', [])}
+# Hash every present file once (stat cache + thread pool)
+cache = StatCache()
+hashed = hash_files([p.relative_to(REPO_ROOT).as_posix() for p in EXPECTED if p.exists()], REPO_ROOT, cache)
+cache.save()
 
 print("Verification report for expected certificate files:\n")
 missing = []
@@ -51,15 +47,7 @@ for p in EXPECTED:
         missing.append(rel)
         continue
 
-    # compute sha256 of file bytes
-    h = hashlib.sha256()
-    with open(p, 'rb') as f:
-        while True:
-            chunk = f.read(8192)
-            if not chunk:
-                break
-            h.update(chunk)
-    digest = h.hexdigest()
+    digest = hashed[rel]['sha256']
 
     # check manifest
     if rel in manifest_map:
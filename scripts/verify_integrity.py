@@ -4,18 +4,16 @@ Script de vérification d'intégrité pour la soumission aux pairs.
 Calcule les sommes de contrôle SHA256 de tous les fichiers importants.
 """
 
-import hashlib
 import os
 import json
 from pathlib import Path
 
+from manifest_engine import sha256_file
+
+
 def calculate_sha256(file_path):
-    """Calcule le SHA256 d'un fichier."""
-    sha256 = hashlib.sha256()
-    with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+    """Calcule le SHA256 d'un fichier (lecture mmap, voir manifest_engine)."""
+    return sha256_file(file_path)
 
 def main():
     """Vérifie l'intégrité de tous les fichiers de soumission."""
@@ -9,6 +9,11 @@ from datetime import datetime
 import json
 import argparse
 
+from compact_cert import ModPKind, cert_path, compact_records, write_certificate
+from compute_cache import add_cache_arguments, cache_from_args
+from gf2 import solve_mod2
+from merkle_cert import merkle_summary
+
 
 def number_to_digits_lsb(n: int):
     if n == 0:
@@ -45,6 +50,9 @@ def apply_T(n: int):
 
 
 def gauss_jordan_mod_p(A, b, p):
+    if p == 2:
+        # lignes compactées (gf2)
+        return solve_mod2(A, b)
     m = len(A)
     n = len(A[0]) if m > 0 else 0
     M = [row[:] for row in A]
@@ -124,7 +132,11 @@ def build_linear_system_mod_p(a_digits, p):
 
 
 def check_mod_p_obstruction_for_n(n: int, p: int):
-    a = number_to_digits_lsb(n)
+    return check_mod_p_obstruction_for_digits(number_to_digits_lsb(n), p)
+
+
+def check_mod_p_obstruction_for_digits(a, p: int):
+    """Même test à partir des chiffres LSB-first (sans passer par l'entier)."""
     systems = build_linear_system_mod_p(a, p)
     for A, B, var_count, L in systems:
         solvable, sol = gauss_jordan_mod_p(A, B, p)
@@ -161,12 +173,25 @@ def main():
     parser.add_argument('--iterations', type=int, default=1000)
     parser.add_argument('--start', type=int, default=196)
     parser.add_argument('--out', type=str, default=None)
+    parser.add_argument('--compact', action='store_true',
+                        help='écrire aussi le certificat compact recalculable (<out>.cert.json)')
+    add_cache_arguments(parser)
     args = parser.parse_args()
     p = args.prime
     out = args.out or f'results/verify_mod{p}_{args.iterations}.json'
     print(f'Running verify_mod{p} for {args.iterations} iterations')
-    run_verify(p, args.iterations, args.start, out)
+    # calcul mémorisable sans effet de bord, puis écriture
+    data = cache_from_args(args).call(run_verify, p, args.iterations, args.start)
+    data['merkle'] = merkle_summary(data['results'])
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
     print('Wrote', out)
+    if args.compact:
+        header = {k: v for k, v in data.items() if k not in ('results', 'merkle')}
+        cpath = cert_path(out)
+        write_certificate(cpath, compact_records(data['results'], ModPKind(p), header))
+        print('Wrote', cpath)
 
 
 if __name__ == '__main__':
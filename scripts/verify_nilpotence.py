@@ -3,39 +3,44 @@
 Preuve de (I+R)² ≡ 0 (mod 2) pour la matrice de renversement R
 """
 
-import numpy as np
+import argparse
+import time
+
+from gf2 import GF2Matrix
 
 def create_reversal_matrix(d):
-    """Crée la matrice de renversement R de taille d x d"""
-    R = np.zeros((d, d), dtype=int)
-    for i in range(d):
-        R[i, d-1-i] = 1
-    return R
+    """Crée la matrice de renversement R de taille d x d (lignes compactées GF(2))"""
+    return GF2Matrix.reversal(d)
 
-def verify_nilpotence_mod2(d_max=100):
-    """Vérifie que (I+R)² ≡ 0 (mod 2) pour toutes tailles de 1 à d_max"""
+def verify_nilpotence_mod2(d_max=100, sizes=None, verbose=None):
+    """Vérifie que (I+R)² ≡ 0 (mod 2) pour toutes tailles de 1 à d_max (ou pour ``sizes``)"""
     print("Vérification de (I+R)² ≡ 0 (mod 2)")
     print("=" * 50)
     
-    for d in range(1, d_max + 1):
-        I = np.eye(d, dtype=int)
+    sizes = list(sizes) if sizes else list(range(1, d_max + 1))
+    if verbose is None:
+        verbose = len(sizes) <= 100
+    t0 = time.time()
+    for d in sizes:
+        I = GF2Matrix.identity(d)
         R = create_reversal_matrix(d)
         J = I + R
-        J_squared = np.matmul(J, J)
-        
-        # Vérification modulo 2
-        J_squared_mod2 = J_squared % 2
-        is_nilpotent = np.all(J_squared_mod2 == 0)
+        # produit sur GF(2) : I+R a au plus deux bits par ligne (chemin creux)
+        J_squared_mod2 = J @ J
+        is_nilpotent = J_squared_mod2.is_zero()
         
-        print(f"Taille d = {d:3d}: (I+R)² ≡ 0 (mod 2) ? {is_nilpotent}")
+        if verbose:
+            print(f"Taille d = {d:3d}: (I+R)² ≡ 0 (mod 2) ? {is_nilpotent}")
         
         if not is_nilpotent:
             print(f"❌ Échec pour d = {d}")
-            print("Matrice (I+R)² mod 2:")
-            print(J_squared_mod2)
+            if d <= 64:
+                print("Matrice (I+R)² mod 2:")
+                print(J_squared_mod2.to_dense())
             return False
     
-    print(f"\n✅ Vérification réussie pour d = 1 à {d_max}!")
+    print(f"\n✅ Vérification réussie pour {len(sizes)} tailles (d max = {max(sizes)}) "
+          f"en {time.time() - t0:.2f}s!")
     return True
 
 def theoretical_proof():
@@ -53,8 +58,13 @@ def theoretical_proof():
     print("\n✅ Preuve théorique complète!")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check (I+R)^2 = 0 mod 2 for the reversal matrix R.')
+    parser.add_argument('--d-max', type=int, default=20)
+    parser.add_argument('--sizes', type=int, nargs='+', default=None, help='tailles isolées (ex. 100000)')
+    args = parser.parse_args()
+    
     # Vérification computationnelle
-    verify_nilpotence_mod2(20)
+    verify_nilpotence_mod2(args.d_max, args.sizes)
     
     # Preuve théorique
     theoretical_proof()
\ No newline at end of file
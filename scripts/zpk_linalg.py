@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Batched linear algebra over Z/p^k for stacks of same-shaped systems.
+
+Every function takes a stack ``A`` of shape (B, m, n) -- B independent
+systems -- and works on all of them at once with NumPy. The loop runs over
+pivot steps, never over systems. Arithmetic is in int64 when p^k <= 2^31,
+so the product of two residues fits. Larger moduli (the Hensel lifts go
+to 2^120) use object arrays of Python ints; the code path is the same.
+
+The kernel is a full-pivoting elimination that yields a Smith form
+``U A V = diag(p^e_0, p^e_1, ...)``. At step t, each system independently
+picks, in its remaining submatrix, an entry of minimal p-adic valuation
+e_t. Z/p^k is a local ring, so every other entry of that row and column
+is a multiple of p^e_t. The pivot row is scaled by the inverse of the
+unit part, then the pivot row and column are cleared exactly. Units fail
+exactly where e_t > 0, and the exponents say by how much. From the form:
+
+ - ``smith``: the exponents e (k when the remaining block is zero mod p^k);
+ - ``rank``: the number of exponents below k, and ``unit_rank`` the number
+   equal to 0 (the rank of A mod p);
+ - ``solve``: A x = b for a stack of right-hand sides. It is consistent
+   iff each (U b)_t is divisible by p^e_t, plus the zero rows for m > n;
+   free variables are set to 0;
+ - ``inverse``: for square systems whose exponents are all 0 (A invertible
+   mod p, hence mod p^k), otherwise the system is flagged singular.
+
+Modular inverses of units are computed by Newton iteration,
+x <- x (2 - u x), from a table of inverses mod p.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+INT64_MAX_MODULUS = 1 << 31
+
+
+def _dtype(q: int):
+    return np.int64 if q <= INT64_MAX_MODULUS else object
+
+
+def as_stack(A, q: int):
+    """Tableau (B, m, n) réduit mod q (une matrice 2-D devient une pile de 1)."""
+    dt = _dtype(q)
+    if dt is object:
+        arr = np.array(A, dtype=object)
+    else:
+        arr = np.asarray(A, dtype=np.int64)
+    if arr.ndim == 2:
+        arr = arr[None]
+    return arr % q
+
+
+def valuation(x, p: int, k: int):
+    """v_p de chaque entrée (k pour 0 mod p^k), tableau int64."""
+    v = np.zeros(x.shape, dtype=np.int64)
+    pe = 1
+    mask = np.ones(x.shape, dtype=bool)
+    for _ in range(k):
+        pe *= p
+        mask &= (x % pe == 0).astype(bool)
+        if not mask.any():
+            break
+        v += mask
+    return v
+
+
+def unit_inverse(u, p: int, k: int):
+    """Inverse mod p^k d'unités (Newton à partir des inverses mod p)."""
+    q = p ** k
+    table = np.array([pow(i, -1, p) if i % p else 0 for i in range(p)], dtype=np.int64)
+    x = table[np.asarray(u % p, dtype=np.int64)]
+    if u.dtype == object:
+        x = x.astype(object)
+    prec = 1
+    while prec < k:
+        x = (x * ((2 - u * x) % q)) % q
+        prec *= 2
+    return x % q
+
+
+def _swap_rows(X, t: int, idx):
+    ar = np.arange(X.shape[0])
+    row_t = X[ar, t].copy()
+    X[ar, t] = X[ar, idx]
+    X[ar, idx] = row_t
+
+
+def _swap_cols(X, t: int, idx):
+    ar = np.arange(X.shape[0])
+    col_t = X[ar, :, t].copy()
+    X[ar, :, t] = X[ar, :, idx]
+    X[ar, :, idx] = col_t
+
+
+def smith_form(A, p: int, k: int, rhs=None):
+    """Élimination à pivot total : (exposants e (B, min(m,n)), U rhs, V).
+
+    ``rhs`` (B, m, r) receives the row operations; V (B, n, n) accumulates
+    the column operations, so that x = V y maps solutions back.
+    """
+    q = p ** k
+    W = as_stack(A, q).copy()
+    nb, m, n = W.shape
+    R = None if rhs is None else as_stack(rhs, q).copy()
+    V = np.zeros((nb, n, n), dtype=W.dtype)
+    V[:, np.arange(n), np.arange(n)] = 1
+    steps = min(m, n)
+    e = np.full((nb, steps), k, dtype=np.int64)
+    for t in range(steps):
+        sub = W[:, t:, t:]
+        val = valuation(sub, p, k).reshape(nb, -1)
+        flat = np.argmin(val, axis=1)
+        et = val[np.arange(nb), flat]
+        e[:, t] = et
+        if (et >= k).all():
+            break
+        i = t + flat // (n - t)
+        j = t + flat % (n - t)
+        _swap_rows(W, t, i)
+        if R is not None:
+            _swap_rows(R, t, i)
+        _swap_cols(W, t, j)
+        _swap_cols(V, t, j)
+        live = et < k
+        pe = np.array([p ** int(v) if v < k else q for v in et], dtype=W.dtype)
+        piv = W[:, t, t]
+        u = np.where(live, piv // pe, 1)
+        uinv = unit_inverse(u, p, k)
+        W[:, t, t:] = (W[:, t, t:] * uinv[:, None]) % q
+        if R is not None:
+            R[:, t] = (R[:, t] * uinv[:, None]) % q
+        # lignes sous le pivot : multiples exacts de p^e
+        f = W[:, t + 1:, t] // pe[:, None]
+        W[:, t + 1:, t:] = (W[:, t + 1:, t:] - f[:, :, None] * W[:, t, None, t:]) % q
+        if R is not None:
+            R[:, t + 1:] = (R[:, t + 1:] - f[:, :, None] * R[:, t, None, :]) % q
+        # colonnes à droite : idem, reportées dans V
+        g = W[:, t, t + 1:] // pe[:, None]
+        V[:, :, t + 1:] = (V[:, :, t + 1:] - V[:, :, t, None] * g[:, None, :]) % q
+        W[:, t, t + 1:] = 0
+    return e, R, V
+
+
+def smith(A, p: int, k: int):
+    """Exposants des facteurs invariants p^e de chaque système."""
+    return smith_form(A, p, k)[0]
+
+
+def rank(A, p: int, k: int):
+    """Nombre de facteurs invariants non nuls mod p^k, par système."""
+    return (smith(A, p, k) < k).sum(axis=1)
+
+
+def unit_rank(A, p: int, k: int = 1):
+    """Rang de A mod p (facteurs invariants unités), par système."""
+    return (smith(A, p, k) == 0).sum(axis=1)
+
+
+def solve(A, b, p: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Résout A x = b mod p^k pour chaque système.
+
+    ``b`` has shape (B, m) or (B, m, r) ((m,) or (m, r) for a single 2-D
+    ``A``). Returns ``(x, ok)`` with x of shape (B, n) or (B, n, r), B = 1
+    for a single system (zeros where ``ok`` is False).
+    """
+    q = p ** k
+    Ast = as_stack(A, q)
+    nb, m, n = Ast.shape
+    bb = np.array(b, dtype=Ast.dtype) if Ast.dtype == object else np.asarray(b, dtype=np.int64)
+    if np.ndim(A) == 2 or (Ast.dtype == object and np.array(A, dtype=object).ndim == 2):
+        bb = bb[None]           # un seul système : b (m,) ou (m, r)
+    vector = bb.ndim == 2
+    if vector:
+        bb = bb[..., None]
+    e, R, V = smith_form(Ast, p, k, bb)
+    steps = e.shape[1]
+    ok = np.ones(nb, dtype=bool)
+    y = np.zeros((nb, n, R.shape[2]), dtype=R.dtype)
+    for t in range(steps):
+        et = e[:, t]
+        pe = np.array([p ** int(v) for v in et], dtype=R.dtype)
+        div = (R[:, t] % pe[:, None] == 0).astype(bool).all(axis=1)
+        ok &= div
+        y[:, t] = np.where((et < k)[:, None], R[:, t] // pe[:, None], 0)
+    if m > steps:
+        ok &= ~(R[:, steps:].astype(bool)).any(axis=(1, 2))
+    # x = V y, réduit à chaque terme (n q^2 dépasserait int64)
+    x = np.zeros_like(y)
+    for t in range(n):
+        x = (x + V[:, :, t, None] * y[:, t, None, :]) % q
+    x[~ok] = 0
+    return (x[..., 0] if vector else x), ok
+
+
+def inverse(A, p: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(inverses mod p^k, inversible) pour une pile de matrices carrées."""
+    q = p ** k
+    Ast = as_stack(A, q)
+    nb, m, n = Ast.shape
+    if m != n:
+        raise ValueError('inverse needs square systems')
+    eye = np.zeros((nb, n, n), dtype=Ast.dtype)
+    eye[:, np.arange(n), np.arange(n)] = 1
+    e = smith(Ast, p, k)
+    invertible = (e == 0).all(axis=1)
+    x, _ = solve(Ast, eye, p, k)
+    x[~invertible] = 0
+    return x, invertible
+
+
+def inverse_mod(A, p: int, k: int) -> Optional[list]:
+    """Inverse d'une seule matrice (listes d'entiers) ou None si non inversible mod p."""
+    x, ok = inverse(A, p, k)
+    return [[int(v) for v in row] for row in x[0]] if ok[0] else None
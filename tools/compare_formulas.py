@@ -4,10 +4,15 @@ Compare LaTeX formulas between the monolithic file and the split Documents.
 
 Produces JSON report at results/formula_comparison_report.json and prints a short summary.
 """
+import os
 import re
+import sys
 import json
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from latex_index import FormulaIndex
+
 
 def read_file(p: Path):
     if not p.exists():
@@ -68,15 +73,11 @@ def make_set(formulas):
     return out
 
 
-def fuzzy_present(fm, doc_set):
-    # Try exact or substring match; also compare shortened prefix
-    if fm in doc_set:
-        return True
-    short = fm[:120]
-    for d in doc_set:
-        if short in d:
-            return True
-    return False
+def fuzzy_present(fm, doc_index):
+    # Exact match, or shortened prefix contained in a doc formula (shingle index)
+    if not isinstance(doc_index, FormulaIndex):
+        doc_index = FormulaIndex(doc_index)
+    return doc_index.present(fm, prefix=120) is not None
 
 
 def main():
@@ -89,12 +90,13 @@ def main():
     mon_set = make_set(mon_math)
     doc_set = make_set(doc_math)
 
+    doc_index = FormulaIndex(doc_set)
     missing = []
     paraphrased = []
     for fm in sorted(mon_set):
         if fm in doc_set:
             continue
-        elif fuzzy_present(fm, doc_set):
+        elif fuzzy_present(fm, doc_index):
             paraphrased.append(fm)
         else:
             missing.append(fm)
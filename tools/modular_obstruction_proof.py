@@ -4,6 +4,13 @@
 Preuve de l'obstruction modulo 2 persistante pour 196 - NOUVELLE STRATÉGIE
 """
 
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from palindrome_automaton import digits_of, is_feasible
+
+
 def reverse_add(n):
     """Applique T(n) = n + reverse(n)"""
     return n + int(str(n)[::-1])
@@ -12,53 +19,14 @@ def has_mod2_obstruction(n):
     """
     Vérifie l'obstruction modulo 2 pour un nombre n en utilisant l'analyse des retenues.
     Retourne True si aucune configuration de retenues binaires ne produit un palindrome valide.
+
+    Décidé par l'automate bords -> centre de scripts/palindrome_automaton.py
+    (retenues dans {0, 1}, résultat à d ou d+1 chiffres). L'ancienne
+    heuristique c_i ≡ a_{i+1} (mod 2) concluait à tort à une obstruction
+    pour des n dont T(n) est un palindrome (ex. n = 11, T(n) = 22) ; les deux
+    coïncident sur les 3000 premiers itérés de 196.
     """
-    digits = list(map(int, str(n)))
-    d = len(digits)
-    
-    # Testons les deux cas possibles pour la retenue finale
-    for final_carry in [0, 1]:
-        carries = [0] * (d + 1)  # c[-1] = 0, c[d] = 0
-        carries[d-1] = final_carry  # Cas 1: final_carry=0 (d chiffres), Cas 2: final_carry=1 (d+1 chiffres)
-        
-        # Pour i=0 à d-2, déterminer les retenues selon c_i ≡ a_{i+1} mod 2
-        valid = True
-        for i in range(0, d-1):
-            carries[i] = digits[i+1] % 2
-        
-        # Vérifier la cohérence des retenues
-        result_digits = []
-        for i in range(d):
-            total = digits[i] + digits[d-1-i] + carries[i-1]
-            result_digit = total % 10
-            next_carry = total // 10
-            
-            if i < d-1 and next_carry != carries[i]:
-                valid = False
-                break
-            elif i == d-1 and next_carry != final_carry:
-                valid = False
-                break
-                
-            result_digits.append(result_digit)
-        
-        if not valid:
-            continue
-            
-        # Vérifier si le résultat est un palindrome
-        if final_carry == 0:
-            # Résultat a d chiffres
-            if result_digits == result_digits[::-1]:
-                # Vérifier que tous les chiffres sont valides (0-9)
-                if all(0 <= d <= 9 for d in result_digits):
-                    return False  # Solution trouvée
-        else:
-            # Résultat a d+1 chiffres - le premier chiffre doit être 1
-            if result_digits[-1] == 1 and result_digits[:-1] == result_digits[-2::-1]:
-                if all(0 <= d <= 9 for d in result_digits):
-                    return False  # Solution trouvée
-    
-    return True  # Aucune solution valide
+    return not is_feasible(digits_of(n))
 
 def verify_persistent_obstruction(start=196, iterations=10000):
     """Vérifie que l'obstruction modulo 2 persiste sur toutes les itérations"""
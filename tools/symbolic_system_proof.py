@@ -4,24 +4,31 @@
 Preuve par système dynamique symbolique - états obstructifs récurrents
 """
 
-def analyze_1098_representatives():
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from bulk_representatives import analyse_modulus
+
+
+def analyze_1098_representatives(modulus=10**6):
     """
-    Analyse des 1098 représentants modulo 10^6
-    (Données simulées - en réalité vous avez ces données)
+    Analyse des représentants modulo 10^6 (calculée, voir scripts/bulk_representatives.py)
     """
-    print("🔍 Analyse des 1098 représentants modulo 10^6...")
+    print(f"🔍 Analyse des représentants modulo {modulus}...")
     
-    # En réalité, vous avez les 1098 représentants exacts
-    # Pour la démonstration, nous supposons qu'ils sont tous obstructifs
-    representatives_obstructed = True  # À remplacer par la vérification réelle
+    info = analyse_modulus(modulus, max_iter=20000)
+    n = info['checked_representatives']
+    print(f"   {n} représentants (cycle à partir de l'itération {info['cycle_start_index']})")
     
-    if representatives_obstructed:
-        print("✅ Tous les 1098 représentants sont obstructifs modulo 2")
-        print("   - La dynamique est confinée aux états obstructifs")
-        print("   - Cycle fini d'états obstructifs modulo 10^6")
+    if info['obstruction_mod2_count'] == n and info['needs_further_check_count'] == 0:
+        print(f"✅ Tous les {n} représentants sont obstructifs modulo 2")
+        print("   - Jacobien de rang plein modulo 2 pour chacun")
+        print(f"   - Cycle fini d'états obstructifs modulo {modulus}")
         return True
     else:
-        print("❌ Certains représentants ne sont pas obstructifs")
+        print(f"❌ {n - info['obstruction_mod2_count']} représentants non obstructifs, "
+              f"{info['needs_further_check_count']} à vérifier")
         return False
 
 def dynamical_systems_proof():